@@ -0,0 +1,271 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-19 01:40
+
+# Api responses generated from the bundled OGD csv files (real stops,
+# lines and rbls) in the format of the api documentation (docs/).
+# Generated, not recorded - deterministic for a given seed
+
+import os
+import io
+import json
+import random
+import datetime
+from xml.sax.saxutils import quoteattr, escape
+
+
+BASE_TIME = datetime.datetime(2026, 10, 18, 10, 0, 0)
+""" Local time all fixtures are relative to """
+MOT_TYPES = {
+    "ptMetro": 2, "ptTram": 4, "ptTramWLB": 4, "ptBusCity": 5,
+    "ptBusNight": 5, "ptTrainS": 1,
+}
+""" Vehicle type -> routing api means of transport """
+
+
+def platforms_with_rbl(db):
+    """
+    Platforms of the database that have an rbl, in file order
+
+    :param db: Loaded database
+    :type db: wl.db.WLDatabase
+    :rtype: list[wl.store.PlatformView]
+    """
+    return [
+        platform for _, platform in sorted(db.platforms.items())
+        if platform.rbl is not None
+    ]
+
+
+def _rt_time(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000+0200")
+
+
+def realtime_monitor(db, n_rbls, n_departures=6, seed=1):
+    """
+    Realtime api monitor response for n_rbls real rbls
+
+    :param db: Loaded database
+    :type db: wl.db.WLDatabase
+    :param n_rbls: Number of rbls (monitors)
+    :type n_rbls: int
+    :param n_departures: Departures per line (default: 6)
+    :type n_departures: int
+    :param seed: Random seed (default: 1)
+    :type seed: int
+    :return: Response body
+    :rtype: unicode
+    """
+    rand = random.Random(seed)
+    platforms = platforms_with_rbl(db)
+    monitors = []
+
+    for platform in rand.sample(platforms, min(n_rbls, len(platforms))):
+        stop = platform.stop
+        line = platform.line
+        direction_id = "1" if platform.direction == "H" else "2"
+        departures = []
+        minute = rand.randint(0, 4)
+        for _ in range(n_departures):
+            planned = BASE_TIME + datetime.timedelta(minutes=minute)
+            real = planned + datetime.timedelta(seconds=rand.randint(0, 180))
+            departures.append({
+                "departureTime": {
+                    "timePlanned": _rt_time(planned),
+                    "timeReal": _rt_time(real),
+                    "countdown": minute,
+                },
+            })
+            minute += rand.randint(3, 12)
+        monitors.append({
+            "locationStop": {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [platform.lng, platform.lat],
+                },
+                "properties": {
+                    "name": "{}".format(stop.stop_id),
+                    "title": stop.name,
+                    "municipality": stop.municipality,
+                    "municipalityId": stop.municipality_id,
+                    "type": "stop",
+                    "coordName": "WGS84",
+                    "gate": platform.platform or None,
+                    "attributes": {"rbl": platform.rbl},
+                },
+            },
+            "lines": [{
+                "name": line.designation,
+                "towards": stop.name,
+                "direction": platform.direction,
+                "richtungsId": direction_id,
+                "barrierFree": rand.random() < 0.8,
+                "realtimeSupported": bool(line.realtime),
+                "trafficjam": rand.random() < 0.05,
+                "departures": {"departure": departures},
+                "type": line.car_type,
+                "lineId": line.id,
+            }],
+            "attributes": {},
+        })
+    return json.dumps({
+        "data": {"monitors": monitors},
+        "message": {
+            "value": "OK",
+            "messageCode": 1,
+            "serverTime": _rt_time(BASE_TIME),
+        },
+    })
+
+
+def _itd_date_time(dt):
+    return (
+        '<itdDateTime><itdDate year="{}" month="{}" day="{}" weekday="{}"/>'
+        '<itdTime hour="{}" minute="{}"/></itdDateTime>'
+    ).format(
+        dt.year, dt.month, dt.day, dt.isoweekday() % 7 + 1, dt.hour, dt.minute
+    )
+
+
+def _itd_line(index, line, direction):
+    return (
+        '<itdServingLine key="{index}" code="{mot}" number={number} '
+        'symbol={number} motType="{mot}" realtime="{realtime}" '
+        'direction={direction} valid="" compound="0" TTB="0" STT="0" '
+        'ROP="0" type="unknown" spTr="" destID="" stateless={stateless} '
+        'lineDisplay="line" index="{index}:0" selected="1">'
+        '<itdNoTrain name=""/>'
+        '<motDivaParams line="{line_id}" project="j26" direction="H" '
+        'supplement="" network="wl"/>'
+        '<itdRouteDescText>{desc}</itdRouteDescText></itdServingLine>'
+    ).format(
+        index=index, mot=MOT_TYPES.get(line.car_type, 5),
+        number=quoteattr(line.designation), realtime=line.realtime and 1 or 0,
+        direction=quoteattr(direction),
+        stateless=quoteattr("21-{}-j26-1".format(line.designation)),
+        line_id=line.id, desc=escape(direction)
+    )
+
+
+def routing_departure_monitor(db, limit, seed=1):
+    """
+    Routing api XML_DM_REQUEST response with limit departures at the
+    real stop with the most rbls
+
+    :param db: Loaded database
+    :type db: wl.db.WLDatabase
+    :param limit: Number of departures
+    :type limit: int
+    :param seed: Random seed (default: 1)
+    :type seed: int
+    :return: Response body
+    :rtype: bytes
+    """
+    rand = random.Random(seed)
+    stop = max(db.stops.values(), key=lambda a: (
+        sum(1 for p in a.platforms or () if p.rbl is not None), -a.id
+    ))
+    platforms = [p for p in stop.platforms if p.rbl is not None]
+    lines = []
+    seen = set()
+
+    for platform in platforms:
+        line = platform.line
+        if line.id not in seen:
+            seen.add(line.id)
+            lines.append((line, platform))
+    name = escape(stop.name)
+    diva = stop.stop_id
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<itdRequest version="10.2.10.139" language="de" lengthUnit="METER"'
+        ' sessionID="WL_BENCH" client="python-wienerlinien" '
+        'virtDir="wl-ogd" serverID="EFA10_01" clientIP="127.0.0.1" '
+        'now="{}" nowWD="1">'.format(BASE_TIME.isoformat()),
+        '<itdDepartureMonitorRequest requestID="1">',
+        '<itdOdv type="stop" usage="dm"><itdOdvPlace state="identified">'
+        '<odvPlaceElem>Wien</odvPlaceElem></itdOdvPlace>'
+        '<itdOdvName state="identified"><odvNameElem stopID="{diva}" '
+        'value="{diva}:1">{name}</odvNameElem></itdOdvName>'
+        '<itdOdvAssignedStops><itdOdvAssignedStop stopID="{diva}" '
+        'x="{lng}" y="{lat}" mapName="WGS84" value="{diva}:{name}" '
+        'place="Wien" nameWithPlace="Wien, {name}" distanceTime="0" '
+        'isTransferStop="1" vm="100" gid="at:49:{diva}">{name}'
+        '</itdOdvAssignedStop></itdOdvAssignedStops></itdOdv>'.format(
+            diva=diva, name=name, lat=stop.lat, lng=stop.lng
+        ),
+        _itd_date_time(BASE_TIME),
+        '<itdServingLines>',
+    ]
+    for index, (line, platform) in enumerate(lines):
+        parts.append(_itd_line(index, line, platform.direction or stop.name))
+    parts.append('</itdServingLines><itdDepartureList>')
+    minute = 0
+
+    for _ in range(limit):
+        index = rand.randrange(len(lines))
+        line, platform = lines[index]
+        dt = BASE_TIME + datetime.timedelta(minutes=minute)
+        parts.append(
+            '<itdDeparture stopID="{diva}" x="{lng}" y="{lat}" '
+            'mapName="WGS84" area="{area}" platform={platform} '
+            'platformName={platform} stopName="{name}" nameWO="{name}" '
+            'countdown="{countdown}">{dt}{line}<itdInfoLinkList/>'
+            '</itdDeparture>'.format(
+                diva=diva, lat=platform.lat, lng=platform.lng,
+                area=escape(platform.area or ""),
+                platform=quoteattr(platform.platform or ""),
+                name=name, countdown=minute, dt=_itd_date_time(dt),
+                line=_itd_line(index, line, platform.direction or stop.name)
+            )
+        )
+        minute += rand.randint(0, 2)
+    parts.append(
+        '</itdDepartureList></itdDepartureMonitorRequest></itdRequest>'
+    )
+    return "".join(parts).encode("utf-8")
+
+
+REALTIME_SIZES = (1, 50, 500)
+""" Rbls per realtime fixture """
+ROUTING_LIMITS = (10, 50, 200)
+""" Departures per routing fixture """
+
+
+def write_fixtures(db, path):
+    """
+    Write all fixtures to directory (for inspection or other tools)
+
+    :param db: Loaded database
+    :type db: wl.db.WLDatabase
+    :param path: Directory to write to
+    :type path: str | unicode
+    :return: Written files
+    :rtype: list[str | unicode]
+    """
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    res = []
+
+    for size in REALTIME_SIZES:
+        name = os.path.join(path, "realtime_monitor_{}.json".format(size))
+        with io.open(name, "w", encoding="utf-8") as f:
+            f.write(realtime_monitor(db, size))
+        res.append(name)
+    for limit in ROUTING_LIMITS:
+        name = os.path.join(path, "routing_dm_{}.xml".format(limit))
+        with io.open(name, "wb") as f:
+            f.write(routing_departure_monitor(db, limit))
+        res.append(name)
+    return res
@@ -0,0 +1,225 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-19 01:55
+
+# Offline benchmarks of the hot paths
+#
+#   python -m benchmarks.run [--output results.json] [--filter realtime]
+#
+# Prints one line per benchmark and writes machine readable results
+# (time per call, calls per second, allocations) as json
+
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import datetime
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+from wl import WL, WLRealtime, WLRouting
+from wl.db import WLDatabase
+
+from .fixtures import realtime_monitor, routing_departure_monitor, \
+    write_fixtures, REALTIME_SIZES, ROUTING_LIMITS
+
+
+clock = getattr(time, "perf_counter", time.time)
+
+
+def measure(func, min_time=0.2, repeat=5):
+    """
+    Time func and record its allocations
+
+    :param func: Function to benchmark
+    :type func: () -> T
+    :param min_time: Seconds per round - sets the calls per round
+        (default: 0.2)
+    :type min_time: float
+    :param repeat: Number of rounds (default: 5)
+    :type repeat: int
+    :return: Result
+    :rtype: dict[unicode, T]
+    """
+    func()
+    number = 1
+
+    while True:
+        start = clock()
+        for _ in range(number):
+            func()
+        elapsed = clock() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(
+            2, min(10, int(min_time / elapsed) + 1)
+        )
+    times = [elapsed / number]
+
+    for _ in range(repeat - 1):
+        start = clock()
+        for _ in range(number):
+            func()
+        times.append((clock() - start) / number)
+    times.sort()
+    res = {
+        'calls': number,
+        'rounds': repeat,
+        'min': times[0],
+        'median': times[len(times) // 2],
+        'max': times[-1],
+        'per_second': 1.0 / times[0] if times[0] else None,
+        'alloc_peak': None,
+        'alloc_blocks': None,
+    }
+    if tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            func()
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        stats = after.compare_to(before, "filename")
+        res['alloc_peak'] = peak
+        res['alloc_blocks'] = sum(
+            stat.count_diff for stat in stats if stat.count_diff > 0
+        )
+    return res
+
+
+def benchmarks(path_data):
+    """
+    All benchmarks
+
+    :param path_data: Directory of the OGD csv files
+    :type path_data: str | unicode
+    :return: (name, function, rounds)
+    :rtype: list[(unicode, () -> T, int)]
+    """
+    db_settings = {'path_data': path_data, 'path_snapshot': None}
+    db = WLDatabase(db_settings)
+    db.csv_load()
+    res = []
+
+    def csv_load():
+        WLDatabase(db_settings).csv_load()
+
+    res.append(("database.csv_load", csv_load, 3))
+    divas = sorted(
+        stop.stop_id for stop in db.stops.values()
+        if stop.stop_id is not None
+    )[:1000]
+
+    def find_stop():
+        for diva in divas:
+            db.find_stop(diva)
+
+    res.append(("database.find_stop[x{}]".format(len(divas)), find_stop, 5))
+    realtime = WLRealtime({'api_key': "bench", 'cache': False})
+    realtime_lazy = WLRealtime({
+        'api_key': "bench", 'cache': False, 'lazy': True, 'keep_raw': False
+    })
+
+    for size in REALTIME_SIZES:
+        body = realtime_monitor(db, size)
+        res.append((
+            "realtime.parse_response[rbls={}]".format(size),
+            lambda body=body: realtime._parse_response(body), 5
+        ))
+        res.append((
+            "realtime.parse_response_lazy[rbls={}]".format(size),
+            lambda body=body: realtime_lazy._parse_response(body), 5
+        ))
+    routing = WLRouting({})
+    wl = WL({'realtime': {'api_key': "bench"}, 'database': db_settings})
+    wl.database = db
+
+    for limit in ROUTING_LIMITS:
+        body = routing_departure_monitor(db, limit)
+        res.append((
+            "routing.parse_dm[limit={}]".format(limit),
+            lambda body=body: routing._collect_dm(
+                routing._iter_dm(io.BytesIO(body))
+            ), 5
+        ))
+        itd = routing._collect_dm(routing._iter_dm(io.BytesIO(body)))
+        res.append((
+            "wl.from_itd_dm_response[limit={}]".format(limit),
+            lambda itd=itd: wl._from_itd_dm_response(itd), 5
+        ))
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Offline benchmarks of python-wienerlinien"
+    )
+    parser.add_argument(
+        "--output", "-o", help="Write json results to file"
+    )
+    parser.add_argument(
+        "--filter", "-k", default="",
+        help="Only run benchmarks containing this text"
+    )
+    parser.add_argument(
+        "--min-time", type=float, default=0.2,
+        help="Seconds per round (default: 0.2)"
+    )
+    parser.add_argument(
+        "--data", default="data", help="Directory of OGD csv files"
+    )
+    parser.add_argument(
+        "--write-fixtures", metavar="DIR",
+        help="Write generated api fixtures to DIR and exit"
+    )
+    args = parser.parse_args(argv)
+    if args.write_fixtures:
+        db = WLDatabase({'path_data': args.data, 'path_snapshot': None})
+        db.csv_load()
+        for name in write_fixtures(db, args.write_fixtures):
+            print(name)
+        return 0
+    results = []
+
+    for name, func, rounds in benchmarks(args.data):
+        if args.filter not in name:
+            continue
+        res = measure(func, args.min_time, rounds)
+        res['name'] = name
+        results.append(res)
+        print("{:<45} {:>12.1f} us {:>12.1f}/s {:>10} B".format(
+            name, res['min'] * 1e6, res['per_second'] or 0,
+            res['alloc_peak'] if res['alloc_peak'] is not None else "-"
+        ))
+    if args.output:
+        with io.open(args.output, "w", encoding="utf-8") as f:
+            f.write("{}".format(json.dumps({
+                'created': datetime.datetime.utcnow().isoformat() + "Z",
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'results': results,
+            }, indent=2, sort_keys=True)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
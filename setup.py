@@ -71,6 +71,9 @@ setup(
         "wl.models",
     ],
     install_requires=requirements,
+    extras_require={
+        'aio': ["aiohttp>=3.0"],
+    },
     license="MIT License",
     keywords="",
     classifiers=[
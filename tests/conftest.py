@@ -0,0 +1,108 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 10:00
+
+import os
+import json
+import shutil
+import threading
+
+import pytest
+
+from wl.db import WLDatabase
+from wl.errors import RequestException
+from benchmarks.fixtures import realtime_monitor
+
+
+PATH_DATA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"
+)
+CSV_FILES = (
+    "wienerlinien-ogd-haltestellen.csv",
+    "wienerlinien-ogd-linien.csv",
+    "wienerlinien-ogd-steige.csv",
+)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """ Writable copy of the bundled csv files """
+    for name in CSV_FILES:
+        shutil.copy(os.path.join(PATH_DATA, name), str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """ Database loaded from the bundled csv files (read only) """
+    db = WLDatabase({'path_data': PATH_DATA})
+    db.csv_load()
+    return db
+
+
+class _Page(object):
+
+    def __init__(self, html):
+        self.html = html
+
+
+class FakeRealtimeTransport(object):
+    """
+    Answers monitor requests from generated monitors (offline)
+
+    Requested rbls without a monitor are left out of the response, rbls
+    in fail raise RequestException
+    """
+
+    def __init__(self, monitors):
+        super(FakeRealtimeTransport, self).__init__()
+        self.monitors = monitors
+        """ Monitor by rbl (unicode)
+            :type : dict[unicode, dict] """
+        self.fail = set()
+        self.requests = []
+        """ Requested rbls per request """
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None):
+        if isinstance(params, dict):
+            params = list(params.items())
+        rbls = ["{}".format(v) for k, v in params or () if k == "rbl"]
+        with self._lock:
+            self.requests.append(rbls)
+        if self.fail.intersection(rbls):
+            raise RequestException("Failed")
+        return _Page(json.dumps({
+            "data": {"monitors": [
+                self.monitors[rbl] for rbl in rbls if rbl in self.monitors
+            ]},
+            "message": {
+                "value": "OK", "messageCode": 1,
+                "serverTime": "2026-10-18T10:00:00.000+0200",
+            },
+        }))
+
+
+@pytest.fixture(scope="session")
+def monitors(database):
+    """ Generated realtime monitors by rbl """
+    data = json.loads(realtime_monitor(database, 50, n_departures=3))
+    return {
+        "{}".format(m['locationStop']['properties']['attributes']['rbl']): m
+        for m in data['data']['monitors']
+    }
+
+
+@pytest.fixture
+def transport(monitors):
+    return FakeRealtimeTransport(monitors)
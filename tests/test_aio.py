@@ -0,0 +1,184 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 12:30
+
+import asyncio
+import threading
+
+import pytest
+
+aio = pytest.importorskip("wl.aio")
+
+from wl.errors import RequestException
+from wl.limiter import RateLimiter, priority, PRIORITY_BACKGROUND
+from wl.models.routing import ItdDMResponse
+from wl.resilience import Resilience
+from wl.sessions import SessionPool
+
+
+def test_acquire_waits_on_loop():
+    limiter = RateLimiter(rate=50.0, burst=1)
+    threads = threading.active_count()
+
+    async def run():
+        waited = await asyncio.gather(
+            *[aio._acquire(limiter) for _ in range(5)]
+        )
+        assert threading.active_count() == threads
+        return waited
+
+    waited = asyncio.run(run())
+    assert waited[0] == 0.0
+    assert max(waited) >= 0.06
+    assert limiter.stats()['granted'] == {'interactive': 5}
+
+
+def test_acquire_uses_task_priority():
+    limiter = RateLimiter(rate=50.0, burst=1)
+    limiter.acquire()
+    order = []
+
+    async def run(prio):
+        with priority(prio):
+            await aio._acquire(limiter)
+        order.append(prio)
+
+    async def main():
+        background = asyncio.ensure_future(run(PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        await run(0)
+        await background
+
+    asyncio.run(main())
+    assert order == [0, PRIORITY_BACKGROUND]
+
+
+def test_cancelled_acquire_takes_no_token():
+    limiter = RateLimiter(rate=10.0, burst=1)
+    limiter.acquire()
+
+    async def main():
+        task = asyncio.ensure_future(aio._acquire(limiter))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert limiter.stats()['waiting'] == 0
+        await asyncio.sleep(0.1)
+        assert await aio._acquire(limiter) == 0.0
+
+    asyncio.run(main())
+
+
+def test_resilient_call_inline_while_healthy():
+    resilience = Resilience({'stale_timeout': 1.0})
+
+    async def answer(value):
+        res = ItdDMResponse()
+        res.session_id = value
+        return res
+
+    async def fail():
+        raise RequestException("Failed")
+
+    async def main():
+        await aio._resilient_call(
+            resilience, "dm", "a", lambda: answer("old")
+        )
+        res = await aio._resilient_call(
+            resilience, "dm", "a", lambda: answer("new")
+        )
+        assert res.session_id == "new"
+        assert not res.stale
+        assert not resilience._tasks
+        res = await aio._resilient_call(resilience, "dm", "a", fail)
+        assert res.stale
+        assert res.session_id == "new"
+        assert resilience.degraded("dm")
+
+    asyncio.run(main())
+
+
+class FakeAsyncRouting(object):
+
+    def __init__(self):
+        super(FakeAsyncRouting, self).__init__()
+        self.rate_limit = None
+        self.calls = []
+
+    async def _answer(self, session_id, request_id=None):
+        self.calls.append(session_id)
+        res = ItdDMResponse()
+        res.session_id = session_id or "S101"
+        res.request_id = "{}".format(int(request_id or 0) + 1)
+        return res
+
+    async def dm_search(self, location, dt=None, limit=40):
+        return await self._answer(None)
+
+    async def dm_select(self, resp, lines=None, dt=None, stops=None, limit=40):
+        return await self._answer(resp.session_id, resp.request_id)
+
+    async def dm_read(self, resp):
+        return await self._answer(resp.session_id, resp.request_id)
+
+    async def close(self):
+        pass
+
+
+def test_async_sessions_tracked_and_refreshed():
+    async def main():
+        wl = aio.AsyncWL({
+            'realtime': {'api_key': "test"},
+            'sessions': {'ttl': 0.4, 'refresh_margin': 0.2},
+        })
+        wl.routing = FakeAsyncRouting()
+        res = await wl.find_by("Schottentor")
+        assert res.id == "S101:1"
+        res = await wl.select(res.id, lines=[0])
+        assert res.id == "S101:2"
+        assert wl.routing.calls == [None, "S101"]
+        await asyncio.sleep(0.25)
+        assert wl.sessions.stats()['refreshes'] == 1
+        assert wl.sessions.state("S101") == SessionPool.WARM
+        await wl.close()
+        assert wl._refresh_task is None
+
+    asyncio.run(main())
+
+
+def test_async_wl_builds_no_sync_clients(monkeypatch):
+    import wl.wl
+
+    def fail(settings):
+        raise AssertionError("Sync client created")
+
+    monkeypatch.setattr(wl.wl, "WLRealtime", fail)
+    monkeypatch.setattr(wl.wl, "WLRouting", fail)
+    client = aio.AsyncWL({'realtime': {'api_key': "test"}})
+    assert isinstance(client.realtime, aio.AsyncWLRealtime)
+    assert isinstance(client.routing, aio.AsyncWLRouting)
+
+
+def test_async_clients_build_no_sync_transport(monkeypatch):
+    import wl.realtime
+    import wl.routing
+
+    def fail(settings):
+        raise AssertionError("Sync transport created")
+
+    monkeypatch.setattr(wl.realtime, "transport_from_settings", fail)
+    monkeypatch.setattr(wl.routing, "transport_from_settings", fail)
+    client = aio.AsyncWL({'realtime': {'api_key': "test"}})
+    assert client.realtime.session is None
+    assert client.routing.session is None
@@ -0,0 +1,143 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 10:00
+
+import io
+import os
+
+from wl.db import WLDatabase
+
+
+def test_snapshot_disabled_by_default(data_dir):
+    db = WLDatabase({'path_data': data_dir})
+    db.csv_load()
+    assert db.path_snapshot is None
+    assert sorted(os.listdir(data_dir)) == sorted(
+        name for name in os.listdir(data_dir) if name.endswith(".csv")
+    )
+
+
+def test_snapshot_roundtrip(data_dir):
+    settings = {'path_data': data_dir, 'path_snapshot': "db.snapshot"}
+    db = WLDatabase(settings)
+    db.csv_load()
+    assert os.path.exists(os.path.join(data_dir, "db.snapshot"))
+
+    loaded = WLDatabase(settings)
+    assert loaded.snapshot_load()
+    assert len(loaded.stops) == len(db.stops)
+    assert loaded.find_stop(60200001).to_dict() == \
+        db.find_stop(60200001).to_dict()
+
+
+def test_snapshot_outdated(data_dir):
+    settings = {'path_data': data_dir, 'path_snapshot': "db.snapshot"}
+    WLDatabase(settings).csv_load()
+    with open(os.path.join(data_dir, "wienerlinien-ogd-linien.csv"), "a") as f:
+        f.write("\n")
+    assert not WLDatabase(settings).snapshot_load()
+
+
+def _edit_csv(data_dir, name, edit):
+    """ Rewrite csv lines (header excluded) with edit(lines) """
+    path = os.path.join(data_dir, name)
+    with io.open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    lines[1:] = edit(lines[1:])
+    with io.open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _dump(db):
+    """ Everything a reader can see """
+    rbls = sorted(set(
+        p.rbl for p in db.platforms.values() if p.rbl is not None
+    ))
+    return {
+        'stops': {
+            key: (
+                stop.to_dict(),
+                [p.id for p in stop.platforms or ()]
+            )
+            for key, stop in db.stops.items()
+        },
+        'lines': {key: line.to_dict() for key, line in db.lines.items()},
+        'platforms': {
+            key: (p.to_dict(), p.stop.id, p.line.id)
+            for key, p in db.platforms.items()
+        },
+        'by_rbl': {
+            rbl: [p.id for p in db.find_platforms_by_rbl(rbl)]
+            for rbl in rbls
+        },
+        'search': [
+            (stop.id, score)
+            for stop, score in db.search_stops("Renamed Absberggasse")
+        ],
+        'nearest': [
+            stop.id for stop, _ in db.nearest_stops(48.2, 16.37, k=10)
+        ],
+        'join': {
+            key: (join.location, sorted(join.rbls), sorted(join.lines))
+            for key, join in db.join_stops([60200001, 60201509]).items()
+        },
+    }
+
+
+def test_reload_equals_fresh_load(data_dir):
+    db = WLDatabase({'path_data': data_dir})
+    db.csv_load()
+    before = _dump(db)
+
+    def edit_stops(lines):
+        # Rename and move a stop, drop another one, add a new one
+        lines[0] = lines[0].replace(
+            '"Absberggasse";"Wien";90001;48.1738010728644',
+            '"Renamed Absberggasse";"Wien";90001;48.2'
+        ).replace(';""', ';"2026-10-19"')
+        del lines[1]
+        lines.append(
+            '999999999;"stop";69999999;"Neue Haltestelle";"Wien";90001;'
+            '48.21;16.38;"2026-10-19"'
+        )
+        return lines
+
+    def edit_platforms(lines):
+        # Drop platforms of the removed stop, add one at the new stop
+        lines = [line for line in lines if ";214460107;" not in line]
+        lines.append(
+            '999999999;214433717;999999999;"H";99;"99999";"";"";'
+            '48.21;16.38;"2026-10-19"'
+        )
+        return lines
+
+    _edit_csv(data_dir, "wienerlinien-ogd-haltestellen.csv", edit_stops)
+    _edit_csv(data_dir, "wienerlinien-ogd-steige.csv", edit_platforms)
+    assert db.csv_reload()
+    reloaded = _dump(db)
+    fresh = WLDatabase({'path_data': data_dir})
+    fresh.csv_load()
+    assert reloaded == _dump(fresh)
+    assert reloaded != before
+    assert db.find_stop(69999999).name == "Neue Haltestelle"
+    assert [p.id for p in db.find_platforms_by_rbl(99999)] == [999999999]
+    assert db.search_stops("Renamed Absberggasse", 1)[0][0].stop_id == \
+        60200001
+
+
+def test_reload_unchanged(data_dir):
+    db = WLDatabase({'path_data': data_dir})
+    db.csv_load()
+    before = _dump(db)
+    assert not db.csv_reload()
+    assert _dump(db) == before
@@ -0,0 +1,79 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 11:00
+
+import copy
+
+from wl.realtime import WLRealtime
+from wl.diff import MonitorDiff
+from wl.models.realtime import RTChange
+
+
+def _monitor(transport, rbls):
+    return WLRealtime({'api_key': "test", 'transport': transport}).monitor(
+        list(rbls)
+    )
+
+
+def _kinds(changes):
+    return set((c.change, "{}".format(c.rbl)) for c in changes)
+
+
+def test_first_update_adds_everything(transport, monitors):
+    rbls = sorted(monitors)[:2]
+    changes = MonitorDiff().update(_monitor(transport, rbls))
+    assert _kinds(changes) == set((RTChange.ADDED, rbl) for rbl in rbls)
+    assert len(changes) == 6
+
+
+def test_unchanged_response_has_no_changes(transport, monitors):
+    rbls = sorted(monitors)[:2]
+    diff = MonitorDiff()
+    diff.update(_monitor(transport, rbls))
+    assert diff.update(_monitor(transport, rbls)) == []
+
+
+def test_countdown_change(transport, monitors):
+    rbl = sorted(monitors)[0]
+    diff = MonitorDiff()
+    diff.update(_monitor(transport, [rbl]))
+    monitor = copy.deepcopy(monitors[rbl])
+    dep = monitor['lines'][0]['departures']['departure'][0]
+    dep['departureTime']['countdown'] += 1
+    transport.monitors = dict(monitors, **{rbl: monitor})
+    changes = diff.update(_monitor(transport, [rbl]))
+    assert [c.change for c in changes] == [RTChange.COUNTDOWN]
+    assert changes[0].new == changes[0].old + 1
+
+
+def test_partial_keeps_other_rbls(transport, monitors):
+    a, b = sorted(monitors)[:2]
+    diff = MonitorDiff()
+    diff.update(_monitor(transport, [a, b]))
+    assert diff.update(_monitor(transport, [a]), partial=True) == []
+    assert diff.update(_monitor(transport, [a, b])) == []
+
+
+def test_requested_rbl_without_lines_is_removed(transport, monitors):
+    a, b = sorted(monitors)[:2]
+    diff = MonitorDiff()
+    diff.update(_monitor(transport, [a, b]))
+    transport.monitors = {a: monitors[a]}
+    # b was polled but returned nothing
+    changes = diff.update(_monitor(transport, [b]), rbls=[b])
+    assert _kinds(changes) == set([(RTChange.REMOVED, b)])
+    assert len(changes) == 3
+    # a was not polled - kept
+    transport.monitors = monitors
+    changes = diff.update(_monitor(transport, [a, b]))
+    assert _kinds(changes) == set([(RTChange.ADDED, b)])
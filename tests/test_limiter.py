@@ -0,0 +1,141 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 12:00
+
+import time
+import threading
+
+import pytest
+
+from wl.errors import RateLimitException
+from wl.limiter import RateLimiter, priority, current_priority, \
+    PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+
+def _empty(rate=10.0, **kwargs):
+    """ Limiter without tokens left """
+    limiter = RateLimiter(rate=rate, burst=1, **kwargs)
+    assert limiter.try_acquire() == (None, 0.0)
+    return limiter
+
+
+def test_burst_granted_at_once():
+    limiter = RateLimiter(rate=1.0, burst=3)
+    for _ in range(3):
+        assert limiter.acquire() == 0.0
+    waiter, wait = limiter.try_acquire()
+    assert waiter is not None
+    assert 0.0 < wait <= 1.0
+    limiter.cancel(waiter)
+
+
+def test_priority_served_first():
+    limiter = _empty(rate=0.001)
+    background, _ = limiter.try_acquire(PRIORITY_BACKGROUND)
+    interactive, _ = limiter.try_acquire(PRIORITY_INTERACTIVE, 10000.0)
+    limiter._tokens = 1.0
+    assert limiter.try_acquire(waiter=background)[0] is background
+    assert limiter.try_acquire(waiter=interactive)[0] is None
+    limiter.cancel(background)
+
+
+def test_threads_served_by_priority():
+    limiter = _empty(rate=20.0)
+    order = []
+
+    def run(prio):
+        limiter.acquire(prio)
+        order.append(prio)
+
+    background = threading.Thread(target=run, args=(PRIORITY_BACKGROUND,))
+    background.start()
+    time.sleep(0.01)
+    interactive = threading.Thread(target=run, args=(PRIORITY_INTERACTIVE,))
+    interactive.start()
+    background.join()
+    interactive.join()
+    assert order == [PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND]
+
+
+def test_deadline_passed():
+    limiter = _empty(rate=1.0)
+    with pytest.raises(RateLimitException):
+        limiter.acquire(timeout=0.05)
+    assert limiter.stats()['rejected'] == {'interactive': 1}
+    assert limiter.stats()['waiting'] == 0
+
+
+def test_rejected_when_queue_ahead_exceeds_deadline():
+    limiter = _empty(rate=1.0)
+    waiters = [
+        limiter.try_acquire(PRIORITY_BACKGROUND)[0] for _ in range(3)
+    ]
+    start = time.time()
+    with pytest.raises(RateLimitException):
+        limiter.acquire(PRIORITY_BACKGROUND, timeout=2.0)
+    assert time.time() - start < 0.5
+    # Only the queue of the same or higher priorities counts
+    waiter, _ = limiter.try_acquire(PRIORITY_INTERACTIVE, 2.0)
+    assert waiter is not None
+    for waiter in waiters + [waiter]:
+        limiter.cancel(waiter)
+
+
+def test_queue_counts_live_waiters_only():
+    limiter = _empty(rate=0.001, max_queue=2)
+    for _ in range(100):
+        waiter, _ = limiter.try_acquire(PRIORITY_BACKGROUND)
+        limiter.cancel(waiter)
+    first, _ = limiter.try_acquire(PRIORITY_BACKGROUND)
+    second, _ = limiter.try_acquire(PRIORITY_BACKGROUND)
+    with pytest.raises(RateLimitException):
+        limiter.try_acquire(PRIORITY_BACKGROUND)
+    assert limiter.stats()['waiting'] == 2
+    # Given up waiters do not pile up in the heap
+    assert len(limiter._waiters) <= 2 * 2 + 16
+    limiter.cancel(first)
+    third, _ = limiter.try_acquire(PRIORITY_BACKGROUND)
+    assert third is not None
+    limiter.cancel(second)
+    limiter.cancel(third)
+
+
+def test_spare_takes_no_token():
+    limiter = RateLimiter(rate=0.1, burst=2)
+    assert limiter.spare(2)
+    assert limiter.spare(2)
+    assert not limiter.spare(3)
+    limiter.acquire()
+    assert limiter.spare()
+    assert not limiter.spare(2)
+    limiter.acquire()
+    waiter, _ = limiter.try_acquire(prio=PRIORITY_BACKGROUND)
+    assert not limiter.spare()
+    limiter.cancel(waiter)
+
+
+def test_cancel_takes_no_token():
+    limiter = _empty(rate=20.0)
+    waiter, wait = limiter.try_acquire()
+    limiter.cancel(waiter)
+    time.sleep(wait + 0.01)
+    assert limiter.try_acquire() == (None, 0.0)
+    with pytest.raises(RateLimitException):
+        limiter.try_acquire(waiter=waiter)
+
+
+def test_priority_context():
+    assert current_priority() == PRIORITY_INTERACTIVE
+    with priority(PRIORITY_BACKGROUND):
+        assert current_priority() == PRIORITY_BACKGROUND
+    assert current_priority() == PRIORITY_INTERACTIVE
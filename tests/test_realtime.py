@@ -0,0 +1,93 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 10:30
+
+import time
+import threading
+
+from wl.realtime import WLRealtime
+
+
+def _client(transport, **settings):
+    settings.update({'api_key': "test", 'transport': transport})
+    return WLRealtime(settings)
+
+
+def test_cache_disabled_by_default(transport, monitors):
+    rt = _client(transport)
+    rbl = sorted(monitors)[0]
+    assert rt.cache is None
+    assert rt.cache_stats() == {'coalesced': 0}
+    rt.monitor([rbl])
+    rt.monitor([rbl])
+    assert len(transport.requests) == 2
+
+
+def test_coalescing_stats_without_cache(transport, monitors):
+    rt = _client(transport)
+    rbl = sorted(monitors)[0]
+    release = threading.Event()
+    get = transport.get
+
+    def slow_get(url, params=None):
+        release.wait(2.0)
+        return get(url, params)
+
+    transport.get = slow_get
+    threads = [
+        threading.Thread(target=rt.monitor, args=([rbl],))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + 2.0
+    while rt.cache_stats()['coalesced'] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert rt.cache_stats() == {'coalesced': 2}
+    assert len(transport.requests) == 1
+
+
+def test_cache_opt_in(transport, monitors):
+    rt = _client(transport, cache=True)
+    rbl = sorted(monitors)[0]
+    first = rt.monitor([rbl])
+    assert rt.monitor([rbl]) is first
+    assert len(transport.requests) == 1
+    assert rt.cache_stats()['hits'] == 1
+    assert rt.cache_stats()['coalesced'] == 0
+
+
+def test_batch_stale_if_any_chunk_stale(transport, monitors):
+    rt = _client(transport, resilience={'stale_timeout': 0.0})
+    rbls = sorted(monitors)[:4]
+    res = rt.monitor_batch(rbls, chunk_size=2)
+    assert not res.stale
+    assert len(res.monitors) == 4
+    transport.fail.add(rbls[0])
+    res = rt.monitor_batch(rbls, chunk_size=2)
+    assert res.stale
+    assert not res.failures
+    assert len(res.monitors) == 4
+
+
+def test_batch_reports_failed_chunks(transport, monitors):
+    rt = _client(transport)
+    rbls = sorted(monitors)[:4]
+    transport.fail.add(rbls[0])
+    res = rt.monitor_batch(rbls, chunk_size=2)
+    assert not res.stale
+    assert [f.rbls for f in res.failures] == [rbls[:2]]
+    assert len(res.monitors) == 2
@@ -0,0 +1,178 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 15:00
+
+import time
+import threading
+
+import pytest
+
+from wl.errors import RequestException, RateLimitException, \
+    CircuitOpenException
+from wl.models.realtime import RTResponse
+from wl.resilience import CircuitBreaker, Resilience
+
+
+def _fail():
+    raise RequestException("Failed")
+
+
+def _response(value):
+    res = RTResponse()
+    res.message_value = value
+    return res
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.opened == 1
+    assert breaker.rejected == 1
+
+
+def test_breaker_success_resets_failures():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.allow()
+    breaker.failure()
+    breaker.allow()
+    breaker.success()
+    breaker.allow()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_probes():
+    breaker = CircuitBreaker(
+        failure_threshold=1, reset_timeout=0.05, success_threshold=2
+    )
+    breaker.allow()
+    breaker.failure()
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.allow()
+    breaker.failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened == 2
+
+
+def test_breaker_release_frees_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.allow()
+    breaker.failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_open_circuit_without_stale_response():
+    resilience = Resilience({'failure_threshold': 1, 'reset_timeout': 60})
+    with pytest.raises(RequestException):
+        resilience.call("monitor", "a", _fail)
+    with pytest.raises(CircuitOpenException):
+        resilience.call("monitor", "a", _fail)
+    assert resilience.stats()['endpoints']['monitor']['state'] == \
+        CircuitBreaker.OPEN
+
+
+def test_open_circuit_serves_stale():
+    resilience = Resilience({'failure_threshold': 1, 'reset_timeout': 60})
+    good = _response("good")
+    assert resilience.call("monitor", "a", lambda: good) is good
+    with pytest.raises(RequestException):
+        resilience.call("monitor", "b", _fail)
+    res = resilience.call("monitor", "a", _fail)
+    assert res.stale
+    assert res.message_value == "good"
+    # Stored response is not changed
+    assert not good.stale
+    assert resilience.served_stale == 1
+
+
+def test_healthy_calls_inline():
+    resilience = Resilience({'stale_timeout': 0.02})
+    resilience.call("monitor", "a", lambda: _response("old"))
+    before = threading.active_count()
+    for i in range(50):
+        res = resilience.call("monitor", "a", lambda: _response(i))
+        assert not res.stale
+        assert res.message_value == i
+    assert threading.active_count() == before
+    assert resilience._pool._threads == 0
+    # Failure served stale, then revalidated in the background
+    res = resilience.call("monitor", "a", _fail)
+    assert res.stale
+    assert resilience.degraded("monitor")
+
+
+def test_slow_refresh_serves_stale():
+    resilience = Resilience({'stale_timeout': 0.02, 'slow_window': 60.0})
+
+    def old():
+        time.sleep(0.05)
+        return _response("old")
+
+    # Slow, but inline while healthy
+    assert not resilience.call("monitor", "a", old).stale
+    assert resilience.degraded("monitor")
+    release = threading.Event()
+
+    def slow():
+        release.wait()
+        return _response("new")
+
+    res = resilience.call("monitor", "a", slow)
+    assert res.stale
+    assert res.message_value == "old"
+    # Refresh keeps running - joined instead of started again
+    res = resilience.call("monitor", "a", _fail)
+    assert res.stale
+    release.set()
+    deadline = time.time() + 2.0
+    while resilience._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+    res = resilience.call("monitor", "a", lambda: _response("newer"))
+    assert not res.stale
+    assert res.message_value == "newer"
+    assert resilience._pool._threads == 1
+
+
+def test_rate_limit_does_not_open_circuit():
+    resilience = Resilience({'failure_threshold': 1})
+
+    def limited():
+        raise RateLimitException("Limited")
+
+    for _ in range(3):
+        with pytest.raises(RateLimitException):
+            resilience.call("monitor", "a", limited)
+    assert resilience.breaker("monitor").state == CircuitBreaker.CLOSED
@@ -0,0 +1,73 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 16:00
+
+import io
+
+import pytest
+
+from wl.routing import WLRouting
+from wl.errors import RequestException
+from benchmarks.fixtures import routing_departure_monitor
+
+
+NOT_DM = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<itdRequest version="10.2.10.139" language="de" sessionID="WL_1" '
+    b'serverID="EFA10_01"><itdStopFinderRequest requestID="1"/>'
+    b'</itdRequest>'
+)
+
+
+class _Page(object):
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.html = raw.decode("utf-8")
+
+
+class FakeRoutingTransport(object):
+
+    def __init__(self, body):
+        super(FakeRoutingTransport, self).__init__()
+        self.body = body
+
+    def get(self, url, params=None):
+        return _Page(self.body)
+
+
+def _parse(routing, body):
+    return routing._collect_dm(routing._iter_dm(io.BytesIO(body)))
+
+
+def test_parse_departure_monitor(database):
+    routing = WLRouting({})
+    res = _parse(routing, routing_departure_monitor(database, 10))
+    assert res.session_id == "WL_BENCH"
+    assert res.request_id == "1"
+    assert len(res.departures) == 10
+    assert res.stops
+
+
+def test_parse_not_departure_monitor():
+    routing = WLRouting({})
+    with pytest.raises(ValueError):
+        _parse(routing, NOT_DM)
+    with pytest.raises(ValueError):
+        routing._collect_dm(iter(()))
+
+
+def test_dm_search_not_departure_monitor():
+    routing = WLRouting({'transport': FakeRoutingTransport(NOT_DM)})
+    with pytest.raises(RequestException):
+        routing.dm_search("Schottentor")
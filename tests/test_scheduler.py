@@ -0,0 +1,100 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 11:30
+
+from wl.realtime import WLRealtime
+from wl.scheduler import Scheduler
+
+
+def _scheduler(transport, realtime=None, **settings):
+    realtime_settings = {'api_key': "test", 'transport': transport}
+    realtime_settings.update(realtime or {})
+    settings.setdefault('max_rps', 0)
+    return Scheduler(WLRealtime(realtime_settings), settings)
+
+
+def _subscribe(sched, rbls):
+    calls = []
+    errors = []
+    sched.subscribe(
+        rbls, lambda sub, res: calls.append(res),
+        error_callback=lambda sub, e: errors.append(e)
+    )
+    return calls, errors
+
+
+def test_interval_follows_countdown(transport):
+    sched = _scheduler(transport)
+    assert sched._interval(None) == sched.max_interval
+    assert sched._interval(None, night=True) == sched.night_interval
+    assert sched._interval(0) == sched.min_interval
+    assert sched._interval(2) == 60.0
+    assert sched._interval(60) == sched.max_interval
+
+
+def test_polls_bypass_cache(transport, monitors):
+    sched = _scheduler(transport, {'cache': True})
+    rbls = sorted(monitors)[:2]
+    calls, _ = _subscribe(sched, rbls)
+    sched.poll_due()
+    sched._subscriptions[1].next_due = 0.0
+    sched.poll_due()
+    assert len(transport.requests) == 2
+    assert len(calls) == 2
+    assert len(calls[1].monitors) == 2
+    assert not calls[1].stale
+
+
+def test_stale_response_not_passed_on(transport, monitors):
+    sched = _scheduler(
+        transport, {'resilience': {'stale_timeout': 0.0}}, retry_interval=7.0
+    )
+    rbls = sorted(monitors)[:2]
+    calls, errors = _subscribe(sched, rbls)
+    sched.poll_due()
+    assert len(calls) == 1
+    transport.fail.update(rbls)
+    sub = sched._subscriptions[1]
+    sub.next_due = 0.0
+    sched.poll_due(now=100.0)
+    assert len(calls) == 1
+    assert not errors
+    assert sub.failures == 0
+    assert sub.next_due - sub.updated <= 7.0 + 1.0
+
+
+def test_partially_stale_response_flagged(transport, monitors):
+    sched = _scheduler(
+        transport, {'resilience': {'stale_timeout': 1.0}, 'batch_size': 1}
+    )
+    rbls = sorted(monitors)[:2]
+    calls, _ = _subscribe(sched, rbls)
+    sched.poll_due()
+    transport.fail.add(rbls[0])
+    sched._subscriptions[1].next_due = 0.0
+    sched.poll_due()
+    assert len(calls) == 2
+    assert calls[1].stale
+    assert len(calls[1].monitors) == 2
+
+
+def test_counters_of_parallel_requests(transport, monitors):
+    sched = _scheduler(transport, {'batch_size': 1, 'batch_workers': 8})
+    rbls = sorted(monitors)[:16]
+    for rbl in rbls:
+        _subscribe(sched, [rbl])
+    _subscribe(sched, rbls[:4])
+    sched.poll_due()
+    assert sched.requests == 16
+    assert sched.polls == 17
+    assert len(transport.requests) == 16
@@ -0,0 +1,86 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 14:00
+
+import unicodedata
+
+import pytest
+
+from wl.search import fold, TrigramIndex
+
+
+@pytest.mark.parametrize("text, folded", [
+    ("Währinger Straße", "wahringer strasse"),
+    ("Steuer", "steuer"),
+    ("Poetzleinsdorf", "poetzleinsdorf"),
+    ("Aeropark", "aeropark"),
+    ("Quellenstraße", "quellenstrasse"),
+    ("Karl-Lothringer-Straße", "karl lothringer strasse"),
+])
+def test_fold(text, folded):
+    assert fold(text) == folded
+
+
+def test_fold_digraphs():
+    assert fold("Pötzleinsdorf", digraphs=True) == "poetzleinsdorf"
+    assert fold("Währinger", digraphs=True) == "waehringer"
+    decomposed = unicodedata.normalize("NFD", "Währinger")
+    assert fold(decomposed, digraphs=True) == "waehringer"
+
+
+def test_index_both_spellings():
+    index = TrigramIndex()
+    index.add(1, "Währinger Park")
+    index.add(2, "Steuer")
+    index.add(3, "Stur")
+    assert len(index) == 3
+    for query in ("Währinger Park", "Wahringer Park", "Waehringer Park"):
+        assert index.search(query)[0] == (1, 2.0)
+    # Same key only once
+    assert [key for key, _ in index.search("Waehringer")] == [1]
+    # 'ue' is not folded - 'Steuer' is no exact match for 'Stur'
+    assert index.search("Steuer")[0] == (2, 2.0)
+    assert index.search("Stur")[0] == (3, 2.0)
+    assert dict(index.search("Stur")).get(2, 0.0) < 1.0
+
+
+def test_index_freeze():
+    index = TrigramIndex()
+    index.add(1, "Westbahnhof")
+    index.add(2, "Wallensteinplatz")
+    index.add(3, "Westbahnstraße")
+    # Unfrozen prefix lookups scan without touching the order
+    before = list(index._sorted)
+    assert {key for key, _ in index.search("Westbahn")} == {1, 3}
+    assert index._sorted == before
+    index.freeze()
+    assert index.frozen
+    assert index._sorted == sorted(before)
+    assert {key for key, _ in index.search("Westbahn")} == {1, 3}
+    with pytest.raises(ValueError):
+        index.add(4, "Wien Mitte")
+
+
+def test_database_index_frozen(database):
+    assert database._state.stops_search.frozen
+
+
+def test_database_spellings(database):
+    for query in ("Waehringer", "Währinger", "Wahringer"):
+        names = [stop.name for stop, _ in database.search_stops(query, 3)]
+        assert names[:2] == ["Währinger Park", "Währinger Straße-Volksoper"]
+    stop, score = database.search_stops("Poetzleinsdorf", 1)[0]
+    assert stop.name == "Pötzleinsdorf"
+    assert score == 2.0
+    stop, _ = database.search_stops("Quellenstrasse", 1)[0]
+    assert stop.name == "Quellenstraße/Favoritenstraße"
@@ -0,0 +1,221 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 13:00
+
+import time
+import threading
+
+import pytest
+
+from wl import WL
+from wl.errors import RequestException
+from wl.limiter import RateLimiter
+from wl.models.routing import ItdDMResponse, ItdRequest
+from wl.routing import WLRouting
+from wl.sessions import SessionPool
+
+
+class FakeRouting(object):
+    """ Routing api answering from a counter of sessions """
+
+    def __init__(self, delay=None):
+        super(FakeRouting, self).__init__()
+        self.delay = delay or {}
+        """ Seconds to answer by session id (None -> fresh) """
+        self.dead = set()
+        """ Session ids that fail """
+        self.rate_limit = None
+        self.calls = []
+        self._next = 100
+        self._lock = threading.Lock()
+
+    def _answer(self, session_id, request_id=None):
+        with self._lock:
+            self.calls.append(session_id)
+            if not session_id:
+                self._next += 1
+                session_id = "S{}".format(self._next)
+        time.sleep(self.delay.get(session_id if session_id else None, 0.0))
+        if session_id in self.dead:
+            raise RequestException("Session gone")
+        res = ItdDMResponse()
+        res.session_id = session_id
+        res.request_id = "{}".format(int(request_id or 0) + 1)
+        return res
+
+    def dm_search(self, location, dt=None, limit=40):
+        return self._answer(None)
+
+    def dm_select(self, resp, lines=None, dt=None, stops=None, limit=40):
+        return self._answer(resp.session_id, resp.request_id)
+
+    def dm_read(self, resp):
+        return self._answer(resp.session_id, resp.request_id)
+
+
+def _wl(routing=None, **sessions):
+    sessions.setdefault('refresh', False)
+    wl = WL({'realtime': {'api_key': "test"}, 'sessions': sessions})
+    wl.routing = routing or FakeRouting()
+    return wl
+
+
+def test_pool_states():
+    pool = SessionPool(ttl=0.3, refresh_margin=0.2)
+    assert pool.state("A") == SessionPool.UNKNOWN
+    pool.touch("A", "1")
+    assert pool.state("A") == SessionPool.WARM
+    time.sleep(0.15)
+    assert pool.state("A") == SessionPool.STALE
+    time.sleep(0.2)
+    assert pool.state("A") == SessionPool.EXPIRED
+    pool.touch("B")
+    pool.fail("B")
+    assert pool.state("B") == SessionPool.EXPIRED
+
+
+def test_pool_refresh_once_per_use():
+    pool = SessionPool(ttl=0.3, refresh_margin=0.2)
+    assert pool.next_refresh() is None
+    pool.touch("A", "1")
+    assert 0.0 < pool.next_refresh() <= 0.1
+    assert pool.due_refresh() == []
+    time.sleep(0.12)
+    assert pool.next_refresh() == 0.0
+    due = pool.due_refresh()
+    assert [s.session_id for s in due] == ["A"]
+    assert pool.due_refresh() == []
+    pool.refreshed("A", "2")
+    assert pool.state("A") == SessionPool.WARM
+    assert pool.next_refresh() is None
+    pool.touch("A", "3")
+    assert pool.next_refresh() > 0.0
+    assert pool.stats()['refreshes'] == 1
+
+
+def test_find_by_tracks_session():
+    wl = _wl()
+    res = wl.find_by("Schottentor")
+    session_id = res.id.split(":")[0]
+    assert wl.sessions.state(session_id) == SessionPool.WARM
+
+
+def test_plan_races_only_equivalent_requests():
+    wl = _wl()
+    reqs, retry = wl._select_plan("S1:1", stops=[60200001])
+    assert [r.session_id for r in reqs] == ["S1", None]
+    assert not retry
+    # Line indexes only resolve in their session - never retried fresh
+    reqs, retry = wl._select_plan("S1:1", stops=[60200001], lines=[0])
+    assert [r.session_id for r in reqs] == ["S1"]
+    assert not retry
+    reqs, retry = wl._select_plan("S1:1")
+    assert [r.session_id for r in reqs] == ["S1"]
+    assert not retry
+    wl.sessions.fail("S1")
+    reqs, _ = wl._select_plan("S1:1", stops=[60200001])
+    assert [r.session_id for r in reqs] == [None]
+
+
+def test_plan_races_only_with_spare_tokens():
+    routing = FakeRouting()
+    routing.rate_limit = RateLimiter(rate=0.1, burst=2)
+    wl = _wl(routing)
+    reqs, retry = wl._select_plan("S1:1", stops=[60200001])
+    assert [r.session_id for r in reqs] == ["S1", None]
+    routing.rate_limit.acquire()
+    reqs, retry = wl._select_plan("S1:1", stops=[60200001])
+    assert [r.session_id for r in reqs] == ["S1"]
+    assert retry
+
+
+def test_plan_reuses_stale_sessions():
+    wl = _wl(ttl=0.3, refresh_margin=0.2)
+    wl.sessions.touch("S1", "1")
+    time.sleep(0.15)
+    assert wl.sessions.state("S1") == SessionPool.STALE
+    reqs, retry = wl._select_plan("S1:1", stops=[60200001])
+    assert [r.session_id for r in reqs] == ["S1"]
+    assert retry
+
+
+def test_select_lines_not_beaten_by_fresh_session():
+    routing = FakeRouting(delay={"S1": 0.05})
+    wl = _wl(routing)
+    res = wl.select("S1:1", lines=[0])
+    assert res.id == "S1:2"
+    assert routing.calls == ["S1"]
+    assert wl.sessions.state("S1") == SessionPool.WARM
+
+
+def test_select_falls_back_to_fresh_session():
+    routing = FakeRouting()
+    routing.dead.add("S1")
+    wl = _wl(routing)
+    wl.sessions.touch("S1", "1")
+    res = wl.select("S1:1", stops=[60200001])
+    assert res.id == "S101:1"
+    # No departures - still no follow-up selection
+    assert routing.calls == ["S1", None]
+    assert wl.sessions.state("S1") == SessionPool.EXPIRED
+    assert wl.sessions.state("S101") == SessionPool.WARM
+
+
+def test_select_lines_not_retried_fresh():
+    routing = FakeRouting()
+    routing.dead.add("S1")
+    wl = _wl(routing)
+    wl.sessions.touch("S1", "1")
+    with pytest.raises(RequestException):
+        wl.select("S1:1", lines=[0])
+    assert routing.calls == ["S1"]
+    assert wl.sessions.state("S1") == SessionPool.EXPIRED
+
+
+def test_select_stops_direct():
+    req = WLRouting({})._dm_select_request(
+        ItdRequest(), stops=[60200001], limit=10
+    )
+    assert ("name_dm", 60200001) in req.params
+    assert ("mode", "direct") in req.params
+    assert ("dmLineSelectionAll", 1) in req.params
+
+
+def test_refresh_sessions():
+    routing = FakeRouting()
+    wl = _wl(routing, ttl=0.3, refresh_margin=0.2)
+    wl.select("S1:1", lines=[0])
+    wl.select("S2:1", lines=[0])
+    routing.dead.add("S2")
+    assert wl.refresh_sessions() == 0
+    time.sleep(0.12)
+    assert wl.refresh_sessions() == 2
+    assert wl.sessions.state("S1") == SessionPool.WARM
+    assert wl.sessions.state("S2") == SessionPool.EXPIRED
+    assert wl.refresh_sessions() == 0
+
+
+def test_background_refresh():
+    routing = FakeRouting()
+    wl = _wl(routing, refresh=True, ttl=0.3, refresh_margin=0.2)
+    wl.select("S1:1", lines=[0])
+    deadline = time.time() + 2.0
+    while wl.sessions.stats()['refreshes'] < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert wl.sessions.stats()['refreshes'] == 1
+    assert routing.calls == ["S1", "S1"]
+    deadline = time.time() + 2.0
+    while wl._refresh_thread is not None and time.time() < deadline:
+        time.sleep(0.01)
+    # Not used again - left to expire
+    assert wl._refresh_thread is None
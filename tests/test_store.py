@@ -0,0 +1,35 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-20"
+# Created: 2026-10-20 09:00
+
+from wl.store import Store, PlatformView
+
+
+def test_platform_missing_ints_are_none():
+    store = Store()
+    row = store.platforms.append(
+        "1", "", "", "H", "", "", "", "", "", "", ""
+    )
+    platform = PlatformView(store, row)
+    assert platform.id == 1
+    assert platform.line_id is None
+    assert platform.stop_id is None
+    assert platform.rbl is None
+    assert platform.lat is None
+    assert platform.to_dict()['line_id'] is None
+
+
+def test_platform_ints(database):
+    platform = next(iter(database.platforms.values()))
+    assert isinstance(platform.line_id, int)
+    assert database.stops[platform.stop_id] == platform.stop
@@ -0,0 +1,128 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-19"
+# Created: 2026-10-19 14:30
+
+import time
+import datetime
+import threading
+
+import pytest
+from dateutil.tz import tzutc
+
+from wl.utils import TZ_LOCAL, local_to_utc, utc_to_local, \
+    local_to_utc_many, utc_to_local_many, _dst_bounds, run_first, WorkerPool
+
+
+def _ref_local_to_utc(dt):
+    return dt.replace(tzinfo=TZ_LOCAL).astimezone(tzutc()).replace(
+        tzinfo=None
+    )
+
+
+def _ref_utc_to_local(dt):
+    return dt.replace(tzinfo=tzutc()).astimezone(TZ_LOCAL).replace(
+        tzinfo=None
+    )
+
+
+def _around_transitions(year):
+    """ Every 15 minutes from 4 hours before to 4 hours after both
+        transitions (local and utc wall clock alike) """
+    res = []
+    for month in (3, 10):
+        day = datetime.datetime(year, month, 31)
+        day -= datetime.timedelta(days=(day.weekday() + 1) % 7)
+        dt = day - datetime.timedelta(hours=2)
+        while dt < day + datetime.timedelta(hours=6):
+            res.append(dt)
+            dt += datetime.timedelta(minutes=15)
+    return res
+
+
+@pytest.mark.parametrize("year", [1996, 2000, 2024, 2025, 2026, 2037])
+def test_dst_bounds(year):
+    bounds = _dst_bounds(year)
+    assert bounds is not None
+    start, end = bounds
+    assert (start.month, start.hour, start.weekday()) == (3, 1, 6)
+    assert (end.month, end.hour, end.weekday()) == (10, 1, 6)
+    assert (start + datetime.timedelta(days=7)).month == 4
+    assert (end + datetime.timedelta(days=7)).month == 11
+
+
+@pytest.mark.parametrize("dt", [
+    # No daylight saving time
+    datetime.datetime(1975, 7, 1, 12, 0),
+    # Ended in september before 1996
+    datetime.datetime(1990, 10, 1, 12, 0),
+])
+def test_other_rule_falls_back(dt):
+    assert _dst_bounds(dt.year) is None
+    assert local_to_utc(dt) == _ref_local_to_utc(dt)
+    assert utc_to_local(dt) == _ref_utc_to_local(dt)
+
+
+@pytest.mark.parametrize("year", [1975, 1990, 2024, 2025, 2026, 2037])
+def test_matches_dateutil_around_transitions(year):
+    dts = _around_transitions(year)
+    for dt in dts:
+        assert local_to_utc(dt) == _ref_local_to_utc(dt), dt
+        assert utc_to_local(dt) == _ref_utc_to_local(dt), dt
+    assert local_to_utc_many(dts) == [_ref_local_to_utc(dt) for dt in dts]
+    assert utc_to_local_many(dts) == [_ref_utc_to_local(dt) for dt in dts]
+
+
+def test_ambiguous_hour_is_dst():
+    # 2026-10-25 02:30 local exists twice - taken as summer time
+    dt = datetime.datetime(2026, 10, 25, 2, 30)
+    assert local_to_utc(dt) == datetime.datetime(2026, 10, 25, 0, 30)
+    assert utc_to_local(datetime.datetime(2026, 10, 25, 0, 30)) == dt
+    assert utc_to_local(datetime.datetime(2026, 10, 25, 1, 30)) == dt
+
+
+def test_many_keeps_none_and_crosses_years():
+    dts = [
+        datetime.datetime(2025, 12, 31, 23, 30), None,
+        datetime.datetime(2026, 7, 1, 12, 0),
+    ]
+    assert local_to_utc_many(dts) == [
+        datetime.datetime(2025, 12, 31, 22, 30), None,
+        datetime.datetime(2026, 7, 1, 10, 0),
+    ]
+    assert utc_to_local_many(dts) == [
+        datetime.datetime(2026, 1, 1, 0, 30), None,
+        datetime.datetime(2026, 7, 1, 14, 0),
+    ]
+
+
+def test_run_first_on_bounded_pool():
+    pool = WorkerPool(2)
+
+    def call(item):
+        if item == "slow":
+            time.sleep(0.1)
+        elif item == "bad":
+            raise ValueError(item)
+        return item
+
+    before = threading.active_count()
+    for _ in range(5):
+        assert run_first(call, ["slow", "fast"], pool) == ("fast", "fast")
+        # Let the loser free its thread
+        time.sleep(0.15)
+    assert run_first(call, ["bad", "fast"], pool) == ("fast", "fast")
+    with pytest.raises(ValueError):
+        run_first(call, ["bad", "bad"], pool)
+    # Losers finish on the pool - no thread per call
+    assert pool._threads == 2
+    assert threading.active_count() <= before + 2
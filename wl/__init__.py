@@ -17,12 +17,21 @@ from .utils import utc_to_local, local_to_utc
 from .db import WLDatabase
 from .realtime import WLRealtime
 from .routing import WLRouting
+from .transport import Transport
+from .scheduler import Scheduler
+from .limiter import RateLimiter
 from .models import Response, Stop, Line, Location, Departure, ItdRequest
-from .errors import RequestException
+from .errors import RequestException, RateLimitException
+try:
+    from .aio import AsyncWL, AsyncWLRealtime, AsyncWLRouting
+except (ImportError, SyntaxError):
+    # Needs python 3 and aiohttp
+    AsyncWL = AsyncWLRealtime = AsyncWLRouting = None
 
 __all__ = [
     "utils", "models", "utc_to_local", "local_to_utc",
-    "WL", "WLDatabase", "WLRealtime", "WLRouting",
+    "WL", "WLDatabase", "WLRealtime", "WLRouting", "Transport", "Scheduler",
     "Response", "Stop", "Line", "Location", "Departure", "ItdRequest",
-    "RequestException"
+    "RequestException", "RateLimitException", "RateLimiter",
+    "AsyncWL", "AsyncWLRealtime", "AsyncWLRouting"
 ]
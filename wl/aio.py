@@ -0,0 +1,642 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-18 17:20
+
+# Python 3.5+ only (needs aiohttp)
+
+import io
+import asyncio
+
+import aiohttp
+from requests.compat import urljoin
+
+from .realtime import WLRealtime
+from .routing import WLRouting
+from .wl import WL
+from .models.routing import ItdRequest
+from .cache import monotonic
+from .limiter import priority, PRIORITY_BACKGROUND
+from .errors import RequestException, RateLimitException, \
+    CircuitOpenException
+
+
+def _str_params(params):
+    """
+    Parameters as list of string pairs (aiohttp only accepts strings)
+
+    :param params: Parameters
+    :type params: None | dict | list[(str | unicode, T)]
+    :return: Parameters
+    :rtype: list[(str, str)]
+    """
+    if not params:
+        return []
+    if isinstance(params, dict):
+        params = params.items()
+    return [("{}".format(key), "{}".format(value)) for key, value in params]
+
+
+async def _first_success(func, items):
+    """
+    Await func for all items at once and return the first success
+
+    Every item costs its own call (e.g. an upstream request and its
+    rate limit token) - calls still running after the first success are
+    cancelled
+
+    :param func: Coroutine function to call
+    :type func: (T) -> collections.abc.Awaitable[R]
+    :param items: Arguments
+    :type items: list[T]
+    :return: First item to succeed and its result
+    :rtype: (T, R)
+    :raises Exception: Exception of the last call, if all calls failed
+    """
+    if len(items) == 1:
+        return items[0], await func(items[0])
+    pending = {asyncio.ensure_future(func(item)): item for item in items}
+    error = None
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for fut in done:
+                item = pending.pop(fut)
+                if fut.exception() is None:
+                    return item, fut.result()
+                error = fut.exception()
+    finally:
+        for fut in pending:
+            fut.cancel()
+    raise error
+
+
+async def _acquire(limiter):
+    """
+    Wait for a request token without blocking the loop
+
+    Cancelling gives up the place in the queue without taking a token
+
+    :param limiter: Rate limiter
+    :type limiter: wl.limiter.RateLimiter
+    :return: Seconds waited
+    :rtype: float
+    :raises RateLimitException: Deadline passed or queue full
+    """
+    waiter, wait = limiter.try_acquire()
+    try:
+        while waiter is not None:
+            await asyncio.sleep(wait)
+            waiter, wait = limiter.try_acquire(waiter=waiter)
+    except BaseException:
+        if waiter is not None:
+            limiter.cancel(waiter)
+        raise
+    return wait
+
+
+async def _run_resilient(resilience, endpoint, breaker, key, func):
+    """ Await func and record outcome (breaker already allowed it) """
+    start = monotonic()
+    try:
+        res = await func()
+    except RateLimitException:
+        breaker.release()
+        raise
+    except RequestException:
+        breaker.failure()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    finally:
+        resilience._timed(endpoint, start)
+    breaker.success()
+    resilience.stale.put(key, res)
+    return res
+
+
+async def _resilient_call(resilience, endpoint, key, func):
+    """
+    Await func guarded by circuit breaker and stale-while-revalidate
+    (see wl.resilience.Resilience.call)
+
+    :param resilience: Resilience layer
+    :type resilience: wl.resilience.Resilience
+    :param endpoint: Endpoint (e.g. monitor)
+    :type endpoint: str | unicode
+    :param key: Key of request
+    :type key: T
+    :param func: Coroutine function making the request
+    :type func: () -> collections.abc.Awaitable[R]
+    :return: Fresh or stale (stale=True) response
+    :rtype: R
+    :raises RequestException: Failed without stale response
+    """
+    breaker = resilience.breaker(endpoint)
+    stale = resilience.stale.get(key)
+    fut = resilience._tasks.get(key)
+    if fut is None:
+        if not breaker.allow():
+            if stale is not None:
+                return resilience._serve_stale(stale)
+            raise CircuitOpenException("Circuit of {} open".format(endpoint))
+        if stale is None:
+            return await _run_resilient(
+                resilience, endpoint, breaker, key, func
+            )
+        if not resilience.degraded(endpoint, breaker):
+            try:
+                return await _run_resilient(
+                    resilience, endpoint, breaker, key, func
+                )
+            except RequestException:
+                return resilience._serve_stale(stale)
+        fut = asyncio.ensure_future(
+            _run_resilient(resilience, endpoint, breaker, key, func)
+        )
+        resilience._tasks[key] = fut
+
+        def done(_):
+            resilience._tasks.pop(key, None)
+            if not fut.cancelled():
+                # Retrieve - callers might all have gotten a stale response
+                fut.exception()
+
+        fut.add_done_callback(done)
+    if stale is None:
+        return await asyncio.shield(fut)
+    try:
+        return await asyncio.wait_for(
+            asyncio.shield(fut), resilience.stale_timeout
+        )
+    except (asyncio.TimeoutError, RequestException):
+        return resilience._serve_stale(stale)
+
+
+class AsyncSingleFlight(object):
+    """ Run concurrent calls with the same key only once (asyncio) """
+
+    def __init__(self):
+        super(AsyncSingleFlight, self).__init__()
+        self._calls = {}
+        """ :type : dict[T, asyncio.Future] """
+        self.coalesced = 0
+        """ Calls that waited for another call instead of running """
+
+    async def do(self, key, func):
+        """
+        Await func() - or the running call with the same key
+
+        All waiting callers get the same result (or exception).
+        Cancelling a waiting caller does not cancel the shared call
+
+        :param key: Key of call
+        :type key: T
+        :param func: Coroutine function to call
+        :type func: () -> collections.abc.Awaitable[R]
+        :return: Result of func
+        :rtype: R
+        """
+        fut = self._calls.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            return await asyncio.shield(fut)
+        fut = asyncio.ensure_future(func())
+        self._calls[key] = fut
+        fut.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(fut)
+
+
+class AsyncSessionMixin(object):
+    """ Shared aiohttp session with bounded concurrency """
+
+    def _create_transport(self, settings):
+        # Requests go through aiohttp - no sync http session
+        return None
+
+    def _init_async(self, settings):
+        web = settings.get('web', {})
+        self.max_concurrency = settings.get('max_concurrency', 100)
+        """ Maximum number of requests in flight """
+        self.timeout = web.get('timeout', settings.get('timeout', 30))
+        """ Total timeout per request in seconds """
+        self.user_agent = web.get('user_agent')
+        self._session = settings.get('session')
+        """ :type : None | aiohttp.ClientSession """
+        self._own_session = self._session is None
+        self._semaphore = None
+        """ :type : None | asyncio.Semaphore """
+
+    def _get_session(self):
+        """
+        Session for the running loop (created on first use)
+
+        :rtype: aiohttp.ClientSession
+        """
+        if self._session is None or self._session.closed:
+            headers = {}
+            if self.user_agent:
+                headers['User-Agent'] = self.user_agent
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=headers
+            )
+            self._own_session = True
+        return self._session
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _fetch(self, url, params):
+        """
+        Load url
+
+        :param url: Url to load
+        :type url: str | unicode
+        :param params: Parameters to send
+        :type params: dict | list[(str | unicode, T)]
+        :return: Decoded and undecoded body
+        :rtype: (unicode, bytes)
+        :raises RequestException: Failed to load
+        """
+        if self.rate_limit is not None:
+            await _acquire(self.rate_limit)
+        try:
+            async with self._get_semaphore():
+                async with self._get_session().get(
+                        url, params=_str_params(params)
+                ) as resp:
+                    resp.raise_for_status()
+                    raw = await resp.read()
+                    html = raw.decode(resp.charset or "utf-8", "replace")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.exception(
+                "Failed to load on {}:\n{}".format(url, params)
+            )
+            raise RequestException("Request failed")
+        return html, raw
+
+    async def close(self):
+        """
+        Close session (if created by this object)
+
+        :rtype: None
+        """
+        if self._session is not None and self._own_session:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class AsyncWLRealtime(AsyncSessionMixin, WLRealtime):
+    """ Wienerlinien realtime API on asyncio """
+
+    def __init__(self, settings=None):
+        if settings is None:
+            settings = {}
+        super(AsyncWLRealtime, self).__init__(settings)
+        self._init_async(settings)
+        self._flight_async = AsyncSingleFlight()
+        """ Coalesces identical concurrent requests on the loop """
+
+    async def _make_req(self, url_part, req, fresh=False):
+        """
+
+        :param url_part: What service of realtime api to use
+        :type url_part: str | unicode
+        :param req:
+        :type req: wl.models.Request
+        :param fresh: Do not answer from the response cache (default: False)
+        :type fresh: bool
+        :return: Parsed response
+        :rtype: wl.models.RTResponse
+        """
+        url = urljoin(self.base_url, url_part)
+        params = self._request_params(req)
+        key = self._cache_key(url_part, params)
+        if self.cache is not None and not fresh:
+            res = self.cache.get(key)
+            if res is not None:
+                return res
+
+        def load():
+            return self._flight_async.do(
+                key, lambda: self._load(url, params, key)
+            )
+
+        if self.resilience is not None:
+            return await _resilient_call(
+                self.resilience, url_part, key, load
+            )
+        return await load()
+
+    async def _load(self, url, params, key):
+        """
+        Load, parse and cache response
+
+        :param url: Url to load
+        :type url: str | unicode
+        :param params: Parameters to send
+        :type params: dict | list[(str | unicode, T)]
+        :param key: Cache key
+        :type key: tuple
+        :return: Parsed response
+        :rtype: wl.models.RTResponse
+        """
+        html, _ = await self._fetch(url, params)
+        res = self._handle_response(url, params, html)
+        self._cache_put(key, res, html)
+        return res
+
+    def cache_stats(self):
+        res = super(AsyncWLRealtime, self).cache_stats()
+        res['coalesced'] += self._flight_async.coalesced
+        return res
+
+    async def monitor(self, rbls, traffic_info=None, fresh=False):
+        """
+        Get departure monitor for stop
+
+        :param rbls: One or more rbls
+        :type rbls: str | unicode | list[str | unicode]
+        :param traffic_info: One or more of
+            'stoerunglang', 'stoerungkurz', 'aufzugsinfo'
+        :type traffic_info: str | unicode | list[str | unicode]
+        :param fresh: Do not answer from the response cache - the loaded
+            response is still cached (default: False)
+        :type fresh: bool
+        :return: Monitor information
+        :rtype: wl.models.realtime.RTResponse
+        """
+        req = self._monitor_request(rbls, traffic_info)
+        resp = await self._make_req("monitor", req, fresh)
+        return self._check_monitor_response(resp)
+
+    async def monitor_batch(self, rbls, traffic_info=None, chunk_size=None):
+        """
+        Get departure monitors for many rbls
+
+        All chunks are requested at once (bounded by max_concurrency)
+
+        :param rbls: Rbls
+        :type rbls: list[str | unicode | int]
+        :param traffic_info: One or more of
+            'stoerunglang', 'stoerungkurz', 'aufzugsinfo'
+        :type traffic_info: str | unicode | list[str | unicode]
+        :param chunk_size: Maximum rbls per request (default: None)
+            None -> self.batch_size
+        :type chunk_size: None | int
+        :return: Merged monitor information (raw is not set)
+        :rtype: wl.models.realtime.RTBatchResponse
+        :raises RequestException: All chunks failed
+        """
+        chunks = self._chunk_rbls(rbls, chunk_size)
+        responses = await asyncio.gather(
+            *[self.monitor(chunk, traffic_info) for chunk in chunks],
+            return_exceptions=True
+        )
+        results = []
+
+        for chunk, resp in zip(chunks, responses):
+            if isinstance(resp, asyncio.CancelledError):
+                raise resp
+            if isinstance(resp, Exception):
+                results.append((chunk, None, resp))
+            else:
+                results.append((chunk, resp, None))
+        return self._merge_batch(results)
+
+
+class AsyncWLRouting(AsyncSessionMixin, WLRouting):
+    """ Wienerlinien routing API on asyncio """
+
+    def __init__(self, settings=None):
+        if settings is None:
+            settings = {}
+        super(AsyncWLRouting, self).__init__(settings)
+        self._init_async(settings)
+
+    async def _make_req(self, url_part, req):
+        """
+
+        :param url_part: What service of routing api to use
+        :type url_part: str | unicode
+        :param req:
+        :type req: wl.models.routing.ItdRequest
+        :return: Response root element
+        :rtype: wl.models.routing.ItdResponse
+        """
+        url = urljoin(self.base_url, url_part)
+        params = req.to_get_params()
+        html, raw = await self._fetch(url, params)
+        return self._handle_response(url, params, html, raw)
+
+    async def _make_req_dm(self, req):
+        """
+
+        :param req:
+        :type req: wl.models.routing.ItdRequest
+        :return:
+        :rtype: wl.models.routing.ItdDMResponse
+        """
+        if self.resilience is None:
+            return await self._load_dm(req)
+        return await _resilient_call(
+            self.resilience, "XML_DM_REQUEST", self._dm_key(req),
+            lambda: self._load_dm(req)
+        )
+
+    async def _load_dm(self, req):
+        url = urljoin(self.base_url, "XML_DM_REQUEST")
+        params = req.to_get_params()
+        html, raw = await self._fetch(url, params)
+        if html.startswith("<!DOCTYPE HTML"):
+            raise RequestException("API send plain html")
+        try:
+            return self._collect_dm(self._iter_dm(io.BytesIO(raw)))
+        except Exception:
+            self.exception(
+                "Failed to parse {}:\n{}".format(url, params)
+            )
+            raise RequestException("Parse failed")
+
+    async def dm_search(self, location, dt=None, limit=40):
+        req = self._dm_search_request(location, dt, limit)
+        return await self._make_req_dm(req)
+
+    async def dm_select(self, resp, lines=None, dt=None, stops=None, limit=40):
+        req = self._dm_select_request(resp, lines, dt, stops, limit)
+        return await self._make_req_dm(req)
+
+    async def dm_search_select(self, location, dt=None, limit=40):
+        req = self._dm_search_select_request(location, dt, limit)
+        return await self._make_req_dm(req)
+
+    async def dm_read(self, resp):
+        req = self._dm_read_request(resp)
+        return await self._load_dm(req)
+
+
+class AsyncWL(WL):
+    """ Wienerlinien client on asyncio (database lookups stay synchronous) """
+
+    def __init__(self, settings=None):
+        if settings is None:
+            settings = {}
+        super(AsyncWL, self).__init__(settings)
+        self._refresh_task = None
+        """ Background session refresh
+            :type : None | asyncio.Future """
+
+    def _create_realtime(self, settings):
+        return AsyncWLRealtime(settings)
+
+    def _create_routing(self, settings):
+        return AsyncWLRouting(settings)
+
+    async def find_by(self, address, dt=None):
+        self.debug("({}, {})".format(address, dt))
+        res = await self.routing.dm_search(address, dt)
+        self._print(res)
+        if res.departures:
+            return None
+        self._track(res)
+        return self._from_itd_dm_response(res)
+
+    async def search(self, name, limit=10):
+        """
+        Find stops by name - local database first, routing api as fallback
+
+        :param name: (Partial) stop name
+        :type name: str | unicode
+        :param limit: Maximum number of local results (default: 10)
+        :type limit: int
+        :return: Found stops (id not set for local results)
+        :rtype: None | wl.models.general.Response
+        """
+        self.debug("({})".format(name))
+        res = self._search_local(name, limit)
+        if res is None:
+            return await self.find_by(name)
+        return res
+
+    def _keep_alive(self):
+        """
+        Start background refresh of sessions on the running loop
+        (if not running)
+
+        :rtype: None
+        """
+        if not self.session_refresh or self._refresh_task is not None:
+            return
+        self._refresh_task = asyncio.ensure_future(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        try:
+            while True:
+                wait = self.sessions.next_refresh()
+                if wait is None:
+                    return
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+                try:
+                    await self.refresh_sessions()
+                except Exception:
+                    self.exception("Failed to refresh sessions")
+        finally:
+            self._refresh_task = None
+
+    async def refresh_sessions(self):
+        """
+        Refresh sessions close to expiry now
+
+        Each session is refreshed at most once per use - sessions nobody
+        uses anymore still expire
+
+        :return: Number of sessions refreshed
+        :rtype: int
+        """
+        sessions = self.sessions.due_refresh()
+
+        async def refresh(session):
+            res = None
+            try:
+                with priority(PRIORITY_BACKGROUND):
+                    res = await self.routing.dm_read(session)
+            except asyncio.CancelledError:
+                self.sessions.fail(session.session_id)
+                raise
+            except Exception as e:
+                self.warning("Failed to refresh session {}: {}".format(
+                    session.session_id, e
+                ))
+            self._refreshed(session, res)
+
+        await asyncio.gather(*[refresh(session) for session in sessions])
+        return len(sessions)
+
+    async def select(self, session, stops=None, lines=None, dt=None, limit=20):
+        reqs, retry = self._select_plan(session, stops, lines)
+
+        def select_with(req):
+            return self.routing.dm_select(
+                req, stops=stops, lines=lines, dt=dt, limit=limit
+            )
+
+        try:
+            req, selected = await _first_success(select_with, reqs)
+        except RequestException:
+            if reqs[0].session_id:
+                self.sessions.fail(reqs[0].session_id)
+            if not retry:
+                raise
+            req = ItdRequest()
+            selected = await select_with(req)
+        self._selected(req, selected)
+        return self._from_itd_dm_response(selected)
+
+    async def close(self):
+        """
+        Stop session refresh and close sessions of realtime and routing
+        client
+
+        :rtype: None
+        """
+        task = self._refresh_task
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.realtime.close()
+        await self.routing.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
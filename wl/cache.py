@@ -0,0 +1,265 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-18 18:40
+
+import time
+import datetime
+import threading
+from collections import OrderedDict
+
+
+monotonic = getattr(time, "monotonic", time.time)
+""" Clock for expiry (time.time on python 2) """
+
+
+def normalize_params(params, ignore=("sender",)):
+    """
+    Hashable, order independent form of request parameters
+
+    Duplicate pairs are dropped and values compared as strings,
+    so [("rbl", 2), ("rbl", "1"), ("rbl", 1)] equals {"rbl": ["1", "2"]}
+
+    :param params: Parameters
+    :type params: None | dict | list[(str | unicode, T)]
+    :param ignore: Keys to leave out (default: ("sender",))
+    :type ignore: tuple[str | unicode]
+    :return: Normalized parameters
+    :rtype: tuple[(unicode, unicode)]
+    """
+    if not params:
+        return ()
+    if isinstance(params, dict):
+        params = params.items()
+    pairs = set()
+
+    for key, value in params:
+        if key in ignore:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            for v in value:
+                pairs.add(("{}".format(key), "{}".format(v)))
+        else:
+            pairs.add(("{}".format(key), "{}".format(value)))
+    return tuple(sorted(pairs))
+
+
+class TTLCache(object):
+    """ Thread safe LRU cache with per entry expiry """
+
+    def __init__(self, ttl=15.0, max_entries=1024, max_bytes=32 * 1024 * 1024):
+        """
+        Initialize object
+
+        :param ttl: Seconds an entry is valid (default: 15.0)
+        :type ttl: float
+        :param max_entries: Maximum number of entries (default: 1024)
+        :type max_entries: int
+        :param max_bytes: Maximum sum of entry sizes (default: 32 MiB)
+        :type max_bytes: int
+        :rtype: None
+        """
+        super(TTLCache, self).__init__()
+        self.ttl = float(ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        """ key -> (expires, size, value) - least recently used first
+            :type : OrderedDict[T, (float, int, V)] """
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        """ Misses because of an expired entry """
+        self.evictions = 0
+        """ Entries dropped to stay within bounds """
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key, default=None):
+        """
+        Get valid entry
+
+        :param key: Key to look up
+        :type key: T
+        :param default: Returned on miss (default: None)
+        :type default: None | V
+        :return: Cached value or default
+        :rtype: None | V
+        """
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] <= now:
+                self._remove(key)
+                self.expired += 1
+                self.misses += 1
+                return default
+            # Mark as most recently used
+            del self._entries[key]
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[2]
+
+    def ttl_for(self, server_time=None, now=None):
+        """
+        Remaining lifetime of data created at server_time
+
+        The age of the data is subtracted from ttl. An age outside of
+        [0, ttl) is treated as clock skew and ignored
+
+        :param server_time: Creation time in utc (default: None)
+        :type server_time: None | datetime.datetime
+        :param now: Current utc time (default: None)
+            None -> datetime.datetime.utcnow()
+        :type now: None | datetime.datetime
+        :return: Seconds to keep the entry
+        :rtype: float
+        """
+        if server_time is None:
+            return self.ttl
+        if now is None:
+            now = datetime.datetime.utcnow()
+        if server_time.tzinfo is not None:
+            server_time = server_time.replace(tzinfo=None)
+        age = (now - server_time).total_seconds()
+        if 0 <= age < self.ttl:
+            return self.ttl - age
+        return self.ttl
+
+    def put(self, key, value, size=0, ttl=None):
+        """
+        Add or replace entry
+
+        :param key: Key to store under
+        :type key: T
+        :param value: Value to store
+        :type value: V
+        :param size: Size of entry in bytes (default: 0)
+        :type size: int
+        :param ttl: Seconds to keep the entry (default: None)
+            None -> self.ttl
+        :type ttl: None | float
+        :rtype: None
+        """
+        if ttl is None:
+            ttl = self.ttl
+        if ttl <= 0 or self.max_entries <= 0 or size > self.max_bytes:
+            return
+        expires = monotonic() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires, size, value)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or \
+                    self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all entries (statistics are kept)
+
+        :rtype: None
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Cache statistics
+
+        :return: hits, misses, expired, evictions, entries, bytes, hit_rate
+        :rtype: dict[unicode, int | float]
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+class _Call(object):
+    """ In-flight call of SingleFlight """
+
+    def __init__(self):
+        super(_Call, self).__init__()
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """ Run concurrent calls with the same key only once (threads) """
+
+    def __init__(self):
+        super(SingleFlight, self).__init__()
+        self._calls = {}
+        """ :type : dict[T, wl.cache._Call] """
+        self._lock = threading.Lock()
+        self.coalesced = 0
+        """ Calls that waited for another call instead of running """
+
+    def do(self, key, func):
+        """
+        Call func - or wait for the running call with the same key
+
+        All waiting callers get the same result (or exception)
+
+        :param key: Key of call
+        :type key: T
+        :param func: Function to call
+        :type func: () -> R
+        :return: Result of func
+        :rtype: R
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
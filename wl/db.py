@@ -13,15 +13,342 @@ __date__ = "2017-11-06"
 # Created: 2017-11-06 19:33
 
 import os
+import io
 import csv
+import sys
+import gc
+import datetime
+import threading
+import hashlib
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
 
 from flotils import Loadable
+from dateutil.parser import parse as dt_parse
 
 from .models.db import Stop, Line, Platform
+from .spatial import GridIndex
+from .search import TrigramIndex, fold
+from .store import Store, StopView, LineView, PlatformView, TableMapping, \
+    NO_INT
+
+
+SNAPSHOT_VERSION = 7
+""" Bump on any change to the pickled layout """
+SNAPSHOT_MAGIC = b"WLDBSNAP"
+
+PY2 = sys.version_info[0] == 2
+
+
+def csv_text(value):
+    if not value:
+        return None
+    if PY2:
+        return value.decode("utf-8")
+    return value
+
+
+def csv_int(value):
+    if not value:
+        return None
+    return int(value)
+
+
+def csv_float(value):
+    if not value:
+        return None
+    return float(value)
+
+
+def csv_bool(value):
+    if not value:
+        return None
+    return value.strip() in ("1", "true", "True")
+
+
+def csv_date(value):
+    """
+    Parse STAND column
+
+    :param value: Change date (e.g. 20170202 or 2017-02-02 10:00:00)
+    :type value: str | unicode
+    :return: Parsed date
+    :rtype: None | datetime.datetime
+    """
+    if not value:
+        return None
+    if PY2:
+        value = value.decode("utf-8")
+    for fmt in ("%Y%m%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    return dt_parse(value)
+
+
+CSV_COLUMNS_STOPS = [
+    ("HALTESTELLEN_ID", csv_int), ("TYP", csv_text), ("DIVA", csv_int),
+    ("NAME", csv_text), ("GEMEINDE", csv_text), ("GEMEINDE_ID", csv_int),
+    ("WGS84_LAT", csv_float), ("WGS84_LON", csv_float), ("STAND", csv_date)
+]
+CSV_COLUMNS_LINES = [
+    ("LINIEN_ID", csv_int), ("BEZEICHNUNG", csv_text),
+    ("REIHENFOLGE", csv_int), ("ECHTZEIT", csv_bool),
+    ("VERKEHRSMITTEL", csv_text), ("STAND", csv_date)
+]
+CSV_COLUMNS_PLATFORMS = [
+    ("STEIG_ID", csv_int), ("FK_LINIEN_ID", csv_int),
+    ("FK_HALTESTELLEN_ID", csv_int), ("RICHTUNG", csv_text),
+    ("REIHENFOLGE", csv_int), ("RBL_NUMMER", csv_int), ("BEREICH", csv_text),
+    ("STEIG", csv_text), ("STEIG_WGS84_LAT", csv_float),
+    ("STEIG_WGS84_LON", csv_float), ("STAND", csv_date)
+]
+
+
+class LineJoin(object):
+    """ Static data of a line at one stop """
+    __slots__ = ("line_id", "car_type", "realtime", "rbls")
+
+    def __init__(self, line_id, car_type, realtime, rbls):
+        self.line_id = line_id
+        self.car_type = car_type
+        self.realtime = realtime
+        self.rbls = rbls
+        """ :type : tuple[int] """
+
+
+class StopJoin(object):
+    """ Static data of a stop resolved for enriching api responses """
+    __slots__ = ("location", "rbls", "lines")
+
+    def __init__(self, location, rbls, lines):
+        self.location = location
+        """ :type : None | (float, float) """
+        self.rbls = rbls
+        """ :type : tuple[int] """
+        self.lines = lines
+        """ Lines by designation
+            :type : dict[unicode, wl.db.LineJoin] """
+
+
+class DatabaseState(object):
+    """
+    Immutable view of loaded data with its indexes
+
+    Replaced as a whole on (re)load, so readers holding a reference never
+    see a half-loaded database
+    """
+
+    INDEXES = (
+        'stops_by_diva', 'stops_grid', 'stops_search',
+        'platforms_by_rbl', 'platforms_grid', 'lines_by_designation',
+    )
+
+    def __init__(self, store, cell_size, reuse=None, rebuild=None):
+        """
+        Initialize object
+
+        :param store: Linked data
+        :type store: wl.store.Store
+        :param cell_size: Edge length of spatial index cells in meters
+        :type cell_size: float
+        :param reuse: Take indexes not in rebuild from this state
+            (default: None)
+        :type reuse: None | wl.db.DatabaseState
+        :param rebuild: Indexes to build when reusing (default: None)
+        :type rebuild: None | set[unicode]
+        :rtype: None
+        """
+        super(DatabaseState, self).__init__()
+        self.store = store
+        """ :type : wl.store.Store """
+        self.cell_size = cell_size
+        self.stops = TableMapping(store, store.stops, StopView)
+        """ :type : collections.Mapping[int, wl.store.StopView] """
+        self.lines = TableMapping(store, store.lines, LineView)
+        """ :type : collections.Mapping[int, wl.store.LineView] """
+        self.platforms = TableMapping(store, store.platforms, PlatformView)
+        """ :type : collections.Mapping[int, wl.store.PlatformView] """
+        self.stops_by_diva = None
+        """ Stop row by DIVA
+            :type : dict[int, int] """
+        self.stops_grid = None
+        """ Stop rows by position
+            :type : wl.spatial.GridIndex """
+        self.stops_search = None
+        """ Stop rows by name
+            :type : wl.search.TrigramIndex """
+        self.platforms_by_rbl = None
+        """ Platform rows by RBL (several lines can share one RBL)
+            :type : dict[int, tuple[int]] """
+        self.platforms_grid = None
+        """ Platform rows by position
+            :type : wl.spatial.GridIndex """
+        self.lines_by_designation = None
+        """ Line rows by designation (e.g. tram and bus '1')
+            :type : dict[unicode, tuple[int]] """
+
+        self.joins = {}
+        """ Resolved stops by DIVA (None if unknown) - filled on use
+            :type : dict[int, None | wl.db.StopJoin] """
+
+        for name in self.INDEXES:
+            if reuse is not None and name not in rebuild:
+                value = getattr(reuse, name)
+            else:
+                value = getattr(self, "_build_" + name)()
+            setattr(self, name, value)
+
+    def _build_stops_by_diva(self):
+        return {
+            diva: row
+            for row, diva in enumerate(self.store.stops.stop_id)
+            if diva != NO_INT
+        }
+
+    def _build_stops_grid(self):
+        stops = self.store.stops
+        grid = GridIndex(self.cell_size)
+
+        for row in range(len(stops)):
+            lat = stops.lat[row]
+            lng = stops.lng[row]
+            if lat == lat and lng == lng:
+                # not nan
+                grid.insert(lat, lng, row)
+        return grid
+
+    def _build_stops_search(self):
+        index = TrigramIndex()
+
+        for row, name in enumerate(self.store.stops.name):
+            if name:
+                index.add(row, name)
+        index.freeze()
+        return index
+
+    def _build_platforms_by_rbl(self):
+        platforms = self.store.platforms
+        res = {}
+
+        # Platforms in stop order
+        for row in self.store.stops.platform_rows:
+            rbl = platforms.rbl[row]
+            if rbl != NO_INT:
+                res.setdefault(rbl, []).append(row)
+        return {key: tuple(value) for key, value in res.items()}
+
+    def _build_platforms_grid(self):
+        platforms = self.store.platforms
+        grid = GridIndex(self.cell_size)
+
+        for row in self.store.stops.platform_rows:
+            lat = platforms.lat[row]
+            lng = platforms.lng[row]
+            if lat == lat and lng == lng:
+                grid.insert(lat, lng, row)
+        return grid
+
+    def _build_lines_by_designation(self):
+        lines = self.store.lines
+        res = {}
+
+        for row in sorted(range(len(lines)), key=lambda a: lines.order[a]):
+            res.setdefault(lines.designation[row], []).append(row)
+        return {key: tuple(value) for key, value in res.items()}
+
+    def join_stop(self, diva):
+        """
+        Resolve stop with its platforms and lines (cached)
+
+        :param diva: Stop id (DIVA)
+        :type diva: None | int
+        :return: Resolved stop or None if unknown
+        :rtype: None | wl.db.StopJoin
+        """
+        try:
+            return self.joins[diva]
+        except KeyError:
+            pass
+        row = self.stops_by_diva.get(diva)
+        res = None
+        if row is not None:
+            res = self._build_join(row)
+        self.joins[diva] = res
+        return res
+
+    def _build_join(self, row):
+        store = self.store
+        stops = store.stops
+        platforms = store.platforms
+        lines = store.lines
+        location = None
+        lat = stops.lat[row]
+        lng = stops.lng[row]
+        if lat == lat and lng == lng and lat and lng:
+            location = (lat, lng)
+        rbls = []
+        by_line = {}
+
+        for prow in stops.platform_rows[
+                stops.platform_offsets[row]:stops.platform_offsets[row + 1]
+        ]:
+            lrow = platforms.line_row[prow]
+            designation = lines.designation[lrow]
+            line = by_line.get(designation)
+            if line is None:
+                line = by_line[designation] = LineJoin(
+                    lines.id[lrow], lines.car_type[lrow],
+                    bool(lines.realtime[lrow]), []
+                )
+            rbl = platforms.rbl[prow]
+            if rbl == NO_INT:
+                continue
+            if rbl not in rbls:
+                rbls.append(rbl)
+            if rbl not in line.rbls:
+                line.rbls.append(rbl)
+        for line in by_line.values():
+            line.rbls = tuple(line.rbls)
+        return StopJoin(location, tuple(rbls), by_line)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        # Views of store - rebuilt on load
+        for key in ('stops', 'lines', 'platforms', 'joins'):
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.joins = {}
+        store = self.store
+        self.stops = TableMapping(store, store.stops, StopView)
+        self.lines = TableMapping(store, store.lines, LineView)
+        self.platforms = TableMapping(store, store.platforms, PlatformView)
 
 
 class WLDatabase(Loadable):
 
+    TABLE_INDEXES = {
+        'stops': {
+            'stops_by_diva': {'stop_id'},
+            'stops_grid': {'lat', 'lng'},
+            'stops_search': {'name'},
+        },
+        'platforms': {
+            'platforms_by_rbl': {'rbl'},
+            'platforms_grid': {'lat', 'lng'},
+        },
+        'lines': {
+            'lines_by_designation': {'designation', 'order'},
+        },
+    }
+    """ Indexes by table with the columns they depend on """
+
     def __init__(self, settings=None):
         if settings is None:
             settings = {}
@@ -43,87 +370,643 @@ class WLDatabase(Loadable):
                 'path_csv_platforms', "wienerlinien-ogd-steige.csv"
             )
         ))
-        self.stops = None
-        """ :type : dict[int, wl.models.db.Stop] """
-        self.platforms = None
-        """ :type : dict[int, wl.models.db.Platform] """
-        self.lines = None
-        """ :type : dict[int, wl.models.db.Line] """
-
-    def _csv_load(self , path , expected_keys, obj_cls):
-        res = []
-
-        with open(path, 'rb') as csvfile:
-            dialect = csv.Sniffer().sniff( csvfile.read( 1024))
-            csvfile.seek( 0)
-            reader = csv.reader( csvfile, dialect)
-            keys = reader.next()
+        path_snapshot = settings.get('path_snapshot')
+        self.path_snapshot = None
+        """ Compiled snapshot of the csv files (default: None - disabled)
+
+            The snapshot is a pickle - loading it runs code from the file.
+            Its checksum only detects corruption, it does not authenticate.
+            Only enable it for a data directory nobody untrusted can
+            write to """
+        if path_snapshot:
+            self.path_snapshot = self.join_path_prefix(
+                os.path.join(self.path_data, path_snapshot)
+            )
+        self.snapshot_hash = settings.get('snapshot_hash', True)
+        """ Validate snapshot against csv content (not only size/mtime) """
+        self.spatial_cell_size = settings.get('spatial_cell_size', 500.0)
+        """ Edge length of spatial index cells in meters """
+        self._state = None
+        """ Loaded data - swapped as a whole
+            :type : None | wl.db.DatabaseState """
+        self._signature = None
+        """ Signature of the csv files of the current state
+            :type : None | dict """
+        self._reload_lock = threading.Lock()
+
+    @property
+    def stops(self):
+        """ :rtype : None | collections.Mapping[int, wl.store.StopView] """
+        state = self._state
+        if state is None:
+            return None
+        return state.stops
+
+    @property
+    def lines(self):
+        """ :rtype : None | collections.Mapping[int, wl.store.LineView] """
+        state = self._state
+        if state is None:
+            return None
+        return state.lines
 
+    @property
+    def platforms(self):
+        """ :rtype : None | collections.Mapping[int, wl.store.PlatformView] """
+        state = self._state
+        if state is None:
+            return None
+        return state.platforms
+
+    def _csv_open(self, path):
+        if PY2:
+            return open(path, 'rb')
+        return io.open(path, 'r', encoding="utf-8-sig", newline="")
+
+    def _csv_rows(self, path, columns):
+        """
+        Stream typed rows of csv file
+
+        The header is validated once, rows are converted and yielded one
+        by one (constant memory)
+
+        :param path: Path to csv file
+        :type path: str | unicode
+        :param columns: Expected header keys with converter per column
+        :type columns: list[(str | unicode, (unicode) -> T)]
+        :return: Typed rows
+        :rtype: collections.Iterable[list[T]]
+        :raises IOError: Header does not match
+        """
+        expected_keys = [key for key, _ in columns]
+        converters = [convert for _, convert in columns]
+
+        with self._csv_open(path) as csvfile:
+            dialect = csv.Sniffer().sniff(csvfile.read(1024))
+            csvfile.seek(0)
+            reader = csv.reader(csvfile, dialect)
+            keys = next(reader, [])
+
+            if PY2:
+                keys = [key.decode("utf-8-sig") for key in keys]
             if len(expected_keys) != len(keys):
                 raise IOError("csv error - unexpected number of keys")
 
-            for i in range(len(keys)):
-                if keys[i] != expected_keys[i]:
-                    raise IOError("csv error - keys not matching")
+            if keys != expected_keys:
+                raise IOError("csv error - keys not matching")
 
-            for row in reader:
-                res.append(obj_cls.from_csv_row(*row))
-        return res
+            for line_no, row in enumerate(reader, 2):
+                if not row:
+                    continue
+                if len(row) != len(converters):
+                    raise IOError("csv error - {}:{} has {} fields".format(
+                        os.path.basename(path), line_no, len(row)
+                    ))
+                try:
+                    yield [
+                        convert(value)
+                        for convert, value in zip(converters, row)
+                    ]
+                except ValueError as e:
+                    raise IOError("csv error - {}:{} {}".format(
+                        os.path.basename(path), line_no, e
+                    ))
+
+    def _csv_load(self, path, columns, obj_cls):
+        return [
+            obj_cls.from_csv_row(*row)
+            for row in self._csv_rows(path, columns)
+        ]
 
     def csv_load_stops(self):
-        res = self._csv_load(self.path_csv_stops, [
-            "HALTESTELLEN_ID", "TYP", "DIVA", "NAME", "GEMEINDE", "GEMEINDE_ID",
-            "WGS84_LAT", "WGS84_LON", "STAND"
-        ], Stop)
+        res = self._csv_load(self.path_csv_stops, CSV_COLUMNS_STOPS, Stop)
         self.debug("Loaded {} stops".format(len(res)))
         return res
 
     def csv_load_lines(self):
-        res = self._csv_load(self.path_csv_lines, [
-            "LINIEN_ID","BEZEICHNUNG","REIHENFOLGE","ECHTZEIT",
-            "VERKEHRSMITTEL","STAND"
-        ], Line)
+        res = self._csv_load(self.path_csv_lines, CSV_COLUMNS_LINES, Line)
         self.debug("Loaded {} lines".format(len(res)))
         return res
 
     def csv_load_platforms(self):
-        res = self._csv_load(self.path_csv_platforms, [
-            "STEIG_ID","FK_LINIEN_ID","FK_HALTESTELLEN_ID","RICHTUNG",
-            "REIHENFOLGE","RBL_NUMMER","BEREICH","STEIG",
-            "STEIG_WGS84_LAT","STEIG_WGS84_LON","STAND"
-        ], Platform)
+        res = self._csv_load(
+            self.path_csv_platforms, CSV_COLUMNS_PLATFORMS, Platform
+        )
         self.debug("Loaded {} platforms".format(len(res)))
         return res
 
+    @staticmethod
+    def _int_key(value):
+        """
+        Normalize lookup value to integer index key
+
+        :param value: Value to normalize (e.g. 60200001 or "60200001")
+        :type value: int | str | unicode
+        :return: Index key (None if not a number)
+        :rtype: None | int
+        """
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
     def find_stop(self, stop_id):
         """
+        Find stop by DIVA
 
         :param stop_id: Stop id (DIVA)
-        :type stop_id: int
-        :return:
-        :rtype: wl.models.db.Stop
+        :type stop_id: int | str | unicode
+        :return: Found stop or None
+        :rtype: None | wl.store.StopView
         """
-        if not self.stops:
+        state = self._state
+        if state is None:
+            return None
+        row = state.stops_by_diva.get(self._int_key(stop_id))
+        if row is None:
             return None
-        val = 0
-        for stop in self.stops.values():
-            val += 1
-            if stop.stop_id == stop_id:
-                return stop
+        return StopView(state.store, row)
+
+    def join_stops(self, stop_ids):
+        """
+        Resolve stops with their platforms and lines in one pass
+
+        All lookups use the same loaded data, resolved stops are cached
+        until the next (re)load
+
+        :param stop_ids: Stop ids (DIVA)
+        :type stop_ids: collections.Iterable[int | str | unicode]
+        :return: Resolved stop (None if unknown) by given stop id
+        :rtype: dict[int | str | unicode, None | wl.db.StopJoin]
+        """
+        state = self._state
+        res = {}
+        if state is None:
+            return res
+
+        for stop_id in stop_ids:
+            if stop_id not in res:
+                res[stop_id] = state.join_stop(self._int_key(stop_id))
+        return res
+
+    def find_platforms_by_rbl(self, rbl):
+        """
+        Find all platforms with rbl
+
+        :param rbl: Platform id (RBL)
+        :type rbl: int | str | unicode
+        :return: Found platforms (empty if none)
+        :rtype: list[wl.store.PlatformView]
+        """
+        state = self._state
+        if state is None:
+            return []
+        return [
+            PlatformView(state.store, row)
+            for row in state.platforms_by_rbl.get(self._int_key(rbl), ())
+        ]
+
+    def find_platform_by_rbl(self, rbl, line_id=None):
+        """
+        Find platform by rbl
+
+        :param rbl: Platform id (RBL)
+        :type rbl: int | str | unicode
+        :param line_id: Only match platform of this line (default: None)
+        :type line_id: None | int | str | unicode
+        :return: Found platform or None
+        :rtype: None | wl.store.PlatformView
+        """
+        for platform in self.find_platforms_by_rbl(rbl):
+            if line_id is None or \
+                    platform.line_id == self._int_key(line_id):
+                return platform
         return None
 
+    def find_lines(self, designation):
+        """
+        Find all lines with designation
+
+        :param designation: Line designation (e.g. 13A)
+        :type designation: str | unicode
+        :return: Found lines ordered by their order (empty if none)
+        :rtype: list[wl.store.LineView]
+        """
+        state = self._state
+        if state is None or designation is None:
+            return []
+        return [
+            LineView(state.store, row)
+            for row in state.lines_by_designation.get(
+                "{}".format(designation).strip(), ()
+            )
+        ]
+
+    def find_line(self, designation, car_type=None):
+        """
+        Find line by designation
+
+        Designations are not unique (e.g. tram '1' and bus '1') - the line
+        with the lowest order is returned if car_type is not set
+
+        :param designation: Line designation (e.g. 13A)
+        :type designation: str | unicode
+        :param car_type: Only match line of this type (e.g. ptTram)
+            (default: None)
+        :type car_type: None | str | unicode
+        :return: Found line or None
+        :rtype: None | wl.store.LineView
+        """
+        for line in self.find_lines(designation):
+            if car_type is None or line.car_type == car_type:
+                return line
+        return None
+
+    def nearest_stops(self, lat, lng, k=5, max_distance=None):
+        """
+        Find stops nearest to position (offline)
+
+        :param lat: Latitude (WGS84)
+        :type lat: float
+        :param lng: Longitude (WGS84)
+        :type lng: float
+        :param k: Number of stops to return (default: 5)
+        :type k: int
+        :param max_distance: Ignore stops further away (in meters)
+            (default: None)
+        :type max_distance: None | float
+        :return: Stops with distance in meters, nearest first
+        :rtype: list[(wl.store.StopView, float)]
+        """
+        state = self._state
+        if state is None:
+            return []
+        return [
+            (StopView(state.store, row), dist)
+            for row, dist in state.stops_grid.nearest(
+                lat, lng, k, max_distance
+            )
+        ]
+
+    def stops_within(self, lat, lng, radius):
+        """
+        Find stops within radius of position (offline)
+
+        :param lat: Latitude (WGS84)
+        :type lat: float
+        :param lng: Longitude (WGS84)
+        :type lng: float
+        :param radius: Radius in meters
+        :type radius: float
+        :return: Stops with distance in meters, nearest first
+        :rtype: list[(wl.store.StopView, float)]
+        """
+        state = self._state
+        if state is None:
+            return []
+        return [
+            (StopView(state.store, row), dist)
+            for row, dist in state.stops_grid.within(lat, lng, radius)
+        ]
+
+    def nearest_platforms(self, lat, lng, k=5, max_distance=None):
+        """
+        Find platforms nearest to position (offline)
+
+        :param lat: Latitude (WGS84)
+        :type lat: float
+        :param lng: Longitude (WGS84)
+        :type lng: float
+        :param k: Number of platforms to return (default: 5)
+        :type k: int
+        :param max_distance: Ignore platforms further away (in meters)
+            (default: None)
+        :type max_distance: None | float
+        :return: Platforms with distance in meters, nearest first
+        :rtype: list[(wl.store.PlatformView, float)]
+        """
+        state = self._state
+        if state is None:
+            return []
+        return [
+            (PlatformView(state.store, row), dist)
+            for row, dist in state.platforms_grid.nearest(
+                lat, lng, k, max_distance
+            )
+        ]
+
+    def platforms_within(self, lat, lng, radius):
+        """
+        Find platforms within radius of position (offline)
+
+        :param lat: Latitude (WGS84)
+        :type lat: float
+        :param lng: Longitude (WGS84)
+        :type lng: float
+        :param radius: Radius in meters
+        :type radius: float
+        :return: Platforms with distance in meters, nearest first
+        :rtype: list[(wl.store.PlatformView, float)]
+        """
+        state = self._state
+        if state is None:
+            return []
+        return [
+            (PlatformView(state.store, row), dist)
+            for row, dist in state.platforms_grid.within(lat, lng, radius)
+        ]
+
+    def search_stops(self, name, limit=10, municipality=None, min_score=0.2):
+        """
+        Fuzzy search stops by name (offline)
+
+        Case, diacritics and 'ß'/'ss' spelling are ignored, umlauts also
+        match their 'ae/oe/ue' spelling
+
+        :param name: (Partial) name of stop
+        :type name: str | unicode
+        :param limit: Maximum number of results (default: 10)
+        :type limit: int
+        :param municipality: Only return stops in municipality (e.g. Wien)
+            (default: None)
+        :type municipality: None | str | unicode
+        :param min_score: Ignore worse matches (default: 0.2)
+        :type min_score: float
+        :return: Stops with score (higher is better), best first
+        :rtype: list[(wl.store.StopView, float)]
+        """
+        state = self._state
+        if state is None:
+            return []
+        if municipality:
+            folded = fold(municipality)
+            names = state.store.stops.municipality
+
+            def accept(row):
+                return fold(names[row]) == folded
+        else:
+            accept = None
+        return [
+            (StopView(state.store, row), score)
+            for row, score in state.stops_search.search(
+                name, limit, min_score, accept
+            )
+        ]
+
+    def _snapshot_signature(self):
+        """
+        Signature of the current source csv files
+
+        :return: Signature
+        :rtype: dict
+        """
+        sources = []
+
+        for path in [
+            self.path_csv_stops, self.path_csv_lines, self.path_csv_platforms
+        ]:
+            stat = os.stat(path)
+            source = {
+                'path': os.path.basename(path),
+                'size': stat.st_size,
+                'mtime': int(stat.st_mtime),
+            }
+            if self.snapshot_hash:
+                with open(path, 'rb') as f:
+                    source['sha1'] = hashlib.sha1(f.read()).hexdigest()
+            sources.append(source)
+        return {
+            'version': SNAPSHOT_VERSION,
+            # pickled str/unicode differ between major versions
+            'python': sys.version_info[0],
+            'sources': sources,
+        }
+
+    def snapshot_save(self, signature=None):
+        """
+        Write compiled snapshot of the loaded data
+
+        Layout: magic, pickled header (signature, payload sha1),
+        pickled payload
+
+        :param signature: Signature of source files (default: None)
+            None -> calculate
+        :type signature: None | dict
+        :rtype: None
+        :raises IOError: Failed to write
+        """
+        state = self._state
+        if not self.path_snapshot or state is None:
+            return
+        if signature is None:
+            signature = self._snapshot_signature()
+        payload = pickle.dumps(state, 2)
+        header = pickle.dumps({
+            'signature': signature,
+            'sha1': hashlib.sha1(payload).hexdigest(),
+        }, 2)
+        tmp = "{}.{}.tmp".format(self.path_snapshot, os.getpid())
+
+        with open(tmp, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(header)
+            f.write(payload)
+        try:
+            os.rename(tmp, self.path_snapshot)
+        except OSError:
+            # windows does not replace on rename
+            os.remove(self.path_snapshot)
+            os.rename(tmp, self.path_snapshot)
+        self.debug("Saved snapshot {}".format(self.path_snapshot))
+
+    def snapshot_load(self, signature=None):
+        """
+        Load compiled snapshot if it matches the source files
+
+        Unpickles the file - only use snapshots from trusted locations
+        (see path_snapshot)
+
+        :param signature: Signature of source files (default: None)
+            None -> calculate
+        :type signature: None | dict
+        :return: Snapshot loaded
+        :rtype: bool
+        """
+        if not self.path_snapshot or not os.path.exists(self.path_snapshot):
+            return False
+        if signature is None:
+            signature = self._snapshot_signature()
+        with open(self.path_snapshot, 'rb') as f:
+            data = f.read()
+        if not data.startswith(SNAPSHOT_MAGIC):
+            self.warning("Snapshot has unknown format")
+            return False
+        try:
+            buff = io.BytesIO(data)
+            buff.seek(len(SNAPSHOT_MAGIC))
+            header = pickle.load(buff)
+            if header['signature'] != signature:
+                self.info("Snapshot outdated")
+                return False
+            payload = data[buff.tell():]
+            if hashlib.sha1(payload).hexdigest() != header['sha1']:
+                self.warning("Snapshot checksum mismatch")
+                return False
+            # Unpickling allocates many objects - avoid repeated gc passes
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                state = pickle.loads(payload)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+            if state.cell_size != self.spatial_cell_size:
+                self.info("Snapshot uses different spatial cell size")
+                return False
+            self._state = state
+            self._signature = signature
+        except Exception:
+            self.exception("Failed to load snapshot")
+            return False
+        self.debug("Loaded snapshot {}".format(self.path_snapshot))
+        return True
+
+    def _csv_store(self):
+        """
+        Load csv files into new store
+
+        :rtype: wl.store.Store
+        """
+        store = Store()
+
+        for row in self._csv_rows(self.path_csv_stops, CSV_COLUMNS_STOPS):
+            store.stops.append(*row)
+        for row in self._csv_rows(self.path_csv_lines, CSV_COLUMNS_LINES):
+            store.lines.append(*row)
+        for row in self._csv_rows(
+                self.path_csv_platforms, CSV_COLUMNS_PLATFORMS
+        ):
+            store.platforms.append(*row)
+        self.debug("Loaded {} stops, {} lines, {} platforms".format(
+            len(store.stops), len(store.lines), len(store.platforms)
+        ))
+        store.link()
+        return store
+
+    def _snapshot_save_safe(self, signature):
+        if not self.path_snapshot:
+            return
+        try:
+            self.snapshot_save(signature)
+        except (IOError, OSError):
+            self.warning(
+                "Failed to write snapshot {}".format(self.path_snapshot)
+            )
+
     def csv_load(self):
         self.debug("()")
-        self.stops = {
-            stop.id: stop for stop in self.csv_load_stops()
-        }
-        self.lines = {
-            line.id: line for line in self.csv_load_lines()
-        }
-        for platform in self.csv_load_platforms():
-            stop = self.stops[platform.stop_id]
-            platform.stop = stop
-            platform.line = self.lines[platform.line_id]
-            if stop.platforms is None:
-                stop.platforms = []
-            stop.platforms.append(platform)
+        signature = None
+
+        with self._reload_lock:
+            if self.path_snapshot:
+                signature = self._snapshot_signature()
+                if self.snapshot_load(signature):
+                    return
+            self._state = DatabaseState(
+                self._csv_store(), self.spatial_cell_size
+            )
+            self._signature = signature
+            self._snapshot_save_safe(signature)
+
+    def csv_reload(self):
+        """
+        Incrementally reload changed csv rows
+
+        Rows are matched by id, rows with an unchanged STAND are skipped.
+        Unchanged tables and indexes are shared with the current state,
+        changed rows are patched into copies. The new state is swapped in
+        at once - readers see either the old or the new data.
+
+        :return: Data changed
+        :rtype: bool
+        """
+        self.debug("()")
+        if self._state is None:
+            self.csv_load()
+            return True
+
+        with self._reload_lock:
+            old = self._state
+            signature = None
+            if self.path_snapshot:
+                signature = self._snapshot_signature()
+                if signature == self._signature:
+                    self.debug("Unchanged")
+                    return False
+            sources = {
+                'stops': (self.path_csv_stops, CSV_COLUMNS_STOPS),
+                'lines': (self.path_csv_lines, CSV_COLUMNS_LINES),
+                'platforms': (self.path_csv_platforms, CSV_COLUMNS_PLATFORMS),
+            }
+            store = Store()
+            rebuild = set()
+            relink = False
+
+            for name, (path, columns) in sources.items():
+                table = getattr(old.store, name)
+                updated, added, removed = table.diff(
+                    self._csv_rows(path, columns)
+                )
+                self.debug("{}: {} updated, {} added, {} removed".format(
+                    name, len(updated), len(added), len(removed)
+                ))
+                indexes = self.TABLE_INDEXES[name]
+                if removed:
+                    # Row numbers change - start over for this table
+                    table = table.__class__()
+                    for row in self._csv_rows(path, columns):
+                        table.append(*row)
+                    rebuild.update(indexes)
+                    relink = True
+                elif updated or added:
+                    changed = table.changed_columns(updated)
+                    table = table.copy()
+                    for row, values in updated:
+                        table.set(row, values)
+                    for values in added:
+                        table._add(values)
+                    if added:
+                        rebuild.update(indexes)
+                        relink = True
+                    rebuild.update(
+                        index for index, cols in indexes.items()
+                        if cols & changed
+                    )
+                    if changed & {'line_id', 'stop_id'} and \
+                            name == 'platforms':
+                        relink = True
+                setattr(store, name, table)
+            if not relink and not rebuild and all(
+                    getattr(store, name) is getattr(old.store, name)
+                    for name in sources
+            ):
+                self.info("No changes")
+                self._signature = signature
+                return False
+            if relink:
+                # Do not touch tables of the current state
+                for name in ('stops', 'platforms'):
+                    if getattr(store, name) is getattr(old.store, name):
+                        setattr(store, name, getattr(store, name).copy())
+                store.link()
+                # Platform order per stop might have changed
+                rebuild.add('platforms_by_rbl')
+            self._state = DatabaseState(
+                store, self.spatial_cell_size, old, rebuild
+            )
+            self._signature = signature
+            self.info("Reloaded (rebuilt {})".format(
+                ", ".join(sorted(rebuild)) or "no indexes"
+            ))
+            self._snapshot_save_safe(signature)
+        return True
@@ -0,0 +1,183 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-19 00:10
+
+from .models.realtime import RTChange
+
+
+def index_monitors(monitors):
+    """
+    Compact, keyed form of monitors for diffing
+
+    Lines are keyed by (rbl, line name, direction_id), departures by
+    planned time (numbered if a planned time repeats)
+
+    :param monitors: Monitors
+    :type monitors: list[wl.models.realtime.Monitor]
+    :return: (rbl, name, direction_id) ->
+        (traffic_jam, {(planned, n): (countdown, real, traffic_jam)})
+    :rtype: dict[tuple, (None | bool, dict[tuple, tuple])]
+    """
+    res = {}
+
+    for monitor in monitors or ():
+        rbl = None
+        if monitor.stop:
+            rbl = monitor.stop.rbl
+        for line in monitor.lines or ():
+            key = (rbl, line.name, line.direction_id)
+            entry = res.get(key)
+            if entry is None:
+                entry = res[key] = (line.traffic_jam, {})
+            deps = entry[1]
+            for dep in line.departures or ():
+                n = 0
+                while (dep.planned, n) in deps:
+                    n += 1
+                jam = None
+                if dep.vehicle:
+                    jam = dep.vehicle.get('traffic_jam')
+                deps[(dep.planned, n)] = (dep.countdown, dep.real, jam)
+    return res
+
+
+def diff_index(old, new, rbls=None):
+    """
+    Changes between two indexed snapshots
+
+    :param old: Previous snapshot (see index_monitors)
+    :type old: dict
+    :param new: Current snapshot (see index_monitors)
+    :type new: dict
+    :param rbls: Only report removals for lines of these rbls
+        (default: None) - None -> all
+    :type rbls: None | set[unicode]
+    :return: Changes
+    :rtype: list[wl.models.realtime.RTChange]
+    """
+    res = []
+    append = res.append
+
+    for key, (jam, deps) in new.items():
+        rbl, name, direction_id = key
+        prev = old.get(key)
+        if prev is None:
+            for (planned, _), (countdown, _, _) in deps.items():
+                append(RTChange(
+                    RTChange.ADDED, rbl, name, direction_id, planned,
+                    None, countdown
+                ))
+            continue
+        prev_jam, prev_deps = prev
+        if prev_jam != jam:
+            append(RTChange(
+                RTChange.TRAFFIC_JAM, rbl, name, direction_id, None,
+                prev_jam, jam
+            ))
+        for dep_key, values in deps.items():
+            planned = dep_key[0]
+            prev_values = prev_deps.get(dep_key)
+            if prev_values is None:
+                append(RTChange(
+                    RTChange.ADDED, rbl, name, direction_id, planned,
+                    None, values[0]
+                ))
+                continue
+            if prev_values == values:
+                continue
+            if prev_values[0] != values[0]:
+                append(RTChange(
+                    RTChange.COUNTDOWN, rbl, name, direction_id, planned,
+                    prev_values[0], values[0]
+                ))
+            if prev_values[1] != values[1]:
+                append(RTChange(
+                    RTChange.REAL, rbl, name, direction_id, planned,
+                    prev_values[1], values[1]
+                ))
+            if prev_values[2] != values[2]:
+                append(RTChange(
+                    RTChange.TRAFFIC_JAM, rbl, name, direction_id, planned,
+                    prev_values[2], values[2]
+                ))
+        for dep_key, values in prev_deps.items():
+            if dep_key not in deps:
+                append(RTChange(
+                    RTChange.REMOVED, rbl, name, direction_id, dep_key[0],
+                    values[0], None
+                ))
+    for key, (_, prev_deps) in old.items():
+        if key in new or (
+                rbls is not None and "{}".format(key[0]) not in rbls
+        ):
+            continue
+        rbl, name, direction_id = key
+        for (planned, _), (countdown, _, _) in prev_deps.items():
+            append(RTChange(
+                RTChange.REMOVED, rbl, name, direction_id, planned,
+                countdown, None
+            ))
+    return res
+
+
+class MonitorDiff(object):
+    """ Changes between consecutive monitor responses """
+
+    def __init__(self):
+        super(MonitorDiff, self).__init__()
+        self._snapshot = {}
+        """ Last indexed snapshot (see index_monitors) """
+
+    def update(self, resp, partial=False, rbls=None):
+        """
+        Store response and return changes to the previous one
+
+        :param resp: Current response
+        :type resp: wl.models.realtime.RTResponse
+        :param partial: Response only covers some rbls - lines of other
+            rbls are kept instead of reported as removed (default: False)
+        :type partial: bool
+        :param rbls: Requested rbls - implies partial (default: None)
+            Lines of these rbls missing from the response are removed,
+            lines of other rbls are kept. None -> rbls of the response
+            (an rbl without lines is then never reported as removed)
+        :type rbls: None | list[str | unicode | int]
+        :return: Changes
+        :rtype: list[wl.models.realtime.RTChange]
+        """
+        new = index_monitors(resp.monitors)
+        if rbls is not None:
+            rbls = set("{}".format(rbl) for rbl in rbls)
+            partial = True
+        elif partial:
+            rbls = set("{}".format(key[0]) for key in new)
+        if partial:
+            kept = {
+                key: value for key, value in self._snapshot.items()
+                if "{}".format(key[0]) not in rbls
+            }
+            kept.update(new)
+            new_snapshot = kept
+        else:
+            new_snapshot = new
+        res = diff_index(self._snapshot, new, rbls)
+        self._snapshot = new_snapshot
+        return res
+
+    def reset(self):
+        """
+        Forget last response (next update reports everything as added)
+
+        :rtype: None
+        """
+        self._snapshot = {}
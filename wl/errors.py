@@ -31,5 +31,13 @@ class RequestException(WL_Exception):
     """ Error while making request """
 
 
+class RateLimitException(RequestException):
+    """ Request not allowed within rate limit in time """
+
+
+class CircuitOpenException(RequestException):
+    """ Endpoint failing - request not made """
+
+
 class ProtocolViolation(Exception):
     """ Response did not follow documentation """
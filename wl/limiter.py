@@ -0,0 +1,404 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-19 00:35
+
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+try:
+    import contextvars
+except ImportError:
+    # Python < 3.7
+    contextvars = None
+
+from .cache import monotonic
+from .errors import RateLimitException
+
+
+PRIORITY_INTERACTIVE = 0
+""" User is waiting for the result """
+PRIORITY_PREFETCH = 1
+""" Result is likely needed soon """
+PRIORITY_BACKGROUND = 2
+""" Polling and other bulk work """
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_PREFETCH: "prefetch",
+    PRIORITY_BACKGROUND: "background",
+}
+
+if contextvars is not None:
+    _priority = contextvars.ContextVar(
+        "wl_priority", default=PRIORITY_INTERACTIVE
+    )
+
+    def current_priority():
+        """
+        Priority of requests made in the current context
+
+        :rtype: int
+        """
+        return _priority.get()
+
+    @contextmanager
+    def priority(value):
+        """
+        Make requests inside the block with priority value
+
+        Per thread and per asyncio task
+
+        :param value: One of PRIORITY_*
+        :type value: int
+        """
+        token = _priority.set(value)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+else:
+    _local = threading.local()
+
+    def current_priority():
+        return getattr(_local, "priority", PRIORITY_INTERACTIVE)
+
+    @contextmanager
+    def priority(value):
+        old = current_priority()
+        _local.priority = value
+        try:
+            yield
+        finally:
+            _local.priority = old
+
+
+class _Waiter(object):
+    __slots__ = ("priority", "seq", "start", "deadline", "done")
+
+    def __init__(self, priority, seq, start, deadline):
+        self.priority = priority
+        self.seq = seq
+        self.start = start
+        """ Monotonic time of the request """
+        self.deadline = deadline
+        """ Monotonic time to give up at (None -> never) """
+        self.done = False
+        """ Granted or given up """
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RateLimiter(object):
+    """
+    Thread safe token bucket with priority queue
+
+    Waiting requests are served by priority, then in order of arrival.
+    A request waiting longer than the deadline of its priority fails -
+    at once if the queue ahead of it cannot be served within the deadline
+    """
+
+    def __init__(
+            self, rate=5.0, burst=10, deadlines=None, max_queue=1000
+    ):
+        """
+        Initialize object
+
+        :param rate: Requests per second (default: 5.0)
+        :type rate: float
+        :param burst: Bucket size (default: 10)
+        :type burst: int
+        :param deadlines: Seconds to wait at most by priority
+            (default: None) - None -> interactive 10, prefetch 30,
+            background unlimited
+        :type deadlines: None | dict[int, None | float]
+        :param max_queue: Maximum waiting requests (default: 1000)
+        :type max_queue: int
+        :rtype: None
+        """
+        super(RateLimiter, self).__init__()
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.deadlines = {
+            PRIORITY_INTERACTIVE: 10.0,
+            PRIORITY_PREFETCH: 30.0,
+            PRIORITY_BACKGROUND: None,
+        }
+        if deadlines:
+            for key, value in deadlines.items():
+                self.deadlines[int(key)] = value
+        self.max_queue = max_queue
+        self._tokens = self.burst
+        self._updated = monotonic()
+        self._waiters = []
+        """ Heap of waiting requests (may contain done ones)
+            :type : list[wl.limiter._Waiter] """
+        self._waiting = {}
+        """ Number of waiting requests by priority
+            :type : dict[int, int] """
+        self._live = 0
+        """ Number of waiting requests """
+        self._seq = itertools.count()
+        self._cond = threading.Condition(threading.Lock())
+        self._granted = {}
+        """ :type : dict[int, int] """
+        self._rejected = {}
+        """ :type : dict[int, int] """
+        self._waited = {}
+        """ Seconds waited by granted requests
+            :type : dict[int, float] """
+        self.max_waiting = 0
+        """ Longest queue seen """
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+        self._updated = now
+
+    def _head(self):
+        waiters = self._waiters
+        while waiters and waiters[0].done:
+            heapq.heappop(waiters)
+        if waiters:
+            return waiters[0]
+        return None
+
+    def _count(self, counter, prio, value=1):
+        counter[prio] = counter.get(prio, 0) + value
+
+    def _eta(self, ahead):
+        """ Seconds until ahead + 1 tokens are available """
+        return max(0.0, ahead + 1.0 - self._tokens) / self.rate
+
+    def _remove(self, waiter):
+        """ Take waiter out of the queue (granted or given up) """
+        waiter.done = True
+        self._waiting[waiter.priority] -= 1
+        self._live -= 1
+        if len(self._waiters) > 2 * self._live + 16:
+            # Mostly given up waiters deep in the heap - compact
+            self._waiters = [w for w in self._waiters if not w.done]
+            heapq.heapify(self._waiters)
+        # Next in line might already have a token
+        self._cond.notify_all()
+
+    def _enqueue(self, prio, timeout, now):
+        """
+        Take a token or queue request (lock held)
+
+        :return: Waiter or None if granted
+        :rtype: None | wl.limiter._Waiter
+        """
+        if prio is None:
+            prio = current_priority()
+        if timeout is None:
+            timeout = self.deadlines.get(prio)
+        if self._tokens >= 1.0 and self._head() is None:
+            self._tokens -= 1.0
+            self._count(self._granted, prio)
+            return None
+        if self._live >= self.max_queue:
+            self._count(self._rejected, prio)
+            raise RateLimitException("Rate limit queue full")
+        # Everyone of the same or a higher priority is served first
+        ahead = sum(n for p, n in self._waiting.items() if p <= prio)
+        if timeout is not None and self._eta(ahead) > timeout:
+            self._count(self._rejected, prio)
+            raise RateLimitException(
+                "Rate limit queue longer than deadline of {}s".format(
+                    timeout
+                )
+            )
+        waiter = _Waiter(
+            prio, next(self._seq), now,
+            None if timeout is None else now + timeout
+        )
+        heapq.heappush(self._waiters, waiter)
+        self._count(self._waiting, prio)
+        self._live += 1
+        self.max_waiting = max(self.max_waiting, self._live)
+        return waiter
+
+    def _poll(self, waiter, now):
+        """
+        Grant token to waiter if it is its turn (lock held)
+
+        :return: Seconds waited if granted else None and seconds until
+            it might be
+        :rtype: (None | float, float)
+        :raises RateLimitException: Deadline passed
+        """
+        if waiter.done:
+            raise RateLimitException("Rate limit wait cancelled")
+        head = self._head()
+        if head is waiter and self._tokens >= 1.0:
+            self._tokens -= 1.0
+            self._remove(waiter)
+            waited = now - waiter.start
+            self._count(self._granted, waiter.priority)
+            self._count(self._waited, waiter.priority, waited)
+            return waited, 0.0
+        if waiter.deadline is not None and now >= waiter.deadline:
+            self._remove(waiter)
+            self._count(self._rejected, waiter.priority)
+            raise RateLimitException(
+                "Rate limit deadline of {}s passed".format(
+                    waiter.deadline - waiter.start
+                )
+            )
+        if head is waiter:
+            wait = self._eta(0)
+        else:
+            # At least the head and all higher priorities are served first
+            wait = max(1.0 / self.rate, self._eta(max(1, sum(
+                n for p, n in self._waiting.items() if p < waiter.priority
+            ))))
+        if waiter.deadline is not None:
+            wait = min(wait, waiter.deadline - now)
+        return None, wait
+
+    def try_acquire(self, prio=None, timeout=None, waiter=None):
+        """
+        Take a request token without blocking
+
+        Without a token the request is queued - pass the returned waiter
+        to the next calls until granted or to cancel() to give up
+
+        :param prio: Priority of a new request (default: None)
+            None -> current_priority()
+        :type prio: None | int
+        :param timeout: Seconds to wait at most for a new request
+            (default: None) - None -> deadline of priority
+        :type timeout: None | float
+        :param waiter: Queued request to retry (default: None)
+        :type waiter: None | wl.limiter._Waiter
+        :return: (None, seconds waited) if granted else
+            (waiter, seconds until the next try)
+        :rtype: (None | wl.limiter._Waiter, float)
+        :raises RateLimitException: Deadline passed or queue full
+        """
+        now = monotonic()
+        with self._cond:
+            self._refill(now)
+            if waiter is None:
+                waiter = self._enqueue(prio, timeout, now)
+                if waiter is None:
+                    return None, 0.0
+            waited, wait = self._poll(waiter, now)
+            if waited is not None:
+                return None, waited
+            return waiter, wait
+
+    def spare(self, count=1):
+        """
+        Whether count requests would be granted now without waiting
+
+        Takes no token - a hint for optional extra requests
+
+        :param count: Number of requests (default: 1)
+        :type count: int
+        :rtype: bool
+        """
+        with self._cond:
+            self._refill(monotonic())
+            return self._live == 0 and self._tokens >= count
+
+    def cancel(self, waiter):
+        """
+        Give up waiting - no token is taken
+
+        :param waiter: Queued request (see try_acquire)
+        :type waiter: wl.limiter._Waiter
+        :rtype: None
+        """
+        with self._cond:
+            if not waiter.done:
+                self._remove(waiter)
+
+    def acquire(self, prio=None, timeout=None):
+        """
+        Wait for a request token
+
+        :param prio: Priority (default: None)
+            None -> current_priority()
+        :type prio: None | int
+        :param timeout: Seconds to wait at most (default: None)
+            None -> deadline of priority
+        :type timeout: None | float
+        :return: Seconds waited
+        :rtype: float
+        :raises RateLimitException: Deadline passed, queue full or
+            longer than the deadline
+        """
+        now = monotonic()
+        with self._cond:
+            self._refill(now)
+            waiter = self._enqueue(prio, timeout, now)
+            if waiter is None:
+                return 0.0
+            try:
+                while True:
+                    waited, wait = self._poll(waiter, now)
+                    if waited is not None:
+                        return waited
+                    self._cond.wait(wait)
+                    now = monotonic()
+                    self._refill(now)
+            except BaseException:
+                if not waiter.done:
+                    self._remove(waiter)
+                raise
+
+    def stats(self):
+        """
+        Limiter statistics by priority name
+
+        :return: granted, rejected, waited (seconds), waiting, max_waiting,
+            tokens
+        :rtype: dict[unicode, T]
+        """
+        with self._cond:
+            self._refill(monotonic())
+            names = PRIORITY_NAMES
+            return {
+                'granted': {
+                    names.get(k, k): v for k, v in self._granted.items()
+                },
+                'rejected': {
+                    names.get(k, k): v for k, v in self._rejected.items()
+                },
+                'waited': {
+                    names.get(k, k): v for k, v in self._waited.items()
+                },
+                'waiting': self._live,
+                'max_waiting': self.max_waiting,
+                'tokens': self._tokens,
+            }
+
+
+def limiter_from_settings(settings):
+    """
+    Rate limiter of api client
+
+    :param settings: Client settings - 'rate_limit' (RateLimiter instance
+        or its arguments as dict)
+    :type settings: dict
+    :return: Rate limiter or None if not limited
+    :rtype: None | wl.limiter.RateLimiter
+    """
+    limit = settings.get('rate_limit')
+    if isinstance(limit, dict):
+        return RateLimiter(**limit)
+    return limit
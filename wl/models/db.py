@@ -77,7 +77,7 @@ class Line(FromToDictBase):
             'id': entry_id,
             'designation': designation,
             'order': order,
-            'realtime': realtime == 1,
+            'realtime': realtime in (True, 1, "1"),
             'car_type': car_type,
             'change_date': change_date if change_date else None
         })
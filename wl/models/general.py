@@ -63,8 +63,12 @@ class Stop(PrintableBase, FromToDictBase):
         """ DIVA / routing.stop_id """
         self.name = None
         """ routing.name """
-        #self.rbl = None
-        """ realtime.rbl """
+        self.rbls = None
+        """ realtime.rbl of all platforms (database)
+            :type : None | list[int] """
+        self.lines = None
+        """ Designations of lines serving the stop (database)
+            :type : None | list[unicode] """
         self.distance = None
         """ routing.distance """
         self.distance_time = None
@@ -104,3 +108,22 @@ class Departure(PrintableBase, FromToDictBase):
         self.datetime = None
         self.countdown = None
         self.direction = None
+        self.line_id = None
+        """ Line id (database) """
+        self.car_type = None
+        """ Vehicle type - e.g. ptTram (database) """
+        self.realtime = None
+        """ Line has realtime data (database) """
+        self.rbls = None
+        """ realtime.rbl of the line's platforms at the stop (database)
+            :type : None | list[int] """
+        self.location = None
+        """ Location of the stop (database)
+            :type : None | wl.models.general.Location """
+
+    @classmethod
+    def from_dict(cls, d):
+        new = super(Departure, Departure).from_dict(d)
+        if new.location:
+            new.location = Location.from_dict(new.location)
+        return new
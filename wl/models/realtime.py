@@ -24,8 +24,33 @@ class RTResponse(FromToDictBase, PrintableBase):
         self.server_time = None
         self.message_value = None
         self.raw = None
+        """ Decoded json (None if not kept)
+            :type : None | dict """
         self.monitors = None
-        """ :type : list[wl.models.realtime.Monitor] """
+        """ Lists are wl.schema.LazyList in lazy mode
+            :type : list[wl.models.realtime.Monitor] """
+        self.stale = False
+        """ Last good response served while the api is slow or failing """
+
+
+class RTBatchResponse(RTResponse):
+
+    def __init__(self):
+        super(RTBatchResponse, self).__init__()
+        self.failures = None
+        """ Chunks that could not be loaded
+            :type : list[wl.models.realtime.RTChunkFailure] """
+
+
+class RTChunkFailure(FromToDictBase, PrintableBase):
+
+    def __init__(self, rbls=None, error=None):
+        super(RTChunkFailure, self).__init__()
+        self.rbls = rbls
+        """ Rbls of the failed request
+            :type : None | list[str | unicode | int] """
+        self.error = error
+        """ :type : None | Exception """
 
 
 class Monitor(FromToDictBase, PrintableBase):
@@ -88,3 +113,31 @@ class Departure(FromToDictBase, PrintableBase):
         """ :type : None | int """
         self.vehicle = None
         """ :type : dict """
+
+
+class RTChange(FromToDictBase, PrintableBase):
+    """ Change of a departure or line between two monitor responses """
+    ADDED = "added"
+    REMOVED = "removed"
+    COUNTDOWN = "countdown"
+    REAL = "real"
+    TRAFFIC_JAM = "traffic_jam"
+
+    def __init__(
+            self, change=None, rbl=None, line=None, direction_id=None,
+            planned=None, old=None, new=None
+    ):
+        super(RTChange, self).__init__()
+        self.change = change
+        """ One of ADDED, REMOVED, COUNTDOWN, REAL, TRAFFIC_JAM """
+        self.rbl = rbl
+        self.line = line
+        """ Line name """
+        self.direction_id = direction_id
+        self.planned = planned
+        """ Planned time of departure (None for changes of the line)
+            :type : None | datetime.datetime """
+        self.old = old
+        """ Previous value (countdown, real, traffic_jam) """
+        self.new = new
+        """ Current value (countdown, real, traffic_jam) """
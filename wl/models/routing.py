@@ -96,6 +96,8 @@ class ItdResponse(ItdBase):
         self.length_unit = None
         self.children = None
         """ :type : list[xml.etree.ElementTree.Element] """
+        self.stale = False
+        """ Last good response served while the api is slow or failing """
 
 
 class ItdDMResponse(ItdResponse):
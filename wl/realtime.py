@@ -13,15 +13,17 @@ __date__ = "2017-11-03"
 # Created: 2017-11-03 10:42
 
 from flotils import Loadable
-from flotils.loadable import load_json
-from floscraper import WebScraper
 from requests.compat import urljoin
-from dateutil.parser import parse as dt_parse
 
 from .errors import RequestException, ProtocolViolation
 from .models import Request
-from .models.realtime import RTResponse, Monitor, Stop, Line, Departure
-from .utils import to_utc
+from .models.realtime import RTResponse, RTBatchResponse, RTChunkFailure
+from .schema import MONITOR, VALIDATE_REQUIRED, LazyList, json_decoder
+from .utils import parse_iso_datetime, run_parallel
+from .transport import transport_from_settings
+from .limiter import limiter_from_settings
+from .resilience import resilience_from_settings
+from .cache import TTLCache, SingleFlight, normalize_params
 
 
 class WLRealtime(Loadable):
@@ -33,7 +35,58 @@ class WLRealtime(Loadable):
         super(WLRealtime, self).__init__(settings)
         self.api_key = settings['api_key']
         self.base_url = "https://www.wienerlinien.at/ogd_realtime/"
-        self.session = WebScraper(settings.get('web', {}))
+        self.session = self._create_transport(settings)
+        """ Http session (None for async clients)
+            :type : None | wl.transport.Transport | floscraper.WebScraper """
+        self.rate_limit = limiter_from_settings(settings)
+        """ Shared request budget (setting 'rate_limit')
+            :type : None | wl.limiter.RateLimiter """
+        self.resilience = resilience_from_settings(settings)
+        """ Circuit breaker and stale responses (setting 'resilience')
+            :type : None | wl.resilience.Resilience """
+        self.batch_size = settings.get('batch_size', 20)
+        """ Maximum rbls per request in monitor_batch() """
+        self.batch_workers = settings.get('batch_workers', 4)
+        """ Maximum concurrent requests in monitor_batch() """
+        self.validation = settings.get('validation', VALIDATE_REQUIRED)
+        """ Response validation level ('full', 'required' or 'off') """
+        self._json_loads = json_decoder(settings.get('json_decoder', "auto"))
+        self.lazy = settings.get('lazy', False)
+        """ Parse monitors, lines and departures on first access """
+        self.keep_raw = settings.get('keep_raw', True)
+        """ Keep decoded json in RTResponse.raw """
+        self._parse_monitor = MONITOR.compile(
+            self.validation, self, self.lazy
+        )
+        """ Compiled monitor parser
+            :type : (dict) -> wl.models.realtime.Monitor """
+        cache = settings.get('cache')
+        self.cache = None
+        """ Response cache (enabled with setting cache={'ttl': ..} or True)
+
+            Cached responses are shared between callers - treat them as
+            read-only (copy.deepcopy() before modifying)
+            :type : None | wl.cache.TTLCache """
+        if cache is True:
+            cache = {}
+        if cache is not False and cache is not None:
+            self.cache = TTLCache(
+                ttl=cache.get('ttl', 15.0),
+                max_entries=cache.get('max_entries', 1024),
+                max_bytes=cache.get('max_bytes', 32 * 1024 * 1024)
+            )
+        self._flight = SingleFlight()
+        """ Coalesces identical concurrent requests """
+
+    def _create_transport(self, settings):
+        """
+        Create http session (see wl.transport.transport_from_settings)
+
+        :param settings: Client settings
+        :type settings: dict
+        :rtype: None | wl.transport.Transport | floscraper.WebScraper
+        """
+        return transport_from_settings(settings)
 
     def _parse_datetime(self, dt_str):
         """
@@ -44,9 +97,7 @@ class WLRealtime(Loadable):
         :return: Naive datetime in utc
         :rtype: None | datetime.datetime
         """
-        if not dt_str:
-            return None
-        return to_utc(dt_parse(dt_str))
+        return parse_iso_datetime(dt_str)
 
     def _is_present(
             self, element, field, required=False, type=None, exception_msg=None
@@ -96,184 +147,25 @@ class WLRealtime(Loadable):
 
         return element[field]
 
-    def _parse_stop(self, stop):
+    def _parse_location(self, geometry):
         """
+        Location of stop
 
-        :param stop:
-        :type stop: dict
-        :return:
-        :rtype: wl.models.realtime.Stop
+        :param geometry: Geometry element of stop
+        :type geometry: dict
+        :return: Location ('type', 'lat', 'lng')
+        :rtype: dict
         """
-        if not stop:
-            return None
-        res = Stop()
-
-        #   Filter            |   Val   | req |   Discr
-        # .locationStop       | element |  y  | Informationen über die abgefragte Haltestelle (siehe JSON Geometry Object Definition)
-        # ..type              | str     |  y  | Typ des JSON Geometry Objects
-        # ..geometry          | element |  y  | Koordinaten Informationen der Haltestelle
-        # ...type             | str     |  y  | Typ des Geometry Elements (hier immer 'Point')
-        # ...coordinates      | double, |  y  | long,lat Koordinaten der Haltestelle im WGS84 Format
-        #                     | double  |     |
-        # ..properties        | element |  y  | Detail Informationen über den abgefragten Ort
-        # ...name             | str     |  y  | DIVA Nummer der Haltestelle (= Haltestellennummer der el. Fahrplanauskunft)
-        # ...title            | str     |  y  | Name der Haltestelle
-        # ...municipality     | str     |  y  | Name der Stadt/des Ortes
-        # ...municipalityId   | str     |  y  | ID der Stadt/des Ortes
-        # ...type             | str     |  y  | Typ des Ortes (hier nur 'stop')
-        # ...coordName        | str     |  y  | Verwendetes Koordinatensystem (hier nur 'WGS84')
-        # ...gate             | str     |  n  | Gleis oder Steig des Fahrzeugs
-        # ...attributes       | element |  y  | beliebige Attribute
-        # ....rbl             | str     |  y  | Haltepunkt ID (RBL Nummer)
-        res.stop_type = self._get_field(stop, 'type', True)
-        self._is_present(stop, 'geometry', True)
         try:
-            res.location = {
-                'type': self._get_field(stop['geometry'], 'type', True),
-                'lat': self._get_field(stop['geometry'], 'coordinates', True)[0],
-                'lng': self._get_field(stop['geometry'], 'coordinates', True)[1]
+            coordinates = geometry['coordinates']
+            return {
+                'type': geometry.get('type'),
+                'lat': coordinates[0],
+                'lng': coordinates[1]
             }
-        except IndexError:
+        except (KeyError, IndexError, TypeError):
             raise ProtocolViolation("No lat/lng")
 
-        self._is_present(stop, 'properties', True)
-        self._is_present(stop['properties'], 'name', True)
-        res.title = self._get_field(stop['properties'], 'title', True)
-        res.municipality = self._get_field(
-            stop['properties'], 'municipality', True
-        )
-        res.municipality_id = self._get_field(
-            stop['properties'], 'municipalityId', True
-        )
-        res.type = self._get_field(stop['properties'], 'type', True)
-        res.gate = self._get_field(stop['properties'], 'gate')
-        self._is_present(stop['properties'], 'attributes', True)
-        res.rbl = self._get_field(stop['properties']['attributes'], 'rbl', True)
-        return res
-
-    def _parse_departure(self, departure):
-        """
-
-        :param departure:
-        :type departure: dict
-        :return:
-        :rtype: wl.models.realtime.Departure
-        """
-        res = Departure()
-        #   Filter                |   Val   | req |   Discr
-        # ....departureTime       | element |  y  | Wrapper für die Abfahrtszeiten
-        # .....timePlanned        | datetime|  y  | Abfahrtszeit laut Fahrplan
-        # .....timeReal           | datetime|  n  | Prognostizierte Abfahrtszeit (Echtzeit)
-        # .....countdown          | int     |  y  | Verbleibende Minuten bis zur Abfahrt
-        # ....vehicle             | element |  n  | Informationen über das Fahrzeug (nur wenn abweichend von der Linie)
-        # .....name               | str     |  y  | Linienname (e.g.: 13A)
-        # .....direction          | str     |  y  | Fahrtrichtung ('H' - hin oder 'R' - retour)
-        # .....richtungsId        | str     |  y  | Eindeutige ID der Richtung
-        # .....barrierFree        | boolean |  y  | Service Merkmal für das Fahrzeug gibt an, ob das Fahrzeug für mobilitätseingeschränkte Fahrgäste geeignet ist. (true - barrierefreies oder false - kein barrierefreiese Fahrzeug)
-        # .....realtimeSupported  | boolean |  y  | Gibt an, ob für die Linie grundsätzlich Echtzeitdaten verfügbar sind (kann die Werte true oder false enthalten)
-        # .....trafficjam         | boolean |  y  | Gibt an, ob Stau in der Zufahrt ist. (true - Stau, false - kein Stau)
-        # .....type               | str     |  y  | Fahrzeugtyp (ptTram, ..)
-        self._is_present(departure, 'departureTime', True)
-        res.planned = self._parse_datetime(self._get_field(
-            departure['departureTime'], 'timePlanned', True
-        ))
-        res.real = self._parse_datetime(self._get_field(
-            departure['departureTime'], 'timeReal'
-        ))
-        res.countdown = self._get_field(
-            departure['departureTime'], 'countdown', True
-        )
-        vehicle = departure.get('vehicle')
-        if vehicle:
-            res.vehicle = {
-                'name': self._get_field(vehicle, 'name', True),
-                'direction': self._get_field(vehicle, 'direction', True),
-                'direction_id': self._get_field(vehicle, 'richtungsId', True),
-                'barrier_free': self._get_field(vehicle, 'barrierFree', True),
-                'realtime_supported': self._get_field(vehicle, 'realtimeSupported', True),
-                'traffic_jam': self._get_field(vehicle, 'trafficjam', True),
-                'type': self._get_field(vehicle, 'type', True)
-            }
-        return res
-
-    def _parse_line(self, line):
-        """
-
-        :param line:
-        :type line: dict
-        :return:
-        :rtype: wl.models.realtime.Line
-        """
-        res = Line()
-        # ..name                  | str     |  y  | Name der Linie (e.g.: 13A)
-        # ..towards               | str     |  y  | Name des Ziels (e.g.: Burggasse, Stadthalle U)
-        # ..direction             | str     |  y  | Richtung ('H' - hin oder 'R' - retour)
-        # ..richtungsId           | str     |  y  | Eindeutige ID der Richtung
-        # ..barrierFree           | boolean |  n  | Service Merkmal für das Fahrzeug; gibt an, ob das Fahrzeug für mobilitätseingeschränkte Fahrgäste geeignet is. (true - barrierefreies oder false - kein barrierefreies Fahrzeug)
-        # ..realtimeSupported     | boolean |  n  | Gibt an, ob für die Linie grundsätzlich Echtzeitdaten verfügbar sind (kann die Werte true oder false enthalten)
-        # ..trafficjam            | boolean |  n  | Gibt an, ob Stau in der Zufahrt ist. (true - Stau, false - kein Stau)
-        # ..type                  | str     |  y  | Fahrzeugtyp (ptTram, ..)
-        # ..lineId                | int     |  n  | Eindeutige Linien ID
-        # ..depatures             | element |  y  | Wrapper für die Abfahrten
-        # ...departure            |[element]|  n  | Liste der Abfahrten (enthält 1-n Elemente).
-        res.name = self._get_field(line, 'name', True)
-        res.towards = self._get_field(line, 'towards', True)
-        res.direction = self._get_field(line, 'direction', True)
-        res.direction_id = self._get_field(line, 'richtungsId', True)
-        res.barrier_free = self._get_field(line, 'barrierFree')
-        res.realtime_supported = self._get_field(line, 'realtimeSupported')
-        res.traffic_jam = self._get_field(line, 'trafficjam')
-        res.type = self._get_field(line, 'type', True)
-        res.id = self._get_field(line, 'lineId')
-        self._is_present(line, 'departures', True)
-        deps = line['departures'].get('departure')
-
-        if deps:
-            res.departures = []
-            for dep in deps:
-                res.departures.append(self._parse_departure(dep))
-        else:
-            # None or empty list
-            res.departures = deps
-
-        return res
-
-    def _parse_lines(self, lines):
-        """
-
-        :param line:
-        :type line: None | list[dict]
-        :return:
-        :rtype: None | list[wl.models.realtime.Line]
-        """
-        if not lines:
-            return lines
-        res = []
-
-        for line in lines:
-            res.append(self._parse_line(line))
-
-        return res
-
-    def _parse_monitor(self, monitor):
-        """
-
-        :param monitor:
-        :type monitor: dict
-        :return:
-        :rtype: wl.models.realtime.Model
-        """
-        res = Monitor()
-
-        res.stop = self._parse_stop(
-            self._get_field(monitor, 'locationStop', True)
-        )
-
-        #   Filter                |   Val   | req |   Discr
-        # .lines                  |[element]|  n  | Liste der Linien (enthält 1-n Elemente)
-        res.lines = self._parse_lines(self._get_field(monitor, 'lines'))
-        return res
-
     def _parse_monitors(self, monitors):
         """
 
@@ -281,18 +173,20 @@ class WLRealtime(Loadable):
         :type monitors: None | list[dict]
         :return:
         :rtype: None | list[wl.models.realtime.Model]
+            | wl.schema.LazyList[wl.models.realtime.Model]
         """
         if not monitors:
             return monitors
-        res = []
-        for mon in monitors:
-            res.append(self._parse_monitor(mon))
-        return res
+        parse = self._parse_monitor
+        if self.lazy:
+            return LazyList(monitors, parse)
+        return [parse(mon) for mon in monitors]
 
     def _parse_response(self, data):
         res = RTResponse()
-        json = load_json(data)
-        res.raw = json
+        json = self._json_loads(data)
+        if self.keep_raw:
+            res.raw = json
         if not json:
             raise Exception("Empty response")
         if not isinstance(json, dict):
@@ -319,17 +213,15 @@ class WLRealtime(Loadable):
         res.monitors = self._parse_monitors(data.get('monitors'))
         return res
 
-    def _make_req(self, url_part, req):
+    def _request_params(self, req):
         """
+        Request parameters including api key
 
-        :param url_part: What service of realtime api to use
-        :type url_part: str | unicode
         :param req:
         :type req: wl.models.Request
-        :return: Parsed response
-        :rtype: wl.models.RTResponse
+        :return: Parameters to send
+        :rtype: dict | list[(str | unicode, T)]
         """
-        url = urljoin(self.base_url, url_part)
         params = req.params
         if isinstance(params, dict):
             params = dict(params)
@@ -340,20 +232,28 @@ class WLRealtime(Loadable):
                 params.append(('sender', self.api_key))
         else:
             self.warning("Unknown parameters - cannot add api key")
-        try:
-            resp = self.session.get(url, params=params)
-        except:
-            self.exception(
-                "Failed to load on {}:\n{}".format(url, params)
-            )
-            raise RequestException("Request failed")
-        if not resp.html:
+        return params
+
+    def _handle_response(self, url, params, html):
+        """
+        Parse loaded response
+
+        :param url: Requested url
+        :type url: str | unicode
+        :param params: Sent parameters
+        :type params: dict | list[(str | unicode, T)]
+        :param html: Decoded response body
+        :type html: None | str | unicode
+        :return: Parsed response
+        :rtype: wl.models.RTResponse
+        """
+        if not html:
             self.error(
                 "No data {}:\n{}".format(url, params)
             )
             raise RequestException("Empty response")
         try:
-            res = self._parse_response(resp.html)
+            res = self._parse_response(html)
         except:
             self.exception(
                 "Failed to parse {}:\n{}".format(url, params)
@@ -361,6 +261,108 @@ class WLRealtime(Loadable):
             raise RequestException("Parse failed")
         return res
 
+    def _cache_key(self, url_part, params):
+        """
+        Cache key of request
+
+        :param url_part: What service of realtime api to use
+        :type url_part: str | unicode
+        :param params: Parameters to send
+        :type params: dict | list[(str | unicode, T)]
+        :return: Key
+        :rtype: tuple
+        """
+        return url_part, normalize_params(params)
+
+    def _cache_put(self, key, res, html):
+        """
+        Cache successful response
+
+        Responses are shared between callers and must not be modified
+
+        :param key: Cache key
+        :type key: tuple
+        :param res: Parsed response
+        :type res: wl.models.RTResponse
+        :param html: Response body (used as size)
+        :type html: str | unicode
+        :rtype: None
+        """
+        if self.cache is None or res.message_code != RTResponse.CODE_OK:
+            return
+        self.cache.put(
+            key, res, len(html), self.cache.ttl_for(res.server_time)
+        )
+
+    def cache_stats(self):
+        """
+        Request coalescing and response cache statistics
+
+        :return: Number of coalesced requests and, if the cache is
+            enabled, its statistics (see wl.cache.TTLCache.stats)
+        :rtype: dict[unicode, int | float]
+        """
+        res = {}
+        if self.cache is not None:
+            res = self.cache.stats()
+        res['coalesced'] = self._flight.coalesced
+        return res
+
+    def _make_req(self, url_part, req, fresh=False):
+        """
+
+        :param url_part: What service of realtime api to use
+        :type url_part: str | unicode
+        :param req:
+        :type req: wl.models.Request
+        :param fresh: Do not answer from the response cache (default: False)
+        :type fresh: bool
+        :return: Parsed response
+        :rtype: wl.models.RTResponse
+        """
+        url = urljoin(self.base_url, url_part)
+        params = self._request_params(req)
+        key = self._cache_key(url_part, params)
+        if self.cache is not None and not fresh:
+            res = self.cache.get(key)
+            if res is not None:
+                return res
+
+        def load():
+            return self._flight.do(
+                key, lambda: self._load(url, params, key)
+            )
+
+        if self.resilience is not None:
+            return self.resilience.call(url_part, key, load)
+        return load()
+
+    def _load(self, url, params, key):
+        """
+        Load, parse and cache response
+
+        :param url: Url to load
+        :type url: str | unicode
+        :param params: Parameters to send
+        :type params: dict | list[(str | unicode, T)]
+        :param key: Cache key
+        :type key: tuple
+        :return: Parsed response
+        :rtype: wl.models.RTResponse
+        """
+        if self.rate_limit is not None:
+            self.rate_limit.acquire()
+        try:
+            resp = self.session.get(url, params=params)
+        except:
+            self.exception(
+                "Failed to load on {}:\n{}".format(url, params)
+            )
+            raise RequestException("Request failed")
+        res = self._handle_response(url, params, resp.html)
+        self._cache_put(key, res, resp.html)
+        return res
+
     def _parse_traffic(self, data):
         """
 
@@ -564,27 +566,38 @@ class WLRealtime(Loadable):
                 if self._is_present(info['attributes'], 'rbls'):
                     pass
 
-    def monitor(self, rbls, traffic_info=None):
+    def _monitor_request(self, rbls, traffic_info=None):
         """
-        Get departure monitor for stop
+        Build monitor request
 
         :param rbls: One or more rbls
         :type rbls: str | unicode | list[str | unicode]
         :param traffic_info: One or more of
             'stoerunglang', 'stoerungkurz', 'aufzugsinfo'
         :type traffic_info: str | unicode | list[str | unicode]
-        :return: Monitor information
-        :rtype:
+        :return: Request
+        :rtype: wl.models.Request
         """
         if not isinstance(rbls, list):
             rbls = [rbls]
         req = Request()
         req.params = [("rbl", rbl) for rbl in rbls]
         if traffic_info:
-            if not isinstance(traffic_info):
+            if not isinstance(traffic_info, list):
                 traffic_info = [traffic_info]
             req.params.extend([("activateTrafficInfo", t) for t in traffic_info])
-        resp = self._make_req("monitor", req)
+        return req
+
+    def _check_monitor_response(self, resp):
+        """
+        Verify monitor response
+
+        :param resp: Response to check
+        :type resp: wl.models.realtime.RTResponse
+        :return: Checked response
+        :rtype: wl.models.realtime.RTResponse
+        :raises RequestException: Error response
+        """
         if resp.message_code != RTResponse.CODE_OK:
             raise RequestException("Error response {} ({})".format(
                 resp.message_code, resp.message_value)
@@ -593,3 +606,126 @@ class WLRealtime(Loadable):
         if resp.monitors is None:
             raise RequestException("No monitors parsed")
         return resp
+
+    def monitor(self, rbls, traffic_info=None, fresh=False):
+        """
+        Get departure monitor for stop
+
+        :param rbls: One or more rbls
+        :type rbls: str | unicode | list[str | unicode]
+        :param traffic_info: One or more of
+            'stoerunglang', 'stoerungkurz', 'aufzugsinfo'
+        :type traffic_info: str | unicode | list[str | unicode]
+        :param fresh: Do not answer from the response cache - the loaded
+            response is still cached (default: False)
+        :type fresh: bool
+        :return: Monitor information
+        :rtype: wl.models.realtime.RTResponse
+        """
+        req = self._monitor_request(rbls, traffic_info)
+        resp = self._make_req("monitor", req, fresh)
+        return self._check_monitor_response(resp)
+
+    def _chunk_rbls(self, rbls, chunk_size=None):
+        """
+        Split rbls into evenly sized chunks of at most chunk_size
+
+        :param rbls: Rbls (duplicates are removed)
+        :type rbls: list[str | unicode | int]
+        :param chunk_size: Maximum rbls per chunk (default: None)
+            None -> self.batch_size
+        :type chunk_size: None | int
+        :return: Chunks
+        :rtype: list[list[str | unicode | int]]
+        """
+        if chunk_size is None:
+            chunk_size = self.batch_size
+        unique = []
+        seen = set()
+
+        for rbl in rbls:
+            key = "{}".format(rbl)
+            if key not in seen:
+                seen.add(key)
+                unique.append(rbl)
+        if not unique:
+            return []
+        count = (len(unique) + chunk_size - 1) // chunk_size
+        size, rest = divmod(len(unique), count)
+        chunks = []
+        start = 0
+
+        for i in range(count):
+            end = start + size + (1 if i < rest else 0)
+            chunks.append(unique[start:end])
+            start = end
+        return chunks
+
+    def monitor_batch(
+            self, rbls, traffic_info=None, chunk_size=None, workers=None
+    ):
+        """
+        Get departure monitors for many rbls
+
+        The rbls are split into chunks that are requested concurrently and
+        merged into one response. Failed chunks are reported in
+        failures instead of failing the whole batch
+
+        :param rbls: Rbls
+        :type rbls: list[str | unicode | int]
+        :param traffic_info: One or more of
+            'stoerunglang', 'stoerungkurz', 'aufzugsinfo'
+        :type traffic_info: str | unicode | list[str | unicode]
+        :param chunk_size: Maximum rbls per request (default: None)
+            None -> self.batch_size
+        :type chunk_size: None | int
+        :param workers: Maximum concurrent requests (default: None)
+            None -> self.batch_workers
+        :type workers: None | int
+        :return: Merged monitor information (raw is not set)
+        :rtype: wl.models.realtime.RTBatchResponse
+        :raises RequestException: All chunks failed
+        """
+        if workers is None:
+            workers = self.batch_workers
+        chunks = self._chunk_rbls(rbls, chunk_size)
+        results = run_parallel(
+            lambda chunk: self.monitor(chunk, traffic_info), chunks, workers
+        )
+        return self._merge_batch(results)
+
+    def _merge_batch(self, results):
+        """
+        Merge chunk results into one response
+
+        :param results: (chunk, response, exception) per chunk
+        :type results: list[(list, None | wl.models.realtime.RTResponse,
+            None | Exception)]
+        :return: Merged monitor information (raw is not set) - stale if
+            any chunk was stale
+        :rtype: wl.models.realtime.RTBatchResponse
+        :raises RequestException: All chunks failed
+        """
+        res = RTBatchResponse()
+        res.monitors = []
+        res.failures = []
+
+        for chunk, resp, error in results:
+            if error is not None:
+                self.warning("Chunk {} failed: {}".format(chunk, error))
+                res.failures.append(RTChunkFailure(chunk, error))
+                continue
+            res.message_code = resp.message_code
+            res.message_value = resp.message_value
+            if resp.server_time:
+                res.server_time = max(
+                    res.server_time or resp.server_time, resp.server_time
+                )
+            res.monitors.extend(resp.monitors)
+            if resp.stale:
+                res.stale = True
+        if results and len(res.failures) == len(results):
+            raise RequestException(
+                "All {} chunks failed".format(len(results))
+            )
+        return res
@@ -0,0 +1,396 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-19 01:05
+
+import copy
+import threading
+
+from .cache import monotonic, TTLCache, _Call
+from .utils import WorkerPool
+from .errors import RequestException, RateLimitException, \
+    CircuitOpenException
+
+
+class CircuitBreaker(object):
+    """
+    Thread safe circuit breaker of one endpoint
+
+    Opens after failure_threshold consecutive failures. After
+    reset_timeout up to half_open_probes requests are let through -
+    success_threshold successes close it again, a failure reopens it
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+            self, failure_threshold=5, reset_timeout=30.0,
+            half_open_probes=1, success_threshold=1
+    ):
+        """
+        Initialize object
+
+        :param failure_threshold: Consecutive failures to open (default: 5)
+        :type failure_threshold: int
+        :param reset_timeout: Seconds open before probing (default: 30.0)
+        :type reset_timeout: float
+        :param half_open_probes: Concurrent probes when half open
+            (default: 1)
+        :type half_open_probes: int
+        :param success_threshold: Successful probes to close (default: 1)
+        :type success_threshold: int
+        :rtype: None
+        """
+        super(CircuitBreaker, self).__init__()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = float(reset_timeout)
+        self.half_open_probes = half_open_probes
+        self.success_threshold = success_threshold
+        self._state = self.CLOSED
+        self._failures = 0
+        self._successes = 0
+        self._probes = 0
+        """ Probes in flight """
+        self._opened = 0.0
+        self._lock = threading.Lock()
+        self.opened = 0
+        """ Times opened """
+        self.rejected = 0
+        """ Requests not let through """
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and \
+                    monotonic() - self._opened >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def healthy(self):
+        """
+        Closed and the last request did not fail
+
+        :rtype: bool
+        """
+        with self._lock:
+            return self._state == self.CLOSED and self._failures == 0
+
+    def allow(self):
+        """
+        Request may be made - must be followed by success(), failure()
+        or release()
+
+        :rtype: bool
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                if monotonic() - self._opened < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self._state = self.HALF_OPEN
+                self._successes = 0
+                self._probes = 0
+            if self._state == self.HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self.rejected += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state == self.HALF_OPEN:
+                self._probes -= 1
+                self._successes += 1
+                if self._successes >= self.success_threshold:
+                    self._state = self.CLOSED
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or \
+                    self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.opened += 1
+                self._state = self.OPEN
+                self._opened = monotonic()
+                self._probes = 0
+
+    def release(self):
+        """
+        Request ended without telling anything about the endpoint
+
+        :rtype: None
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes -= 1
+
+
+def mark_stale(res):
+    """
+    Copy of response flagged as stale
+
+    :param res: Response
+    :type res: wl.models.realtime.RTResponse | wl.models.routing.ItdResponse
+    :rtype: wl.models.realtime.RTResponse | wl.models.routing.ItdResponse
+    """
+    res = copy.copy(res)
+    res.stale = True
+    return res
+
+
+class Resilience(object):
+    """
+    Circuit breaker per endpoint with stale-while-revalidate
+
+    While an endpoint is healthy (circuit closed, no failure and no slow
+    request within slow_window) requests are made inline. Otherwise,
+    once a request has succeeded, later calls wait at most stale_timeout
+    for a fresh response - after that the last good response is returned
+    marked stale while a single refresh keeps running in the background
+    (on a small pool of refresh_workers threads).
+    While the circuit of the endpoint is open the last good response is
+    returned at once (or CircuitOpenException raised without one)
+    """
+
+    def __init__(self, settings=None):
+        """
+        Initialize object
+
+        :param settings: Settings for instance (default: None)
+            failure_threshold, reset_timeout, half_open_probes,
+            success_threshold: See CircuitBreaker
+            stale_timeout: Seconds to wait for a fresh response when a
+                stale one is available (default: 2.0)
+            slow_window: Seconds to keep revalidating in the background
+                after a request took longer than stale_timeout
+                (default: 60.0)
+            refresh_workers: Maximum background refreshes at once
+                (default: 4)
+            stale_ttl: Seconds to keep last good responses (default: 3600)
+            stale_entries: Maximum last good responses (default: 1024)
+        :type settings: dict | None
+        :rtype: None
+        """
+        if settings is None:
+            settings = {}
+        super(Resilience, self).__init__()
+        self.breaker_settings = {
+            key: settings[key] for key in (
+                'failure_threshold', 'reset_timeout', 'half_open_probes',
+                'success_threshold'
+            ) if key in settings
+        }
+        self.stale_timeout = settings.get('stale_timeout', 2.0)
+        self.slow_window = settings.get('slow_window', 60.0)
+        self.stale = TTLCache(
+            ttl=settings.get('stale_ttl', 3600.0),
+            max_entries=settings.get('stale_entries', 1024),
+            max_bytes=float("inf")
+        )
+        """ Last good response by request """
+        self._breakers = {}
+        """ :type : dict[unicode, wl.resilience.CircuitBreaker] """
+        self._refreshing = {}
+        """ :type : dict[T, wl.cache._Call] """
+        self._tasks = {}
+        """ Running refreshes of async clients
+            :type : dict[T, asyncio.Future] """
+        self._slow = {}
+        """ Time of last slow request by endpoint
+            :type : dict[unicode, float] """
+        self._pool = WorkerPool(settings.get('refresh_workers', 4))
+        """ Threads of background refreshes """
+        self._lock = threading.Lock()
+        self.served_stale = 0
+
+    def breaker(self, endpoint):
+        """
+        Circuit breaker of endpoint
+
+        :param endpoint: Endpoint (e.g. monitor)
+        :type endpoint: str | unicode
+        :rtype: wl.resilience.CircuitBreaker
+        """
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(**self.breaker_settings)
+                self._breakers[endpoint] = breaker
+            return breaker
+
+    def _timed(self, endpoint, start):
+        """
+        Record request of endpoint started at start as slow if it took
+        longer than stale_timeout
+
+        :rtype: None
+        """
+        now = monotonic()
+        if now - start > self.stale_timeout:
+            with self._lock:
+                self._slow[endpoint] = now
+
+    def degraded(self, endpoint, breaker=None):
+        """
+        Whether calls of endpoint revalidate in the background
+
+        :param endpoint: Endpoint (e.g. monitor)
+        :type endpoint: str | unicode
+        :param breaker: Its circuit breaker (default: None)
+        :type breaker: None | wl.resilience.CircuitBreaker
+        :return: Circuit not closed, last request failed or a request
+            was slow within slow_window
+        :rtype: bool
+        """
+        if breaker is None:
+            breaker = self.breaker(endpoint)
+        if not breaker.healthy:
+            return True
+        with self._lock:
+            slow = self._slow.get(endpoint)
+        return slow is not None and monotonic() - slow < self.slow_window
+
+    def _run(self, endpoint, breaker, key, func):
+        """
+        Call func and record outcome (breaker already allowed it)
+        """
+        start = monotonic()
+        try:
+            res = func()
+        except RateLimitException:
+            breaker.release()
+            raise
+        except RequestException:
+            breaker.failure()
+            raise
+        except Exception:
+            breaker.release()
+            raise
+        finally:
+            self._timed(endpoint, start)
+        breaker.success()
+        self.stale.put(key, res)
+        return res
+
+    def _serve_stale(self, stale):
+        self.served_stale += 1
+        return mark_stale(stale)
+
+    def call(self, endpoint, key, func):
+        """
+        Call func guarded by circuit breaker and stale-while-revalidate
+
+        :param endpoint: Endpoint (e.g. monitor)
+        :type endpoint: str | unicode
+        :param key: Key of request
+        :type key: T
+        :param func: Function making the request
+        :type func: () -> R
+        :return: Fresh or stale (stale=True) response
+        :rtype: R
+        :raises RequestException: Failed without stale response
+        """
+        breaker = self.breaker(endpoint)
+        stale = self.stale.get(key)
+        with self._lock:
+            call = self._refreshing.get(key)
+        if call is None:
+            if not breaker.allow():
+                if stale is not None:
+                    return self._serve_stale(stale)
+                raise CircuitOpenException(
+                    "Circuit of {} open".format(endpoint)
+                )
+            if stale is None:
+                return self._run(endpoint, breaker, key, func)
+            if not self.degraded(endpoint, breaker):
+                try:
+                    return self._run(endpoint, breaker, key, func)
+                except RequestException:
+                    return self._serve_stale(stale)
+            call = self._refresh(endpoint, breaker, key, func)
+        elif stale is None:
+            call.event.wait()
+        if call.event.wait(self.stale_timeout) and call.error is None:
+            return call.result
+        if stale is None:
+            raise call.error
+        return self._serve_stale(stale)
+
+    def _refresh(self, endpoint, breaker, key, func):
+        """
+        Start background refresh of key
+
+        :rtype: wl.cache._Call
+        """
+        with self._lock:
+            call = self._refreshing.get(key)
+            if call is not None:
+                # Someone else started one
+                breaker.release()
+                return call
+            call = self._refreshing[key] = _Call()
+
+        def work():
+            try:
+                call.result = self._run(endpoint, breaker, key, func)
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._refreshing[key]
+                call.event.set()
+
+        self._pool.submit(work)
+        return call
+
+    def stats(self):
+        """
+        Breaker states and counters by endpoint
+
+        :rtype: dict[unicode, T]
+        """
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {
+            'served_stale': self.served_stale,
+            'endpoints': {
+                endpoint: {
+                    'state': breaker.state,
+                    'opened': breaker.opened,
+                    'rejected': breaker.rejected,
+                }
+                for endpoint, breaker in breakers.items()
+            },
+        }
+
+
+def resilience_from_settings(settings):
+    """
+    Resilience layer of api client
+
+    :param settings: Client settings - 'resilience' (Resilience instance
+        or its settings)
+    :type settings: dict
+    :return: Resilience layer or None if disabled
+    :rtype: None | wl.resilience.Resilience
+    """
+    res = settings.get('resilience')
+    if isinstance(res, dict):
+        return Resilience(res)
+    return res
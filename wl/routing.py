@@ -12,22 +12,63 @@ __version__ = "0.1.0"
 __date__ = "2017-11-03"
 # Created: 2017-11-02 00:10
 
+import io
 import datetime
 
 try:
     from lxml import etree
+    HAS_LXML = True
 except ImportError:
     import xml.etree.ElementTree as etree
+    HAS_LXML = False
 
 from flotils import Loadable
-from floscraper import WebScraper
 from requests.compat import urljoin
-from dateutil.parser import parse as dt_parse
 
 from .models.routing import ItdRequest, ItdResponse, ItdDMResponse,\
     Line, Departure, Stop
 from .errors import RequestException
-from .utils import local_to_utc, utc_to_local
+from .utils import local_to_utc, utc_to_local, parse_iso_datetime
+from .transport import transport_from_settings
+from .limiter import limiter_from_settings
+from .resilience import resilience_from_settings
+from .cache import normalize_params
+
+
+_LINE_ATTRS = (
+    "index", "key", "code", "number", "symbol", "direction", "realtime",
+    "selected"
+)
+""" Line model attributes read from itdServingLine attributes """
+_DEPARTURE_ATTRS = (
+    ("stop_id", "stopID"), ("stop_name", "stopName"),
+    ("platform", "platform"), ("platform_name", "platformName"),
+    ("countdown", "countdown")
+)
+""" (model attribute, xml attribute) of itdDeparture """
+_STOP_ATTRS = (
+    ("stop_id", "stopID"), ("value", "value"), ("distance", "distance"),
+    ("distance_time", "distanceTime")
+)
+""" (model attribute, xml attribute) of itdOdvAssignedStop """
+
+if HAS_LXML:
+    _XP_DEPARTURE_PARTS = etree.XPath(
+        "itdServingLine | itdDateTime/itdDate | itdDateTime/itdTime"
+    )
+    """ Serving line, date and time of itdDeparture """
+
+    def _departure_parts(root):
+        return _XP_DEPARTURE_PARTS(root)
+else:
+    def _departure_parts(root):
+        res = []
+        for ele in root:
+            if ele.tag == "itdServingLine":
+                res.append(ele)
+            elif ele.tag == "itdDateTime":
+                res.extend(ele)
+        return res
 
 
 class WLRouting(Loadable):
@@ -38,12 +79,31 @@ class WLRouting(Loadable):
             settings = {}
         super(WLRouting, self).__init__(settings)
         self.base_url = "https://www.wienerlinien.at/ogd_routing/"
-        self.session = WebScraper(settings.get('web', {}))
+        self.session = self._create_transport(settings)
+        """ Http session (None for async clients)
+            :type : None | wl.transport.Transport | floscraper.WebScraper """
+        self.rate_limit = limiter_from_settings(settings)
+        """ Shared request budget (setting 'rate_limit')
+            :type : None | wl.limiter.RateLimiter """
+        self.resilience = resilience_from_settings(settings)
+        """ Circuit breaker and stale responses of departure monitor
+            requests (setting 'resilience')
+            :type : None | wl.resilience.Resilience """
+
+    def _create_transport(self, settings):
+        """
+        Create http session (see wl.transport.transport_from_settings)
+
+        :param settings: Client settings
+        :type settings: dict
+        :rtype: None | wl.transport.Transport | floscraper.WebScraper
+        """
+        return transport_from_settings(settings)
 
     def _parse_datetime_st(self, st):
         if not st:
             return st
-        return local_to_utc(dt_parse(st))
+        return parse_iso_datetime(st, local=True)
 
     def _parse_response(self, data):
         """
@@ -63,9 +123,22 @@ class WLRouting(Loadable):
         if root is None or root.tag != "itdRequest":
             raise ValueError("Wrong root tag")
         res = ItdResponse()
-        attr = {}
-        if root.attrib:
-            attr = root.attrib
+        self._parse_root_attrib(root.attrib, res)
+        res.children = list(root)
+        return res
+
+    def _parse_root_attrib(self, attr, res):
+        """
+        Set response information from itdRequest attributes
+
+        :param attr: Attributes of root element
+        :type attr: None | dict[str | unicode, str | unicode]
+        :param res: Response to update
+        :type res: wl.models.routing.ItdResponse
+        :rtype: None
+        """
+        if not attr:
+            return
         if 'serverID' in attr:
             res.server_id = attr['serverID']
         if 'version' in attr:
@@ -86,7 +159,35 @@ class WLRouting(Loadable):
             res.now = self._parse_datetime_st(attr['now'])
         if 'nowWD' in attr:
             res.now_wd = attr['nowWD']
-        res.children = list(root)
+
+    def _handle_response(self, url, params, html, raw):
+        """
+        Parse loaded response
+
+        :param url: Requested url
+        :type url: str | unicode
+        :param params: Sent parameters
+        :type params: dict | list[(str | unicode, T)]
+        :param html: Decoded response body
+        :type html: None | str | unicode
+        :param raw: Undecoded response body
+        :type raw: None | str | bytes
+        :return: Response root element
+        :rtype: wl.models.routing.ItdResponse
+        """
+        try:
+            if html and html.startswith("<!DOCTYPE HTML"):
+                raise RequestException("API send plain html")
+            data = raw
+            if not data:
+                self.warning("Defaulting to decoded response")
+                data = html
+            res = self._parse_response(data)
+        except:
+            self.exception(
+                "Failed to parse {}:\n{}".format(url, params)
+            )
+            raise RequestException("Parse failed")
         return res
 
     def _make_req(self, url_part, req):
@@ -100,27 +201,17 @@ class WLRouting(Loadable):
         :rtype: wl.models.routing.ItdResponse
         """
         url = urljoin(self.base_url, url_part)
+        params = req.to_get_params()
+        if self.rate_limit is not None:
+            self.rate_limit.acquire()
         try:
-            resp = self.session.get(url, params=req.to_get_params())
+            resp = self.session.get(url, params=params)
         except:
             self.exception(
-                "Failed to load on {}:\n{}".format(url, req.to_get_params())
+                "Failed to load on {}:\n{}".format(url, params)
             )
             raise RequestException("Request failed")
-        try:
-            if resp.html and resp.html.startswith("<!DOCTYPE HTML"):
-                raise RequestException("API send plain html")
-            data = resp.raw
-            if not data:
-                self.warning("Defaulting to decoded response")
-                data = resp.html
-            res = self._parse_response(data)
-        except:
-            self.exception(
-                "Failed to parse {}:\n{}".format(url, req.to_get_params())
-            )
-            raise RequestException("Parse failed")
-        return res
+        return self._handle_response(url, params, resp.html, resp.raw)
 
     def _parse_line(self, root):
         """
@@ -132,16 +223,40 @@ class WLRouting(Loadable):
         """
         if root.tag != "itdServingLine":
             raise ValueError("Expected line - {}".format(root.tag))
-        #self.debug("\n" + etree.tostring(root, pretty_print=True))
-        line_dict = root.attrib
+        attrib = root.attrib
+        res = Line()
+        values = res.__dict__
+        for attr in _LINE_ATTRS:
+            values[attr] = attrib.get(attr)
         for ele in root:
             if ele.tag == "motDivaParams":
-                line_dict['network'] = ele.attrib.get('network')
-                line_dict['line'] = ele.attrib.get('line')
+                res.network = ele.get('network')
+                res.line = ele.get('line')
             elif ele.tag == "itdRouteDescText":
-                line_dict['description'] = ele.text
-        #self.debug(line_dict)
-        return Line.from_dict(line_dict)
+                res.description = ele.text
+        return res
+
+    def _intern_line(self, root, lines):
+        """
+        Parse line - reusing the object of an identical line
+
+        Lines are identified by their itdServingLine attributes, the
+        returned objects are shared and must not be modified
+
+        :param root:
+        :type root: xml.etree.ElementTree.Element
+        :param lines: Known lines
+        :type lines: dict[tuple, wl.models.routing.Line]
+        :return:
+        :rtype: wl.models.routing.Line
+        """
+        get = root.get
+        key = tuple([get(attr) for attr in _LINE_ATTRS])
+        res = lines.get(key)
+        if res is None:
+            res = self._parse_line(root)
+            lines[key] = res
+        return res
 
     def _parse_lines(self, root):
         """
@@ -171,58 +286,72 @@ class WLRouting(Loadable):
             raise ValueError("Expected datetime - {}".format(root.tag))
         d = root.find("itdDate")
         t = root.find("itdTime")
-        dt_dict = {}
         if d is None:
             raise ValueError("Expected date")
         if t is None:
             raise ValueError("Expected time")
-        dt_dict.update(d.attrib)
-        dt_dict.update(t.attrib)
-        del dt_dict['weekday']
-        dt_dict = {key: int(value) for key, value in dt_dict.items() if value}
-        return local_to_utc(datetime.datetime(**dt_dict))
+        return self._datetime_itd(d, t)
 
-    def _parse_departure(self, root):
+    def _datetime_itd(self, d, t, times=None):
         """
-
-        :param root:
-        :type root: xml.etree.ElementTree.Element
-        :return:
-        :rtype: wl.models.routing.Depature
+        Datetime of itdDate and itdTime
+
+        :param d: itdDate element
+        :type d: xml.etree.ElementTree.Element
+        :param t: itdTime element
+        :type t: xml.etree.ElementTree.Element
+        :param times: Known datetimes (default: None)
+        :type times: None | dict[tuple, datetime.datetime]
+        :return: Naive utc datetime
+        :rtype: datetime.datetime
         """
-        if root.tag != "itdDeparture":
-            raise ValueError("Expected departure - {}".format(root.tag))
-        d = root.attrib
-        d.update({
-            'stop_id': d['stopID'],
-            'stop_name': d['stopName'],
-            'platform_name': d['platformName']
-        })
-        res = Departure.from_dict(d)
-        for ele in root:
-            if ele.tag == "itdServingLine":
-                res.line = self._parse_line(ele)
-            elif ele.tag == "itdDateTime":
-                res.datetime = self._parse_datetime_itd(ele)
-            else:
-                self.debug("{}".format(ele.tag))
-
+        key = (
+            d.get('year'), d.get('month'), d.get('day'),
+            t.get('hour'), t.get('minute'), t.get('second')
+        )
+        if times is not None:
+            res = times.get(key)
+            if res is not None:
+                return res
+        res = local_to_utc(datetime.datetime(
+            *[int(value or 0) for value in key]
+        ))
+        if times is not None:
+            times[key] = res
         return res
 
-    def _parse_departures(self, root):
+    def _parse_departure(self, root, lines=None, times=None):
         """
 
         :param root:
         :type root: xml.etree.ElementTree.Element
+        :param lines: Known lines to reuse (default: None)
+        :type lines: None | dict[tuple, wl.models.routing.Line]
+        :param times: Known datetimes to reuse (default: None)
+        :type times: None | dict[tuple, datetime.datetime]
         :return:
-        :rtype: list[wl.models.routing.Depature]
+        :rtype: wl.models.routing.Depature
         """
-        if root.tag != "itdDepartureList":
-            raise ValueError("Expected departures - {}".format(root.tag))
-        deps = []
-        for ele in root:
-            deps.append(self._parse_departure(ele))
-        return deps
+        if root.tag != "itdDeparture":
+            raise ValueError("Expected departure - {}".format(root.tag))
+        get = root.get
+        res = Departure()
+        values = res.__dict__
+        for attr, name in _DEPARTURE_ATTRS:
+            values[attr] = get(name)
+        date = None
+        for ele in _departure_parts(root):
+            tag = ele.tag
+            if tag == "itdServingLine":
+                if lines is None:
+                    res.line = self._parse_line(ele)
+                else:
+                    res.line = self._intern_line(ele, lines)
+            elif tag == "itdDate":
+                date = ele
+            elif tag == "itdTime" and date is not None:
+                res.datetime = self._datetime_itd(date, ele, times)
+        return res
 
     def _parse_stop(self, root):
         """
@@ -234,12 +363,11 @@ class WLRouting(Loadable):
         """
         if root.tag != "itdOdvAssignedStop":
             raise ValueError("Expected stop - {}".format(root.tag))
-        d = root.attrib
-        d.update({
-            'stop_id': d['stopID'],
-            'distance_time': d['distanceTime']
-        })
-        res = Stop.from_dict(d)
+        get = root.get
+        res = Stop()
+        values = res.__dict__
+        for attr, name in _STOP_ATTRS:
+            values[attr] = get(name)
         res.name = root.text
         return res
 
@@ -296,34 +424,159 @@ class WLRouting(Loadable):
             res.stops = self._parse_odv_name(xml_names)
         return res
 
-    def _parse_response_dm(self, resp):
+    def _iter_dm(self, source):
+        """
+        Parse departure monitor response incrementally
+
+        Elements are turned into models as soon as they are closed and
+        cleared right away, so the document is never fully in memory
+
+        :param source: Xml document
+        :type source: file
+        :return: Events - ('response', wl.models.routing.ItdDMResponse)
+            first (without content), then ('stops', list), ('lines', list),
+            ('datetime', datetime.datetime), ('departure', Departure) per
+            departure and ('departures', None) at the end of the list
+        :rtype: collections.Iterable[(unicode, T)]
+        :raises ValueError: Not a departure monitor response
+        """
+        path = []
+        res = None
+        found = False
+        lines = {}
+        times = {}
+
+        for event, ele in etree.iterparse(source, events=("start", "end")):
+            if event == "start":
+                path.append(ele.tag)
+                if len(path) == 1:
+                    if ele.tag != "itdRequest":
+                        raise ValueError("Wrong root tag")
+                    res = ItdDMResponse()
+                    self._parse_root_attrib(ele.attrib, res)
+                elif len(path) == 2 and \
+                        ele.tag == "itdDepartureMonitorRequest":
+                    res.request_id = ele.get('requestID')
+                    found = True
+                    yield "response", res
+                continue
+            path.pop()
+            depth = len(path)
+            if depth == 3 and path[2] == "itdDepartureList":
+                yield "departure", self._parse_departure(ele, lines, times)
+            elif depth == 2 and path[1] == "itdDepartureMonitorRequest":
+                if ele.tag == "itdServingLines":
+                    yield "lines", self._parse_lines(ele)
+                elif ele.tag == "itdDateTime":
+                    yield "datetime", self._parse_datetime_itd(ele)
+                elif ele.tag == "itdOdv":
+                    yield "stops", self._parse_itd_odv(ele, res).stops
+                elif ele.tag == "itdDepartureList":
+                    yield "departures", None
+            elif depth > 2:
+                # Part of an element handled when it closes
+                continue
+            ele.clear()
+            if hasattr(ele, "getprevious"):
+                # lxml - drop closed siblings
+                while ele.getprevious() is not None:
+                    del ele.getparent()[0]
+        if not found:
+            raise ValueError("Expected departure monitor")
+
+    def _collect_dm(self, events):
         """
+        Build departure monitor response from parse events
 
-        :param resp:
-        :type resp: wl.models.routing.ItdResponse
+        :param events: Events of _iter_dm()
+        :type events: collections.Iterable[(unicode, T)]
         :return:
         :rtype: wl.models.routing.ItdDMResponse
+        :raises ValueError: No departure monitor in events
         """
-        if not resp.children or len(resp.children) != 0:
-            ValueError("Invalid Subtype")
-        mon = resp.children[0]
-        """ :type : xml.etree.ElementTree.Element """
-        if mon.tag != "itdDepartureMonitorRequest":
-            ValueError("Exepected departure monitor - {}".format(mon.tag))
-        res = ItdDMResponse.from_dict(resp.to_dict())
-        res.children = None
-        res.request_id = mon.get('requestID')
-        for ele in mon:
-            if ele.tag == "itdServingLines":
-                res.lines = self._parse_lines(ele)
-            elif ele.tag == "itdDateTime":
-                res.datetime = self._parse_datetime_itd(ele)
-            elif ele.tag == "itdDepartureList":
-                res.departures = self._parse_departures(ele)
-            elif ele.tag == "itdOdv":
-                self._parse_itd_odv(ele, res)
+        res = None
+        departures = []
+
+        for kind, value in events:
+            if kind == "departure":
+                departures.append(value)
+            elif kind == "departures":
+                res.departures = departures
+            elif kind == "response":
+                res = value
+            elif kind == "lines":
+                res.lines = value
+            elif kind == "datetime":
+                res.datetime = value
+            elif kind == "stops":
+                res.stops = value
+        if res is None:
+            raise ValueError("Expected departure monitor")
         return res
 
+    def _open_dm(self, req):
+        """
+        Load departure monitor as stream
+
+        :param req:
+        :type req: wl.models.routing.ItdRequest
+        :return: Document and function to release it
+        :rtype: (file, () -> None)
+        """
+        url = urljoin(self.base_url, "XML_DM_REQUEST")
+        params = req.to_get_params()
+        if self.rate_limit is not None:
+            self.rate_limit.acquire()
+        if hasattr(self.session, "stream"):
+            try:
+                resp = self.session.stream(url, params=params)
+            except:
+                self.exception(
+                    "Failed to load on {}:\n{}".format(url, params)
+                )
+                raise RequestException("Request failed")
+            return resp.raw, resp.close
+        try:
+            resp = self.session.get(url, params=params)
+        except:
+            self.exception(
+                "Failed to load on {}:\n{}".format(url, params)
+            )
+            raise RequestException("Request failed")
+        if resp.html and resp.html.startswith("<!DOCTYPE HTML"):
+            raise RequestException("API send plain html")
+        data = resp.raw
+        if not data:
+            self.warning("Defaulting to decoded response")
+            data = resp.html.encode("utf-8")
+        return io.BytesIO(data), lambda: None
+
+    def _stream_dm(self, req):
+        """
+        Parse events of departure monitor request
+
+        :param req:
+        :type req: wl.models.routing.ItdRequest
+        :return: Events (see _iter_dm())
+        :rtype: collections.Iterable[(unicode, T)]
+        :raises RequestException: Failed to load or parse
+        """
+        source, release = self._open_dm(req)
+        try:
+            for event in self._iter_dm(source):
+                yield event
+        except RequestException:
+            raise
+        except Exception:
+            self.exception(
+                "Failed to parse departure monitor:\n{}".format(
+                    req.to_get_params()
+                )
+            )
+            raise RequestException("Parse failed")
+        finally:
+            release()
+
     def _make_req_dm(self, req):
         """
 
@@ -332,11 +585,45 @@ class WLRouting(Loadable):
         :return:
         :rtype: wl.models.routing.ItdDMResponse
         """
-        itd_resp = self._make_req("XML_DM_REQUEST", req)
-        #self.debug("\n" + etree.tostring(itd_resp.children[0], pretty_print=True))
-        return self._parse_response_dm(itd_resp)
+        if self.resilience is None:
+            return self._collect_dm(self._stream_dm(req))
+        return self.resilience.call(
+            "XML_DM_REQUEST", self._dm_key(req),
+            lambda: self._collect_dm(self._stream_dm(req))
+        )
+
+    @staticmethod
+    def _dm_key(req):
+        """
+        Key of departure monitor request for stale responses
 
-    def dm_search(self, location, dt=None, limit=40):
+        :param req:
+        :type req: wl.models.routing.ItdRequest
+        :rtype: tuple
+        """
+        return ("XML_DM_REQUEST",) + normalize_params(req.to_get_params())
+
+    def iter_departures(self, location, dt=None, limit=40):
+        """
+        Departures of location as they are parsed
+
+        :param location: Location to search for
+        :type location: str | unicode
+        :param dt: Departure time (default: None)
+            None -> now
+        :type dt: None | datetime.datetime
+        :param limit: Maximum number of departures (default: 40)
+        :type limit: int
+        :return: Departures
+        :rtype: collections.Iterable[wl.models.routing.Departure]
+        :raises RequestException: Failed to load or parse
+        """
+        req = self._dm_search_select_request(location, dt, limit)
+        for kind, value in self._stream_dm(req):
+            if kind == "departure":
+                yield value
+
+    def _dm_search_request(self, location, dt=None, limit=40):
         req = ItdRequest()
         req.session_id = 0
         req.params.update({
@@ -350,10 +637,16 @@ class WLRouting(Loadable):
             dt = utc_to_local(dt)
             req.params['itdDate'] = dt.strftime("%Y%m%d")
             req.params['itdTime'] = dt.strftime("%H%M")
+        return req
+
+    def dm_search(self, location, dt=None, limit=40):
+        req = self._dm_search_request(location, dt, limit)
         res = self._make_req_dm(req)
         return res
 
-    def dm_select(self, resp, lines=None, dt=None, stops=None, limit=40):
+    def _dm_select_request(
+            self, resp, lines=None, dt=None, stops=None, limit=40
+    ):
         req = ItdRequest.from_dict(resp.to_dict())
         """ :type : wl.models.routing.ItdRequest """
         req.params = []
@@ -361,6 +654,9 @@ class WLRouting(Loadable):
             req.params.append(("type_dm", "stopID"))
             for stop_id in stops:
                 req.params.append(("name_dm", stop_id))
+            # Departures of the new stops right away - no separate
+            # line selection round trip
+            req.params.append(("mode", "direct"))
 
         if lines is None:
             req.params.append(("dmLineSelectionAll", 1))
@@ -376,23 +672,42 @@ class WLRouting(Loadable):
             req.params.append(("itdDate",dt.strftime("%Y%m%d")))
             req.params.append(("itdTime", dt.strftime("%H%M")))
         req.params.append(('limit', limit))
+        return req
+
+    def dm_select(self, resp, lines=None, dt=None, stops=None, limit=40):
+        req = self._dm_select_request(resp, lines, dt, stops, limit)
         res = self._make_req_dm(req)
         return res
 
-    def dm_search_select(self, location, dt=None, limit=40):
+    def _dm_read_request(self, resp):
         req = ItdRequest()
-        req.session_id = 0
-        req.params.update({
-            'locationServerActive': 1,
-            'lsShowTrainsExplicit': 1,
-            'type_dm': "any",
-            'name_dm': location,
-            'limit': limit,
-            'dmLineSelectionAll': 1
-        })
-        if dt:
-            dt = utc_to_local(dt)
-            req.params['itdDate'] = dt.strftime("%Y%m%d")
-            req.params['itdTime'] = dt.strftime("%H%M")
+        req.session_id = resp.session_id
+        req.request_id = resp.request_id
+        req.params = [("execInst", ItdRequest.EXEC_INST_READ_ONLY)]
+        return req
+
+    def dm_read(self, resp):
+        """
+        Read last departure monitor of session again without changing it
+
+        Keeps the session alive. Never answered with a stale response -
+        that would say nothing about the session
+
+        :param resp: Session (session_id and request_id)
+        :type resp: wl.models.routing.ItdBase | wl.sessions.RoutingSession
+        :return: Departure monitor
+        :rtype: wl.models.routing.ItdDMResponse
+        :raises RequestException: Failed to load or parse
+        """
+        req = self._dm_read_request(resp)
+        return self._collect_dm(self._stream_dm(req))
+
+    def _dm_search_select_request(self, location, dt=None, limit=40):
+        req = self._dm_search_request(location, dt, limit)
+        req.params['dmLineSelectionAll'] = 1
+        return req
+
+    def dm_search_select(self, location, dt=None, limit=40):
+        req = self._dm_search_select_request(location, dt, limit)
         res = self._make_req_dm(req)
         return res
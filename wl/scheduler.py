@@ -0,0 +1,405 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-18 23:40
+
+import datetime
+import threading
+
+from flotils import Loadable, StartStopable
+
+from .models.realtime import RTResponse
+from .errors import RequestException
+from .cache import monotonic
+from .utils import run_parallel, TZ_LOCAL
+from .limiter import priority, PRIORITY_BACKGROUND
+
+
+class Subscription(object):
+    """ Set of rbls polled together (e.g. one departure board) """
+
+    def __init__(
+            self, sub_id, rbls, callback, traffic_info=None,
+            error_callback=None
+    ):
+        super(Subscription, self).__init__()
+        self.id = sub_id
+        self.rbls = tuple(sorted(set("{}".format(rbl) for rbl in rbls)))
+        """ :type : tuple[unicode] """
+        self.callback = callback
+        """ Called with (subscription, response) on new data - response is
+            stale (stale=True) if some rbls could only be served stale
+            :type : (wl.scheduler.Subscription,
+                wl.models.realtime.RTResponse) -> None """
+        self.error_callback = error_callback
+        """ Called with (subscription, exception) on failure
+            :type : None | (wl.scheduler.Subscription, Exception) -> None """
+        self.traffic_info = traffic_info
+        self.interval = None
+        """ Current polling interval in seconds """
+        self.next_due = 0.0
+        """ Monotonic time of next poll """
+        self.countdown = None
+        """ Minutes until the next departure (last poll) """
+        self.updated = None
+        """ Monotonic time of last fresh data """
+        self.failures = 0
+        """ Consecutive failed polls """
+
+
+class Scheduler(Loadable, StartStopable):
+    """
+    Poll many sets of rbls on adaptive intervals
+
+    Due subscriptions are merged into shared batched monitor requests.
+    The interval of a subscription follows the countdown of its next
+    departure - short while a departure is imminent, long when nothing
+    leaves soon or at night. Polls bypass the response cache of the
+    client. Stale responses (see wl.resilience) are not passed on as
+    fresh data
+    """
+
+    def __init__(self, realtime, settings=None):
+        """
+        Initialize object
+
+        :param realtime: Client to poll with
+        :type realtime: wl.realtime.WLRealtime
+        :param settings: Settings for instance (default: None)
+            min_interval: Shortest interval in seconds (default: 10)
+            max_interval: Longest interval in seconds (default: 120)
+            night_interval: Longest interval at night in seconds
+                (default: 600)
+            night_hours: Local [start, end) hours of night (default: [1, 4])
+            countdown_factor: Share of the time to the next departure
+                to wait (default: 0.5)
+            batch_window: Poll subscriptions due within this many seconds
+                along with the due ones (default: 5)
+            max_rps: Maximum requests per second (default: 2.0)
+            retry_interval: Seconds until retry after a failure,
+                doubled per failure up to max_interval (default: 10)
+            tick: Maximum seconds between scheduling rounds (default: 1)
+        :type settings: dict | None
+        :rtype: None
+        """
+        if settings is None:
+            settings = {}
+        super(Scheduler, self).__init__(settings)
+        self.realtime = realtime
+        """ :type : wl.realtime.WLRealtime """
+        self.min_interval = float(settings.get('min_interval', 10.0))
+        self.max_interval = float(settings.get('max_interval', 120.0))
+        self.night_interval = float(settings.get('night_interval', 600.0))
+        self.night_hours = tuple(settings.get('night_hours', (1, 4)))
+        self.countdown_factor = settings.get('countdown_factor', 0.5)
+        self.batch_window = settings.get('batch_window', 5.0)
+        self.max_rps = settings.get('max_rps', 2.0)
+        self.retry_interval = settings.get('retry_interval', 10.0)
+        self.tick = settings.get('tick', 1.0)
+        self._subscriptions = {}
+        """ :type : dict[int, wl.scheduler.Subscription] """
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        """ :type : None | threading.Thread """
+        self._rps_lock = threading.Lock()
+        self._next_slot = 0.0
+        """ Monotonic time the next request may start """
+        self.requests = 0
+        """ Requests made (guarded by _lock) """
+        self.polls = 0
+        """ Subscriptions polled (guarded by _lock) """
+
+    def subscribe(
+            self, rbls, callback, traffic_info=None, error_callback=None
+    ):
+        """
+        Start polling rbls
+
+        :param rbls: Rbls of the board
+        :type rbls: list[str | unicode | int]
+        :param callback: Called with (subscription, response) on new
+            data - response only contains the monitors of the rbls and
+            is stale if some of them could only be served stale
+        :type callback: (wl.scheduler.Subscription,
+            wl.models.realtime.RTResponse) -> None
+        :param traffic_info: One or more of
+            'stoerunglang', 'stoerungkurz', 'aufzugsinfo' (default: None)
+        :type traffic_info: None | str | unicode | list[str | unicode]
+        :param error_callback: Called with (subscription, exception)
+            on failure (default: None)
+        :type error_callback: None | (wl.scheduler.Subscription,
+            Exception) -> None
+        :return: Subscription id
+        :rtype: int
+        """
+        if isinstance(traffic_info, list):
+            traffic_info = tuple(sorted(traffic_info))
+        with self._lock:
+            sub_id = self._next_id
+            self._next_id += 1
+            self._subscriptions[sub_id] = Subscription(
+                sub_id, rbls, callback, traffic_info, error_callback
+            )
+        self._wake.set()
+        return sub_id
+
+    def unsubscribe(self, sub_id):
+        """
+        Stop polling subscription
+
+        :param sub_id: Subscription id
+        :type sub_id: int
+        :return: Subscription existed
+        :rtype: bool
+        """
+        with self._lock:
+            return self._subscriptions.pop(sub_id, None) is not None
+
+    def _is_night(self):
+        start, end = self.night_hours
+        hour = datetime.datetime.now(TZ_LOCAL).hour
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def _interval(self, countdown, night=False):
+        """
+        Polling interval for the next departure
+
+        :param countdown: Minutes until the next departure (None if none)
+        :type countdown: None | int
+        :param night: Use night upper bound (default: False)
+        :type night: bool
+        :return: Seconds until next poll
+        :rtype: float
+        """
+        upper = self.night_interval if night else self.max_interval
+        if countdown is None:
+            return upper
+        interval = countdown * 60.0 * self.countdown_factor
+        return max(self.min_interval, min(upper, interval))
+
+    @staticmethod
+    def _next_countdown(monitors):
+        """
+        Smallest countdown of all departures
+
+        :param monitors: Monitors
+        :type monitors: list[wl.models.realtime.Monitor]
+        :rtype: None | int
+        """
+        res = None
+
+        for monitor in monitors:
+            for line in monitor.lines or ():
+                for dep in line.departures or ():
+                    if dep.countdown is not None and \
+                            (res is None or dep.countdown < res):
+                        res = dep.countdown
+        return res
+
+    def _throttle(self):
+        """
+        Wait for a request slot within max_rps
+
+        :return: False if stopped while waiting
+        :rtype: bool
+        """
+        if not self.max_rps:
+            return True
+        with self._rps_lock:
+            now = monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + 1.0 / self.max_rps
+        if start > now:
+            # Woken early only by stop()
+            self._stop_event.wait(start - now)
+        return self._is_running or self._thread is None
+
+    def _request(self, chunk, traffic_info):
+        if not self._throttle():
+            raise RequestException("Stopped")
+        with self._lock:
+            self.requests += 1
+        with priority(PRIORITY_BACKGROUND):
+            return self.realtime.monitor(
+                list(chunk), traffic_info, fresh=True
+            )
+
+    def poll_due(self, now=None):
+        """
+        Poll all due subscriptions once
+
+        :param now: Current monotonic time (default: None)
+            None -> monotonic()
+        :type now: None | float
+        :return: Seconds until the next subscription is due
+        :rtype: float
+        """
+        if now is None:
+            now = monotonic()
+        with self._lock:
+            subs = list(self._subscriptions.values())
+        due = [
+            sub for sub in subs if sub.next_due <= now + self.batch_window
+        ]
+        if not any(sub.next_due <= now for sub in due):
+            due = []
+        groups = {}
+
+        for sub in due:
+            groups.setdefault(sub.traffic_info, []).append(sub)
+        for traffic_info, group in groups.items():
+            self._poll_group(group, traffic_info)
+        now = monotonic()
+        with self._lock:
+            subs = list(self._subscriptions.values())
+        if not subs:
+            return self.max_interval
+        return max(0.0, min(sub.next_due for sub in subs) - now)
+
+    def _poll_group(self, subs, traffic_info):
+        """
+        Poll subscriptions with shared requests and dispatch results
+
+        :param subs: Subscriptions with the same traffic_info
+        :type subs: list[wl.scheduler.Subscription]
+        :param traffic_info: Traffic info to request
+        :type traffic_info: None | unicode | tuple[unicode]
+        :rtype: None
+        """
+        rbls = sorted(set(rbl for sub in subs for rbl in sub.rbls))
+        if isinstance(traffic_info, tuple):
+            traffic_info = list(traffic_info)
+        chunks = self.realtime._chunk_rbls(rbls)
+        results = run_parallel(
+            lambda chunk: self._request(chunk, traffic_info), chunks,
+            self.realtime.batch_workers
+        )
+        by_rbl = {}
+        errors = {}
+        stale = set()
+        server_time = None
+
+        for chunk, resp, error in results:
+            if error is not None:
+                self.warning("Chunk {} failed: {}".format(chunk, error))
+                for rbl in chunk:
+                    errors[rbl] = error
+                continue
+            if resp.stale:
+                stale.update(chunk)
+            if resp.server_time and (
+                    server_time is None or resp.server_time > server_time
+            ):
+                server_time = resp.server_time
+            for monitor in resp.monitors:
+                rbl = None
+                if monitor.stop and monitor.stop.rbl is not None:
+                    rbl = "{}".format(monitor.stop.rbl)
+                by_rbl.setdefault(rbl, []).append(monitor)
+        night = self._is_night()
+        now = monotonic()
+
+        with self._lock:
+            self.polls += len(subs)
+
+        for sub in subs:
+            failed = [rbl for rbl in sub.rbls if rbl in errors]
+            if len(failed) == len(sub.rbls):
+                sub.failures += 1
+                sub.next_due = now + min(
+                    self.max_interval,
+                    self.retry_interval * 2 ** (sub.failures - 1)
+                )
+                self._notify_error(sub, errors[failed[0]])
+                continue
+            sub_stale = [rbl for rbl in sub.rbls if rbl in stale]
+            if len(failed) + len(sub_stale) == len(sub.rbls):
+                # Nothing new - retry once the refresh had time to finish
+                sub.next_due = now + min(
+                    self.max_interval, self.retry_interval
+                )
+                continue
+            sub.failures = 0
+            res = RTResponse()
+            res.message_code = RTResponse.CODE_OK
+            res.server_time = server_time
+            res.stale = bool(sub_stale)
+            res.monitors = []
+            for rbl in sub.rbls:
+                res.monitors.extend(by_rbl.get(rbl, ()))
+            sub.countdown = self._next_countdown(res.monitors)
+            sub.interval = self._interval(sub.countdown, night)
+            sub.next_due = now + sub.interval
+            sub.updated = now
+            self._notify(sub, res)
+
+    def _notify(self, sub, res):
+        try:
+            sub.callback(sub, res)
+        except Exception:
+            self.exception("Callback of subscription {} failed".format(
+                sub.id
+            ))
+
+    def _notify_error(self, sub, error):
+        if sub.error_callback is None:
+            return
+        try:
+            sub.error_callback(sub, error)
+        except Exception:
+            self.exception("Error callback of subscription {} failed".format(
+                sub.id
+            ))
+
+    def _run(self):
+        while self._is_running:
+            try:
+                wait = self.poll_due()
+            except Exception:
+                self.exception("Failed to poll")
+                wait = self.tick
+            self._wake.wait(min(wait, self.tick))
+            self._wake.clear()
+
+    def start(self, blocking=False):
+        """
+        Start polling in background thread
+
+        :param blocking: Block until stop() is called (default: False)
+        :type blocking: bool
+        :rtype: None
+        """
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._is_running = True
+        self._thread.start()
+        super(Scheduler, self).start(blocking)
+
+    def stop(self):
+        """
+        Stop polling
+
+        :rtype: None
+        """
+        super(Scheduler, self).stop()
+        self._stop_event.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
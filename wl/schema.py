@@ -0,0 +1,410 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-18 21:30
+
+import json
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+from .errors import ProtocolViolation
+from .models.realtime import Monitor, Stop, Line, Departure
+
+try:
+    string_types = (str, unicode)
+    integer_types = (int, long)
+except NameError:
+    string_types = (str,)
+    integer_types = (int,)
+
+
+VALIDATE_FULL = "full"
+""" All documented required fields present and of documented type """
+VALIDATE_REQUIRED = "required"
+""" Fields needed to build the models present """
+VALIDATE_OFF = "off"
+""" No checks - missing fields become None """
+VALIDATION_LEVELS = (VALIDATE_FULL, VALIDATE_REQUIRED, VALIDATE_OFF)
+
+STRING = string_types
+INT = integer_types
+NUMBER = INT + (float,)
+BOOL = (bool,)
+ID = STRING + INT
+""" Documented as string, but sent as number """
+ELEMENT = (dict,)
+ELEMENTS = (list,)
+
+
+def json_decoder(name="auto"):
+    """
+    Get json decode function
+
+    :param name: One of 'auto', 'orjson', 'ujson', 'json' (default: auto)
+        auto -> fastest installed
+    :type name: str | unicode
+    :return: Decode function
+    :rtype: (str | unicode | bytes) -> T
+    :raises ValueError: Unknown or not installed decoder
+    """
+    if name == "auto":
+        if orjson is not None:
+            return orjson.loads
+        if ujson is not None:
+            return ujson.loads
+        return json.loads
+    if name == "orjson" and orjson is not None:
+        return orjson.loads
+    if name == "ujson" and ujson is not None:
+        return ujson.loads
+    if name == "json":
+        return json.loads
+    raise ValueError("Json decoder '{}' not available".format(name))
+
+
+_UNPARSED = object()
+
+
+class LazyList(Sequence):
+    """
+    List of elements parsed on first access
+
+    Raw elements are dropped once parsed. Validation errors are raised
+    on access
+    """
+
+    __slots__ = ("_raw", "_parsed", "_parse")
+
+    def __init__(self, raw, parse):
+        """
+        Initialize object
+
+        :param raw: Raw elements
+        :type raw: list[dict]
+        :param parse: Parse function
+        :type parse: (dict) -> T
+        :rtype: None
+        """
+        super(LazyList, self).__init__()
+        self._raw = list(raw)
+        self._parsed = [_UNPARSED] * len(self._raw)
+        self._parse = parse
+
+    def __len__(self):
+        return len(self._parsed)
+
+    def _get(self, index):
+        value = self._parsed[index]
+        if value is _UNPARSED:
+            value = self._parse(self._raw[index])
+            self._parsed[index] = value
+            self._raw[index] = None
+        return value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        return self._get(index)
+
+    def __iter__(self):
+        for i in range(len(self._parsed)):
+            yield self._get(i)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, LazyList)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        res = self.__eq__(other)
+        if res is NotImplemented:
+            return res
+        return not res
+
+    def __repr__(self):
+        return repr(list(self))
+
+    @property
+    def parsed(self):
+        """
+        Number of parsed elements
+
+        :rtype: int
+        """
+        return sum(1 for value in self._parsed if value is not _UNPARSED)
+
+
+class Field(object):
+    """ Documented field of an api element """
+
+    def __init__(
+            self, attr, path, required=False, types=None, convert=None,
+            schema=None, many=False, strict=False
+    ):
+        """
+        Initialize object
+
+        :param attr: Attribute to set (None -> only validate)
+        :type attr: None | str | unicode
+        :param path: Key or keys to nested value
+        :type path: str | unicode | tuple[str | unicode]
+        :param required: Field has to be present (default: False)
+        :type required: bool
+        :param types: Allowed types (checked with full validation)
+            (default: None)
+        :type types: None | tuple[type]
+        :param convert: Name of context function to convert the value
+            (default: None)
+        :type convert: None | str | unicode
+        :param schema: Schema of the value (default: None)
+        :type schema: None | wl.schema.Schema
+        :param many: Value is a list of schema elements (default: False)
+        :type many: bool
+        :param strict: Only check with full validation (default: False)
+        :type strict: bool
+        :rtype: None
+        """
+        super(Field, self).__init__()
+        self.attr = attr
+        if not isinstance(path, tuple):
+            path = (path,)
+        self.path = path
+        self.required = required
+        self.types = types
+        self.convert = convert
+        self.schema = schema
+        self.many = many
+        self.strict = strict
+
+
+class Schema(object):
+    """ Declarative description of an api element """
+
+    def __init__(self, name, model, fields):
+        """
+        Initialize object
+
+        :param name: Name used in error messages
+        :type name: str | unicode
+        :param model: Class to create (dict -> plain dict)
+        :type model: type
+        :param fields: Fields of element
+        :type fields: list[wl.schema.Field]
+        :rtype: None
+        """
+        super(Schema, self).__init__()
+        self.name = name
+        self.model = model
+        self.fields = fields
+
+    def compile(self, level=VALIDATE_REQUIRED, context=None, lazy=False):
+        """
+        Build parse function for validation level
+
+        Lookups, checks and error messages are prepared once, so parsing
+        an element is a single loop over plain tuples
+
+        :param level: Validation level (default: required)
+        :type level: str | unicode
+        :param context: Object providing the convert functions
+            (default: None)
+        :type context: None | object
+        :param lazy: Lists of elements are parsed on access (default: False)
+        :type lazy: bool
+        :return: Parse function (element -> model)
+        :rtype: (dict) -> T
+        :raises ValueError: Unknown validation level
+        """
+        if level not in VALIDATION_LEVELS:
+            raise ValueError("Unknown validation level '{}'".format(level))
+        check = level != VALIDATE_OFF
+        full = level == VALIDATE_FULL
+        model = self.model
+        steps = []
+
+        for field in self.fields:
+            required = check and field.required and (full or not field.strict)
+            if field.attr is None and not required:
+                continue
+            convert = None
+            if field.convert:
+                convert = getattr(context, field.convert)
+            sub = None
+            if field.schema is not None:
+                sub = field.schema.compile(level, context, lazy)
+            name = ".".join(field.path)
+            steps.append((
+                field.attr,
+                field.path[:-1],
+                field.path[-1],
+                required,
+                field.types if full else None,
+                convert,
+                sub,
+                field.many,
+                "{}: field '{}' is required".format(self.name, name),
+                "{}: field '{}' has wrong type".format(self.name, name),
+            ))
+        steps = tuple(steps)
+
+        def parse(element):
+            if model is dict:
+                res = {}
+                values = res
+            else:
+                res = model()
+                values = res.__dict__
+            for attr, parents, key, required, types, convert, sub, many, \
+                    msg_missing, msg_type in steps:
+                value = element
+                for parent in parents:
+                    value = value.get(parent)
+                    if value is None:
+                        break
+                if value is not None:
+                    value = value.get(key)
+                if value is None:
+                    if required:
+                        raise ProtocolViolation(msg_missing)
+                    if attr is not None:
+                        values[attr] = None
+                    continue
+                if types is not None and not isinstance(value, types):
+                    raise ProtocolViolation(msg_type)
+                if attr is None:
+                    continue
+                if sub is not None:
+                    if not many:
+                        value = sub(value) if value else None
+                    elif value:
+                        if lazy:
+                            value = LazyList(value, sub)
+                        else:
+                            value = [sub(v) for v in value]
+                if convert is not None:
+                    value = convert(value)
+                values[attr] = value
+            return res
+        return parse
+
+
+#   Filter                |   Val   | req |   Discr
+# .....timePlanned        | datetime|  y  | Abfahrtszeit laut Fahrplan
+# .....timeReal           | datetime|  n  | Prognostizierte Abfahrtszeit (Echtzeit)
+# .....countdown          | int     |  y  | Verbleibende Minuten bis zur Abfahrt
+# .....name               | str     |  y  | Linienname (e.g.: 13A)
+# .....direction          | str     |  y  | Fahrtrichtung ('H' - hin oder 'R' - retour)
+# .....richtungsId        | str     |  y  | Eindeutige ID der Richtung
+# .....barrierFree        | boolean |  y  | Fahrzeug ist barrierefrei
+# .....realtimeSupported  | boolean |  y  | Echtzeitdaten verfügbar
+# .....trafficjam         | boolean |  y  | Stau in der Zufahrt
+# .....type               | str     |  y  | Fahrzeugtyp (ptTram, ..)
+VEHICLE = Schema("vehicle", dict, [
+    Field('name', 'name', True, STRING),
+    Field('direction', 'direction', True, STRING),
+    Field('direction_id', 'richtungsId', True, ID),
+    Field('barrier_free', 'barrierFree', True, BOOL),
+    Field('realtime_supported', 'realtimeSupported', True, BOOL),
+    Field('traffic_jam', 'trafficjam', True, BOOL),
+    Field('type', 'type', True, STRING),
+])
+DEPARTURE = Schema("departure", Departure, [
+    Field(None, 'departureTime', True, ELEMENT),
+    Field(
+        'planned', ('departureTime', 'timePlanned'), True, STRING,
+        convert="_parse_datetime"
+    ),
+    Field(
+        'real', ('departureTime', 'timeReal'), False, STRING,
+        convert="_parse_datetime"
+    ),
+    Field('countdown', ('departureTime', 'countdown'), True, INT),
+    Field('vehicle', 'vehicle', False, ELEMENT, schema=VEHICLE),
+])
+#   Filter                |   Val   | req |   Discr
+# ..name                  | str     |  y  | Name der Linie (e.g.: 13A)
+# ..towards               | str     |  y  | Name des Ziels
+# ..direction             | str     |  y  | Richtung ('H' - hin oder 'R' - retour)
+# ..richtungsId           | str     |  y  | Eindeutige ID der Richtung
+# ..barrierFree           | boolean |  n  | Fahrzeug ist barrierefrei
+# ..realtimeSupported     | boolean |  n  | Echtzeitdaten verfügbar
+# ..trafficjam            | boolean |  n  | Stau in der Zufahrt
+# ..type                  | str     |  y  | Fahrzeugtyp (ptTram, ..)
+# ..lineId                | int     |  n  | Eindeutige Linien ID
+# ..departures            | element |  y  | Wrapper für die Abfahrten
+# ...departure            |[element]|  n  | Liste der Abfahrten
+LINE = Schema("line", Line, [
+    Field('name', 'name', True, STRING),
+    Field('towards', 'towards', True, STRING),
+    Field('direction', 'direction', True, STRING),
+    Field('direction_id', 'richtungsId', True, ID),
+    Field('barrier_free', 'barrierFree', False, BOOL),
+    Field('realtime_supported', 'realtimeSupported', False, BOOL),
+    Field('traffic_jam', 'trafficjam', False, BOOL),
+    Field('type', 'type', True, STRING),
+    Field('id', 'lineId', False, ID),
+    Field(None, 'departures', True, ELEMENT),
+    Field(
+        'departures', ('departures', 'departure'), False, ELEMENTS,
+        schema=DEPARTURE, many=True
+    ),
+])
+#   Filter            |   Val   | req |   Discr
+# .locationStop       | element |  y  | Abgefragte Haltestelle (JSON Geometry Object)
+# ..type              | str     |  y  | Typ des JSON Geometry Objects
+# ..geometry          | element |  y  | Koordinaten Informationen der Haltestelle
+# ...type             | str     |  y  | Typ des Geometry Elements (hier immer 'Point')
+# ...coordinates      | double, |  y  | long,lat Koordinaten im WGS84 Format
+# ..properties        | element |  y  | Detail Informationen über den abgefragten Ort
+# ...name             | str     |  y  | DIVA Nummer der Haltestelle
+# ...title            | str     |  y  | Name der Haltestelle
+# ...municipality     | str     |  y  | Name der Stadt/des Ortes
+# ...municipalityId   | str     |  y  | ID der Stadt/des Ortes
+# ...type             | str     |  y  | Typ des Ortes (hier nur 'stop')
+# ...coordName        | str     |  y  | Koordinatensystem (hier nur 'WGS84')
+# ...gate             | str     |  n  | Gleis oder Steig des Fahrzeugs
+# ...attributes       | element |  y  | beliebige Attribute
+# ....rbl             | str     |  y  | Haltepunkt ID (RBL Nummer)
+STOP = Schema("locationStop", Stop, [
+    Field('stop_type', 'type', True, STRING),
+    Field(None, ('geometry', 'type'), True, STRING),
+    Field(None, ('geometry', 'coordinates'), True, ELEMENTS),
+    Field(
+        'location', 'geometry', True, ELEMENT, convert="_parse_location"
+    ),
+    Field('stop_id', ('properties', 'name'), True, ID),
+    Field('title', ('properties', 'title'), True, STRING),
+    Field('municipality', ('properties', 'municipality'), True, STRING),
+    Field('municipality_id', ('properties', 'municipalityId'), True, ID),
+    Field('type', ('properties', 'type'), True, STRING),
+    Field(None, ('properties', 'coordName'), True, STRING, strict=True),
+    Field('gate', ('properties', 'gate'), False, STRING),
+    Field('rbl', ('properties', 'attributes', 'rbl'), True, ID),
+])
+#   Filter                |   Val   | req |   Discr
+# .locationStop           | element |  y  | Abgefragte Haltestelle
+# .lines                  |[element]|  n  | Liste der Linien (enthält 1-n Elemente)
+MONITOR = Schema("monitor", Monitor, [
+    Field('stop', 'locationStop', True, ELEMENT, schema=STOP),
+    Field('lines', 'lines', False, ELEMENTS, schema=LINE, many=True),
+])
@@ -0,0 +1,261 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-18 14:05
+
+import re
+import heapq
+import bisect
+import unicodedata
+from itertools import chain
+from collections import Counter
+
+
+_RE_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_DIGRAPHS = [("ä", "ae"), ("ö", "oe"), ("ü", "ue")]
+
+
+def fold(text, digraphs=False):
+    """
+    Normalize text for matching
+
+    Lowercase, strip diacritics and 'ß' -> 'ss' (so 'Währinger' and
+    'Wahringer' are the same), everything else than letters and digits
+    becomes a single space
+
+    :param text: Text to fold
+    :type text: str | unicode
+    :param digraphs: Spell umlauts 'ae/oe/ue' instead of 'a/o/u'
+        (default: False)
+    :type digraphs: bool
+    :return: Folded text
+    :rtype: unicode
+    """
+    if not text:
+        return ""
+    if isinstance(text, bytes):
+        text = text.decode("utf-8")
+    text = text.lower()
+    text = text.replace("ß", "ss")
+    if digraphs:
+        text = unicodedata.normalize("NFC", text)
+        for old, new in _DIGRAPHS:
+            text = text.replace(old, new)
+    text = "".join(
+        c for c in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(c)
+    )
+    return _RE_NON_ALNUM.sub(" ", text).strip()
+
+
+def trigrams(folded):
+    """
+    Trigrams of each word (padded to mark word start/end)
+
+    :param folded: Folded text
+    :type folded: unicode
+    :return: Trigrams
+    :rtype: set[unicode]
+    """
+    res = set()
+    for word in folded.split():
+        word = "  {} ".format(word)
+        for i in range(len(word) - 2):
+            res.add(word[i:i + 3])
+    return res
+
+
+class TrigramIndex(object):
+    """
+    Fuzzy text search over (key, text) entries
+
+    Text with umlauts is indexed a second time in its 'ae/oe/ue'
+    spelling, so 'Waehringer' finds 'Währinger' without folding
+    'ae' in other words (e.g. 'Aeropark')
+
+    Call freeze() once all entries are added - a frozen index is
+    read only and can be shared between threads
+    """
+
+    def __init__(self):
+        super(TrigramIndex, self).__init__()
+        self._keys = []
+        """ Key per entry (same key for both spellings)
+            :type : list[T] """
+        self._size = 0
+        """ Number of added keys """
+        self._texts = []
+        """ Folded text per entry
+            :type : list[unicode] """
+        self._sizes = []
+        """ Number of trigrams per entry
+            :type : list[int] """
+        self._postings = {}
+        """ Entries containing trigram
+            :type : dict[unicode, list[int]] """
+        self._sorted = []
+        """ (folded text, entry) sorted for prefix lookups once frozen
+            :type : list[(unicode, int)] """
+        self._frozen = False
+        """ No more entries are added and _sorted is sorted
+            :type : bool """
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key, text):
+        """
+        Add entry
+
+        :param key: Value returned on match (hashable)
+        :type key: T
+        :param text: Text to match against
+        :type text: str | unicode
+        :rtype: None
+        :raises ValueError: Index is frozen
+        """
+        if self._frozen:
+            raise ValueError("Index is frozen")
+        folded = fold(text)
+        self._add(key, folded)
+        alternate = fold(text, digraphs=True)
+        if alternate != folded:
+            self._add(key, alternate)
+        self._size += 1
+
+    def _add(self, key, folded):
+        entry = len(self._keys)
+        tris = trigrams(folded)
+        self._keys.append(key)
+        self._texts.append(folded)
+        self._sizes.append(len(tris))
+        for tri in tris:
+            self._postings.setdefault(tri, []).append(entry)
+        self._sorted.append((folded, entry))
+
+    def freeze(self):
+        """
+        Finish building - sort for prefix lookups (no more entries)
+
+        :rtype: None
+        """
+        if not self._frozen:
+            self._sorted.sort()
+            self._frozen = True
+
+    @property
+    def frozen(self):
+        """
+        Index is read only
+
+        :rtype: bool
+        """
+        return self._frozen
+
+    def _prefixed(self, folded):
+        """ Entries starting with folded """
+        if not self._frozen:
+            # Still building - scan instead of sorting shared state
+            return (
+                entry for text, entry in self._sorted
+                if text.startswith(folded)
+            )
+        return self._prefixed_sorted(folded)
+
+    def _prefixed_sorted(self, folded):
+        i = bisect.bisect_left(self._sorted, (folded, -1))
+        while i < len(self._sorted) and \
+                self._sorted[i][0].startswith(folded):
+            yield self._sorted[i][1]
+            i += 1
+
+    def search(
+            self, text, limit=10, min_score=0.2, accept=None, candidates=50
+    ):
+        """
+        Find best matching entries
+
+        Score is the trigram jaccard similarity (0-1) plus a bonus of
+        1.0 for an exact, 0.5 for a prefix and 0.25 for a word prefix match
+
+        :param text: Text to search for
+        :type text: str | unicode
+        :param limit: Maximum number of results (default: 10)
+        :type limit: int
+        :param min_score: Ignore worse matches (default: 0.2)
+        :type min_score: float
+        :param accept: Only return keys for which this returns True
+            (default: None)
+        :type accept: None | (T) -> bool
+        :param candidates: Number of entries with most common trigrams
+            to score (default: 50)
+        :type candidates: int
+        :return: Keys with score of their best spelling, best first
+        :rtype: list[(T, float)]
+        """
+        folded = fold(text)
+        if not folded or limit <= 0:
+            return []
+        tris = trigrams(folded)
+        postings = self._postings
+        counts = Counter(chain.from_iterable(
+            postings[tri] for tri in tris if tri in postings
+        ))
+        if accept is None:
+            best = counts.most_common(max(candidates, limit))
+        else:
+            best = heapq.nlargest(
+                max(candidates, limit),
+                (
+                    item for item in counts.items()
+                    if accept(self._keys[item[0]])
+                ),
+                key=lambda a: a[1]
+            )
+        best = dict(best)
+        for entry in self._prefixed(folded):
+            if entry not in best:
+                if accept is not None and not accept(self._keys[entry]):
+                    continue
+                best[entry] = counts.get(entry, 0)
+        scores = []
+        words = folded.split()
+
+        for entry, common in best.items():
+            score = common / (len(tris) + self._sizes[entry] - common)
+            entry_text = self._texts[entry]
+            if entry_text == folded:
+                score += 1.0
+            elif entry_text.startswith(folded):
+                score += 0.5
+            else:
+                entry_words = entry_text.split()
+                if all(
+                        any(ew.startswith(w) for ew in entry_words)
+                        for w in words
+                ):
+                    score += 0.25
+            if score >= min_score:
+                scores.append((score, -entry))
+        scores.sort(reverse=True)
+        res = []
+        seen = set()
+
+        for score, neg in scores:
+            key = self._keys[-neg]
+            if key in seen:
+                continue
+            seen.add(key)
+            res.append((key, score))
+            if len(res) >= limit:
+                break
+        return res
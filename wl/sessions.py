@@ -0,0 +1,254 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-18 23:05
+
+import threading
+from collections import OrderedDict
+
+from .cache import monotonic
+
+
+class RoutingSession(object):
+    """ Known routing api session """
+
+    def __init__(self, session_id, request_id=None, now=None):
+        super(RoutingSession, self).__init__()
+        if now is None:
+            now = monotonic()
+        self.session_id = session_id
+        self.request_id = request_id
+        self.created = now
+        """ Monotonic time of first use """
+        self.used = now
+        """ Monotonic time of last successful use """
+        self.uses = 1
+        self.refreshing = False
+        """ Background refresh running """
+        self.refreshed = False
+        """ Refreshed since last use - not again until used """
+
+
+class SessionPool(object):
+    """
+    Liveness of routing api sessions
+
+    Sessions expire on the server after being idle for a while.
+    The pool remembers when each session was last used successfully so
+    callers know whether to reuse it, to race it against a fresh session
+    or to not bother and start fresh. Sessions close to expiry are
+    handed out for a background refresh once per use (see due_refresh)
+    """
+
+    WARM = "warm"
+    """ Recently used - reuse """
+    STALE = "stale"
+    """ Close to expiry - reuse, the background refresh keeps it alive """
+    UNKNOWN = "unknown"
+    """ Not seen by this pool (e.g. after restart) - race a fresh session """
+    EXPIRED = "expired"
+    """ Idle too long or failed - start fresh """
+
+    def __init__(self, ttl=600.0, refresh_margin=120.0, max_sessions=4096):
+        """
+        Initialize object
+
+        :param ttl: Seconds a session stays valid after use (default: 600)
+        :type ttl: float
+        :param refresh_margin: Seconds before expiry a session counts as
+            stale and is due for a refresh (default: 120)
+        :type refresh_margin: float
+        :param max_sessions: Maximum number of tracked sessions
+            (default: 4096)
+        :type max_sessions: int
+        :rtype: None
+        """
+        super(SessionPool, self).__init__()
+        self.ttl = float(ttl)
+        self.refresh_margin = float(refresh_margin)
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        """ Least recently used first
+            :type : OrderedDict[unicode, wl.sessions.RoutingSession] """
+        self._failed = set()
+        """ :type : set[unicode] """
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.created = 0
+        self.failed = 0
+        self.refreshes = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def state(self, session_id):
+        """
+        Liveness of session
+
+        :param session_id: Session id
+        :type session_id: str | unicode
+        :return: One of WARM, STALE, UNKNOWN, EXPIRED
+        :rtype: unicode
+        """
+        with self._lock:
+            if session_id in self._failed:
+                return self.EXPIRED
+            session = self._sessions.get(session_id)
+        if session is None:
+            return self.UNKNOWN
+        idle = monotonic() - session.used
+        if idle >= self.ttl:
+            return self.EXPIRED
+        if idle >= self.ttl - self.refresh_margin:
+            return self.STALE
+        return self.WARM
+
+    def touch(self, session_id, request_id=None):
+        """
+        Record successful use of session
+
+        :param session_id: Session id
+        :type session_id: None | str | unicode
+        :param request_id: Latest request id (default: None)
+        :type request_id: None | str | unicode
+        :rtype: None
+        """
+        if not session_id:
+            return
+        now = monotonic()
+        with self._lock:
+            self._failed.discard(session_id)
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                session = RoutingSession(session_id, request_id, now)
+                self.created += 1
+            else:
+                session.used = now
+                session.uses += 1
+                session.refreshed = False
+                if request_id:
+                    session.request_id = request_id
+                self.reused += 1
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def fail(self, session_id):
+        """
+        Record failed use of session
+
+        :param session_id: Session id
+        :type session_id: None | str | unicode
+        :rtype: None
+        """
+        if not session_id:
+            return
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            if len(self._failed) >= self.max_sessions:
+                self._failed.clear()
+            self._failed.add(session_id)
+            self.failed += 1
+
+    def _expire(self, now):
+        """ Forget expired sessions (lock held) """
+        sessions = self._sessions
+        while sessions:
+            session_id, session = next(iter(sessions.items()))
+            if now - session.used < self.ttl:
+                break
+            del sessions[session_id]
+            if len(self._failed) >= self.max_sessions:
+                self._failed.clear()
+            self._failed.add(session_id)
+
+    def next_refresh(self):
+        """
+        Seconds until the next session is due for a refresh
+
+        :return: Seconds (0.0 -> due now) or None if no session will be
+        :rtype: None | float
+        """
+        now = monotonic()
+        with self._lock:
+            self._expire(now)
+            # Least recently used first - first candidate is due first
+            for session in self._sessions.values():
+                if session.refreshing or session.refreshed:
+                    continue
+                return max(
+                    0.0, session.used + self.ttl - self.refresh_margin - now
+                )
+        return None
+
+    def due_refresh(self):
+        """
+        Sessions to refresh now
+
+        They are marked as refreshing until refreshed() or fail()
+
+        :return: Sessions inside the refresh margin not refreshed since
+            their last use
+        :rtype: list[wl.sessions.RoutingSession]
+        """
+        now = monotonic()
+        res = []
+        with self._lock:
+            self._expire(now)
+            for session in self._sessions.values():
+                if now - session.used < self.ttl - self.refresh_margin:
+                    break
+                if session.refreshing or session.refreshed:
+                    continue
+                session.refreshing = True
+                res.append(session)
+        return res
+
+    def refreshed(self, session_id, request_id=None):
+        """
+        Record successful refresh of session
+
+        Unlike touch() this does not make the session due again
+
+        :param session_id: Session id
+        :type session_id: str | unicode
+        :param request_id: Latest request id (default: None)
+        :type request_id: None | str | unicode
+        :rtype: None
+        """
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return
+            session.used = monotonic()
+            session.refreshing = False
+            session.refreshed = True
+            if request_id:
+                session.request_id = request_id
+            self._sessions[session_id] = session
+            self.refreshes += 1
+
+    def stats(self):
+        """
+        Pool statistics
+
+        :return: sessions, created, reused, failed, refreshes
+        :rtype: dict[unicode, int]
+        """
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'created': self.created,
+                'reused': self.reused,
+                'failed': self.failed,
+                'refreshes': self.refreshes,
+            }
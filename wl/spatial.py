@@ -0,0 +1,207 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-18 09:12
+
+import math
+import heapq
+
+
+EARTH_RADIUS = 6371008.8
+""" Mean earth radius in meters """
+
+
+def distance(lat1, lng1, lat2, lng2):
+    """
+    Great circle distance between two WGS84 points (haversine)
+
+    :param lat1: Latitude of first point
+    :type lat1: float
+    :param lng1: Longitude of first point
+    :type lng1: float
+    :param lat2: Latitude of second point
+    :type lat2: float
+    :param lng2: Longitude of second point
+    :type lng2: float
+    :return: Distance in meters
+    :rtype: float
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2.0) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex(object):
+    """
+    Uniform grid over WGS84 coordinates for nearest/radius queries
+
+    Cells are (roughly) square in meters around the reference latitude,
+    which is fine for a city sized area
+    """
+
+    def __init__(self, cell_size=500.0, ref_lat=48.2):
+        """
+        Initialize object
+
+        :param cell_size: Edge length of a grid cell in meters (default: 500)
+        :type cell_size: float
+        :param ref_lat: Latitude used to scale longitude (default: 48.2)
+        :type ref_lat: float
+        :rtype: None
+        """
+        super(GridIndex, self).__init__()
+        self.cell_size = float(cell_size)
+        self._m_per_lat = math.pi * EARTH_RADIUS / 180.0
+        self._m_per_lng = self._m_per_lat * math.cos(math.radians(ref_lat))
+        self._cells = {}
+        """ :type : dict[(int, int), list[(float, float, T)]] """
+        self._bounds = None
+        """ Min/max cell coordinates (x_min, y_min, x_max, y_max)
+            :type : None | (int, int, int, int) """
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _cell(self, lat, lng):
+        return (
+            int(math.floor(lng * self._m_per_lng / self.cell_size)),
+            int(math.floor(lat * self._m_per_lat / self.cell_size))
+        )
+
+    def insert(self, lat, lng, item):
+        """
+        Add item at position
+
+        :param lat: Latitude
+        :type lat: float
+        :param lng: Longitude
+        :type lng: float
+        :param item: Item to store
+        :type item: T
+        :rtype: None
+        """
+        lat = float(lat)
+        lng = float(lng)
+        x, y = self._cell(lat, lng)
+        self._cells.setdefault((x, y), []).append((lat, lng, item))
+        if self._bounds is None:
+            self._bounds = (x, y, x, y)
+        else:
+            x_min, y_min, x_max, y_max = self._bounds
+            self._bounds = (
+                min(x_min, x), min(y_min, y), max(x_max, x), max(y_max, y)
+            )
+        self._size += 1
+
+    def _ring(self, cx, cy, r):
+        """ Occupied part (within bounds) of the cells r cells away """
+        x_min, y_min, x_max, y_max = self._bounds
+        x_from = max(cx - r, x_min)
+        x_to = min(cx + r, x_max)
+        if r == 0:
+            yield cx, cy
+            return
+        for y in (cy - r, cy + r):
+            if y_min <= y <= y_max:
+                for x in range(x_from, x_to + 1):
+                    yield x, y
+        for x in (cx - r, cx + r):
+            if x_min <= x <= x_max:
+                for y in range(max(cy - r + 1, y_min), min(cy + r, y_max + 1)):
+                    yield x, y
+
+    def _ring_range(self, cx, cy):
+        """ First and last ring touching the bounds """
+        x_min, y_min, x_max, y_max = self._bounds
+        first = max(x_min - cx, cx - x_max, y_min - cy, cy - y_max, 0)
+        last = max(cx - x_min, x_max - cx, cy - y_min, y_max - cy)
+        return first, last
+
+    def nearest(self, lat, lng, k=1, max_distance=None):
+        """
+        Find k nearest items
+
+        :param lat: Latitude
+        :type lat: float
+        :param lng: Longitude
+        :type lng: float
+        :param k: Number of items to return (default: 1)
+        :type k: int
+        :param max_distance: Ignore items further away (in meters)
+            (default: None)
+        :type max_distance: None | float
+        :return: Items with distance in meters, nearest first
+        :rtype: list[(T, float)]
+        """
+        if not self._size or k <= 0:
+            return []
+        lat = float(lat)
+        lng = float(lng)
+        cx, cy = self._cell(lat, lng)
+        min_ring, max_ring = self._ring_range(cx, cy)
+        if max_distance is not None:
+            max_ring = min(max_ring, int(max_distance // self.cell_size) + 1)
+        # max heap of the k best (negated distance)
+        best = []
+        counter = 0
+
+        for r in range(min_ring, max_ring + 1):
+            for cell in self._ring(cx, cy, r):
+                for p_lat, p_lng, item in self._cells.get(cell, ()):
+                    dist = distance(lat, lng, p_lat, p_lng)
+                    if max_distance is not None and dist > max_distance:
+                        continue
+                    counter += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-dist, counter, item))
+                    elif dist < -best[0][0]:
+                        heapq.heapreplace(best, (-dist, counter, item))
+            # Everything in ring r + 1 is at least r cells away
+            if len(best) >= k and -best[0][0] <= r * self.cell_size:
+                break
+        return [(item, -neg) for neg, _, item in sorted(best, reverse=True)]
+
+    def within(self, lat, lng, radius):
+        """
+        Find all items within radius
+
+        :param lat: Latitude
+        :type lat: float
+        :param lng: Longitude
+        :type lng: float
+        :param radius: Radius in meters
+        :type radius: float
+        :return: Items with distance in meters, nearest first
+        :rtype: list[(T, float)]
+        """
+        if not self._size:
+            return []
+        lat = float(lat)
+        lng = float(lng)
+        cx, cy = self._cell(lat, lng)
+        r = int(math.ceil(radius / self.cell_size))
+        x_min, y_min, x_max, y_max = self._bounds
+        res = []
+
+        for x in range(max(cx - r, x_min), min(cx + r, x_max) + 1):
+            for y in range(max(cy - r, y_min), min(cy + r, y_max) + 1):
+                for p_lat, p_lng, item in self._cells.get((x, y), ()):
+                    dist = distance(lat, lng, p_lat, p_lng)
+                    if dist <= radius:
+                        res.append((dist, len(res), item))
+        res.sort()
+        return [(item, dist) for dist, _, item in res]
@@ -0,0 +1,537 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-18 11:40
+
+from array import array
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+NO_INT = -1
+""" Marker for missing integer values (ids are positive) """
+
+
+def _to_int(value):
+    if value is None or value == "":
+        return NO_INT
+    return int(value)
+
+
+def _to_float(value):
+    if value is None or value == "":
+        return float("nan")
+    return float(value)
+
+
+def _from_int(value):
+    if value == NO_INT:
+        return None
+    return value
+
+
+def _from_float(value):
+    if value != value:
+        # nan
+        return None
+    return value
+
+
+def _from_str(value):
+    if not value:
+        return None
+    return value
+
+
+def _same(a, b):
+    """ Compare stored rows (nan equals nan) """
+    for x, y in zip(a, b):
+        if x != y and not (x != x and y != y):
+            return False
+    return True
+
+
+class _Table(object):
+    """ Column storage - one array/list per field """
+
+    _columns = ()
+    """ Column names with array typecode (None for python list)
+        :type : tuple[(unicode, None | str)] """
+
+    def __init__(self):
+        super(_Table, self).__init__()
+        for name, typecode in self._columns:
+            if typecode:
+                setattr(self, name, array(str(typecode)))
+            else:
+                setattr(self, name, [])
+        self.rows = {}
+        """ Row number by id
+            :type : dict[int, int] """
+        self._strings = {}
+
+    def __len__(self):
+        return len(self.id)
+
+    def _intern(self, value):
+        """ Share string objects of repetitive columns """
+        if not value:
+            return None
+        return self._strings.setdefault(value, value)
+
+    def convert(self, *values):
+        """
+        Convert csv row values to stored values
+
+        :return: Stored values
+        :rtype: tuple
+        """
+        raise NotImplementedError()
+
+    def append(self, *values):
+        """
+        Add csv row
+
+        :return: Row number
+        :rtype: int
+        """
+        return self._add(self.convert(*values))
+
+    def _add(self, values):
+        row = len(self.id)
+        for (name, _), value in zip(self._columns, values):
+            getattr(self, name).append(value)
+        self.rows[values[0]] = row
+        return row
+
+    def get(self, row):
+        """
+        Stored values of row
+
+        :param row: Row number
+        :type row: int
+        :return: Stored values
+        :rtype: tuple
+        """
+        return tuple(getattr(self, name)[row] for name, _ in self._columns)
+
+    def set(self, row, values):
+        """
+        Overwrite row with stored values (id must not change)
+
+        :param row: Row number
+        :type row: int
+        :param values: Stored values
+        :type values: tuple
+        :rtype: None
+        """
+        for (name, _), value in zip(self._columns, values):
+            getattr(self, name)[row] = value
+
+    def copy(self):
+        """
+        Independent copy (columns are copied, values shared)
+
+        :rtype: T <= wl.store._Table
+        """
+        new = self.__class__.__new__(self.__class__)
+        for key, value in self.__dict__.items():
+            if isinstance(value, (array, list, dict)):
+                value = value.copy() if isinstance(value, dict) \
+                    else value[:]
+            setattr(new, key, value)
+        return new
+
+    def diff(self, rows):
+        """
+        Compare with new csv rows
+
+        Rows with an unchanged (set) change date are not compared further
+
+        :param rows: New csv rows
+        :type rows: collections.Iterable[list]
+        :return: Updated (row, stored values), added stored values and
+            removed ids
+        :rtype: (list[(int, tuple)], list[tuple], set[int])
+        """
+        date_index = [name for name, _ in self._columns].index('change_date')
+        updated = []
+        added = []
+        seen = set()
+
+        for values in rows:
+            values = self.convert(*values)
+            seen.add(values[0])
+            row = self.rows.get(values[0])
+            if row is None:
+                added.append(values)
+                continue
+            old = self.get(row)
+            if old[date_index] is not None and \
+                    old[date_index] == values[date_index]:
+                continue
+            if not _same(old, values):
+                updated.append((row, values))
+        removed = set(self.rows) - seen
+        return updated, added, removed
+
+    def changed_columns(self, updated):
+        """
+        Names of columns that differ in updated rows
+
+        :param updated: Updated rows as returned by diff()
+        :type updated: list[(int, tuple)]
+        :rtype: set[unicode]
+        """
+        res = set()
+        for row, values in updated:
+            for (name, _), old, new in zip(
+                    self._columns, self.get(row), values
+            ):
+                if not _same((old,), (new,)):
+                    res.add(name)
+        return res
+
+    def __getstate__(self):
+        state = {}
+
+        for key, value in self.__dict__.items():
+            if key == "_strings":
+                # Only needed while appending
+                continue
+            if isinstance(value, array):
+                # Arrays pickle as element lists otherwise
+                value = _PackedArray(value.typecode, _array_bytes(value))
+            state[key] = value
+        return state
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            if isinstance(value, _PackedArray):
+                arr = array(str(value.typecode))
+                _array_load(arr, value.data)
+                value = arr
+            setattr(self, key, value)
+        self._strings = {}
+
+
+class _PackedArray(object):
+    """ Array as raw machine bytes for pickling """
+    __slots__ = ("typecode", "data")
+
+    def __init__(self, typecode=None, data=None):
+        self.typecode = typecode
+        self.data = data
+
+    def __getstate__(self):
+        return self.typecode, self.data
+
+    def __setstate__(self, state):
+        self.typecode, self.data = state
+
+
+def _array_bytes(arr):
+    if hasattr(arr, "tobytes"):
+        return arr.tobytes()
+    return arr.tostring()
+
+
+def _array_load(arr, data):
+    if hasattr(arr, "frombytes"):
+        arr.frombytes(data)
+    else:
+        arr.fromstring(data)
+
+
+class StopTable(_Table):
+    _columns = (
+        ('id', 'l'), ('type', None), ('stop_id', 'l'), ('name', None),
+        ('municipality', None), ('municipality_id', 'l'),
+        ('lat', 'd'), ('lng', 'd'), ('change_date', None),
+    )
+
+    def __init__(self):
+        super(StopTable, self).__init__()
+        self.platform_offsets = array(str('l'))
+        """ Platforms of stop n: platform_rows[offsets[n]:offsets[n + 1]] """
+        self.platform_rows = array(str('l'))
+
+    def convert(
+            self,
+            entry_id, type, diva, name, municipality, municipality_id,
+            lat, lng, change_date
+    ):
+        return (
+            _to_int(entry_id), self._intern(type), _to_int(diva), name,
+            self._intern(municipality), _to_int(municipality_id),
+            _to_float(lat), _to_float(lng), self._intern(change_date)
+        )
+
+
+class LineTable(_Table):
+    _columns = (
+        ('id', 'l'), ('designation', None), ('order', 'l'),
+        ('realtime', 'b'), ('car_type', None), ('change_date', None),
+    )
+
+    def convert(
+            self,
+            entry_id, designation, order, realtime, car_type, change_date
+    ):
+        return (
+            _to_int(entry_id), designation, _to_int(order),
+            1 if realtime in (True, 1, "1") else 0,
+            self._intern(car_type), self._intern(change_date)
+        )
+
+
+class PlatformTable(_Table):
+    _columns = (
+        ('id', 'l'), ('line_id', 'l'), ('stop_id', 'l'), ('direction', None),
+        ('order', 'l'), ('rbl', 'l'), ('area', None), ('platform', None),
+        ('lat', 'd'), ('lng', 'd'), ('change_date', None),
+    )
+
+    def __init__(self):
+        super(PlatformTable, self).__init__()
+        self.stop_row = array(str('l'))
+        """ Foreign key - row in stop table """
+        self.line_row = array(str('l'))
+        """ Foreign key - row in line table """
+
+    def convert(
+            self,
+            entry_id, line_id, stop_id, direction, order, rbl, area, platform,
+            lat, lng, change_date
+    ):
+        return (
+            _to_int(entry_id), _to_int(line_id), _to_int(stop_id),
+            self._intern(direction), _to_int(order), _to_int(rbl),
+            self._intern(area), self._intern(platform),
+            _to_float(lat), _to_float(lng), self._intern(change_date)
+        )
+
+
+class Store(object):
+    """ Columnar storage of stops, lines and platforms """
+
+    def __init__(self):
+        super(Store, self).__init__()
+        self.stops = StopTable()
+        """ :type : wl.store.StopTable """
+        self.lines = LineTable()
+        """ :type : wl.store.LineTable """
+        self.platforms = PlatformTable()
+        """ :type : wl.store.PlatformTable """
+
+    def copy(self):
+        """
+        Independent copy of all tables
+
+        :rtype: wl.store.Store
+        """
+        new = Store()
+        new.stops = self.stops.copy()
+        new.lines = self.lines.copy()
+        new.platforms = self.platforms.copy()
+        return new
+
+    def link(self):
+        """
+        Resolve platform foreign keys to rows and group platforms by stop
+
+        :rtype: None
+        :raises KeyError: Unknown stop or line referenced
+        """
+        stops = self.stops
+        platforms = self.platforms
+        platforms.stop_row = array(
+            str('l'), [stops.rows[a] for a in platforms.stop_id]
+        )
+        platforms.line_row = array(
+            str('l'), [self.lines.rows[a] for a in platforms.line_id]
+        )
+        # Counting sort of platform rows by stop row (keeps file order)
+        counts = [0] * (len(stops) + 1)
+        for stop_row in platforms.stop_row:
+            counts[stop_row + 1] += 1
+        for i in range(len(stops)):
+            counts[i + 1] += counts[i]
+        offsets = array(str('l'), counts)
+        rows = array(str('l'), [0] * len(platforms))
+        fill = list(counts)
+        for row, stop_row in enumerate(platforms.stop_row):
+            rows[fill[stop_row]] = row
+            fill[stop_row] += 1
+        stops.platform_offsets = offsets
+        stops.platform_rows = rows
+
+    def stop(self, row):
+        return StopView(self, row)
+
+    def line(self, row):
+        return LineView(self, row)
+
+    def platform(self, row):
+        return PlatformView(self, row)
+
+
+class _RowView(object):
+    """ Lightweight attribute access to one row of a table """
+    __slots__ = ("_store", "_row")
+    _name = None
+    _fields = ()
+
+    def __init__(self, store, row):
+        self._store = store
+        """ :type : wl.store.Store """
+        self._row = row
+
+    def __eq__(self, other):
+        return type(self) is type(other) and \
+            self._store is other._store and self._row == other._row
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((self._name, self._row))
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self._fields}
+
+    def __str__(self):
+        return "<{}>({})".format(self._name, ", ".join(
+            "{}={}".format(key, getattr(self, key)) for key in self._fields
+        ))
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def _column(table, name, convert=None):
+    if convert is None:
+        def getter(self):
+            return getattr(getattr(self._store, table), name)[self._row]
+    else:
+        def getter(self):
+            return convert(
+                getattr(getattr(self._store, table), name)[self._row]
+            )
+    return property(getter)
+
+
+class StopView(_RowView):
+    __slots__ = ()
+    _name = "Stop"
+    _fields = (
+        'id', 'type', 'stop_id', 'name', 'municipality', 'municipality_id',
+        'lat', 'lng', 'change_date'
+    )
+
+    id = _column('stops', 'id')
+    type = _column('stops', 'type')
+    stop_id = _column('stops', 'stop_id', _from_int)
+    """ DIVA """
+    name = _column('stops', 'name')
+    municipality = _column('stops', 'municipality')
+    municipality_id = _column('stops', 'municipality_id', _from_int)
+    lat = _column('stops', 'lat', _from_float)
+    lng = _column('stops', 'lng', _from_float)
+    change_date = _column('stops', 'change_date', _from_str)
+
+    @property
+    def platforms(self):
+        """ :rtype : None | list[wl.store.PlatformView] """
+        table = self._store.stops
+        start = table.platform_offsets[self._row]
+        end = table.platform_offsets[self._row + 1]
+        if start == end:
+            return None
+        return [
+            PlatformView(self._store, row)
+            for row in table.platform_rows[start:end]
+        ]
+
+
+class LineView(_RowView):
+    __slots__ = ()
+    _name = "Line"
+    _fields = (
+        'id', 'designation', 'order', 'realtime', 'car_type', 'change_date'
+    )
+
+    id = _column('lines', 'id')
+    designation = _column('lines', 'designation')
+    order = _column('lines', 'order', _from_int)
+    realtime = _column('lines', 'realtime', bool)
+    car_type = _column('lines', 'car_type')
+    change_date = _column('lines', 'change_date', _from_str)
+
+
+class PlatformView(_RowView):
+    __slots__ = ()
+    _name = "Platform"
+    _fields = (
+        'id', 'line_id', 'stop_id', 'direction', 'order', 'rbl', 'area',
+        'platform', 'lat', 'lng', 'change_date'
+    )
+
+    id = _column('platforms', 'id')
+    line_id = _column('platforms', 'line_id', _from_int)
+    stop_id = _column('platforms', 'stop_id', _from_int)
+    direction = _column('platforms', 'direction')
+    order = _column('platforms', 'order', _from_int)
+    rbl = _column('platforms', 'rbl', _from_int)
+    area = _column('platforms', 'area')
+    platform = _column('platforms', 'platform')
+    lat = _column('platforms', 'lat', _from_float)
+    lng = _column('platforms', 'lng', _from_float)
+    change_date = _column('platforms', 'change_date', _from_str)
+
+    @property
+    def stop(self):
+        """ :rtype : wl.store.StopView """
+        return StopView(
+            self._store, self._store.platforms.stop_row[self._row]
+        )
+
+    @property
+    def line(self):
+        """ :rtype : wl.store.LineView """
+        return LineView(
+            self._store, self._store.platforms.line_row[self._row]
+        )
+
+
+class TableMapping(Mapping):
+    """ Read only id -> row view mapping over a table """
+
+    def __init__(self, store, table, view_cls):
+        super(TableMapping, self).__init__()
+        self._store = store
+        self._table = table
+        self._view_cls = view_cls
+
+    def __getitem__(self, key):
+        return self._view_cls(self._store, self._table.rows[key])
+
+    def __iter__(self):
+        return iter(self._table.id)
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, key):
+        return key in self._table.rows
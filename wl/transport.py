@@ -0,0 +1,201 @@
+# -*- coding: UTF-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+__author__ = "d01"
+__email__ = "jungflor@gmail.com"
+__copyright__ = "Copyright (C) 2026, Florian JUNG"
+__license__ = "MIT"
+__version__ = "0.1.0"
+__date__ = "2026-10-18"
+# Created: 2026-10-18 20:15
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import urlparse
+from flotils import Loadable
+from floscraper import WebScraper
+from floscraper.models import Response
+
+from .errors import RequestException
+
+
+class Transport(Loadable):
+    """
+    Thread safe pooled http transport
+
+    Drop-in for the floscraper.WebScraper.get() used by the api clients
+    (pass as setting 'transport'). One instance can be shared by all
+    clients in a process, so connections (and their TLS sessions)
+    are kept alive and reused across clients and threads
+    """
+
+    def __init__(self, settings=None):
+        """
+        Initialize object
+
+        :param settings: Settings for instance (default: None)
+            timeout: Seconds or (connect, read) (default: (5.0, 30.0))
+            pool_connections: Number of hosts to keep pools for (default: 10)
+            pool_maxsize: Connections kept per host (default: 20)
+            pool_block: Wait for a free connection instead of opening
+                an extra one (default: False)
+            host_limits: Maximum concurrent requests per host
+                (default: {}) - e.g. {"www.wienerlinien.at": 8}
+            max_retries: Retries on connection errors (default: 0)
+            keep_alive: Reuse connections (default: True)
+            user_agent: User agent (default: None)
+            headers: Additional headers (default: None)
+        :type settings: dict | None
+        :rtype: None
+        """
+        if settings is None:
+            settings = {}
+        super(Transport, self).__init__(settings)
+        timeout = settings.get('timeout', (5.0, 30.0))
+        if isinstance(timeout, list):
+            timeout = tuple(timeout)
+        self.timeout = timeout
+        """ :type : None | float | (float, float) """
+        self.pool_connections = settings.get('pool_connections', 10)
+        self.pool_maxsize = settings.get('pool_maxsize', 20)
+        self.pool_block = settings.get('pool_block', False)
+        self.max_retries = settings.get('max_retries', 0)
+        self.keep_alive = settings.get('keep_alive', True)
+        self.headers = dict(settings.get('headers') or {})
+        if settings.get('user_agent'):
+            self.headers['User-Agent'] = settings['user_agent']
+        if not self.keep_alive:
+            self.headers['Connection'] = "close"
+        self._host_limits = {}
+        """ :type : dict[unicode, threading.BoundedSemaphore] """
+        for host, limit in (settings.get('host_limits') or {}).items():
+            self._host_limits[host] = threading.BoundedSemaphore(limit)
+        self.session = self._create_session()
+        """ :type : requests.Session """
+
+    def _create_session(self):
+        """
+        Session with pooled adapters
+
+        :rtype: requests.Session
+        """
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.max_retries,
+            pool_block=self.pool_block
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get(self, url, timeout=None, headers=None, params=None):
+        """
+        Make get request to url
+
+        :param url: Url to make request to
+        :type url: str | unicode
+        :param timeout: Timeout for request (default: None)
+            None -> self.timeout
+        :type timeout: None | float | (float, float)
+        :param headers: Headers to be passed along (default: None)
+        :type headers: None | dict
+        :param params: Parameters to be passed along with url (default: None)
+        :type params: None | dict | list[(str | unicode, T)]
+        :return: Response
+        :rtype: floscraper.models.Response
+        :raises RequestException: Loading failed
+        """
+        if timeout is None:
+            timeout = self.timeout
+        limit = self._host_limits.get(urlparse(url).hostname)
+        if limit is not None:
+            limit.acquire()
+        try:
+            response = self.session.get(
+                url, params=params, headers=headers, timeout=timeout
+            )
+            response.raise_for_status()
+            raw = response.content
+            html = response.text
+        except requests.RequestException as e:
+            raise RequestException("{} - {}".format(e, url))
+        finally:
+            if limit is not None:
+                limit.release()
+        return Response(html=html, raw=raw)
+
+    def stream(self, url, timeout=None, headers=None, params=None):
+        """
+        Make get request to url without loading the body
+
+        The per-host limit only covers opening the request
+
+        :param url: Url to make request to
+        :type url: str | unicode
+        :param timeout: Timeout for request (default: None)
+            None -> self.timeout
+        :type timeout: None | float | (float, float)
+        :param headers: Headers to be passed along (default: None)
+        :type headers: None | dict
+        :param params: Parameters to be passed along with url (default: None)
+        :type params: None | dict | list[(str | unicode, T)]
+        :return: Response - read body from .raw and close() when done
+        :rtype: requests.Response
+        :raises RequestException: Loading failed
+        """
+        if timeout is None:
+            timeout = self.timeout
+        limit = self._host_limits.get(urlparse(url).hostname)
+        if limit is not None:
+            limit.acquire()
+        try:
+            response = self.session.get(
+                url, params=params, headers=headers, timeout=timeout,
+                stream=True
+            )
+            try:
+                response.raise_for_status()
+            except requests.RequestException:
+                response.close()
+                raise
+        except requests.RequestException as e:
+            raise RequestException("{} - {}".format(e, url))
+        finally:
+            if limit is not None:
+                limit.release()
+        response.raw.decode_content = True
+        return response
+
+    def close(self):
+        """
+        Close all pooled connections
+
+        :rtype: None
+        """
+        self.session.close()
+
+
+def transport_from_settings(settings):
+    """
+    Create http session of api client
+
+    :param settings: Client settings - 'transport' (Transport instance or
+        its settings) or else 'web' (floscraper.WebScraper settings)
+    :type settings: dict
+    :return: Object with get(url, params=..) returning .html/.raw
+    :rtype: wl.transport.Transport | floscraper.WebScraper
+    """
+    transport = settings.get('transport')
+    if isinstance(transport, dict):
+        return Transport(transport)
+    if transport is not None:
+        return transport
+    return WebScraper(settings.get('web', {}))
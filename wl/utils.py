@@ -12,9 +12,29 @@ __version__ = "0.1.0"
 __date__ = "2017-11-03"
 # Created: 2017-11-03 12:27
 
+import re
+import datetime
+import threading
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 from dateutil import tz
 from dateutil.tz import tzutc
+from dateutil.parser import parse as dt_parse
+
+
+_RE_ISO = re.compile(
+    r"^(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d)"
+    r"(?::(\d\d)(?:[.,](\d{1,6})\d*)?)?"
+    r"(?:(Z)|([+-])(\d\d):?(\d\d)?)?$"
+)
+""" Timestamp shape of the apis (e.g. 2017-11-03T10:42:00.000+0100) """
+_iso_memo = {}
+""" Parsed timestamps ((text, local) -> datetime) """
+ISO_MEMO_SIZE = 4096
+""" Maximum number of memoized timestamps """
 
 
 def to_utc(dt):
@@ -22,11 +42,359 @@ def to_utc(dt):
     return dt.replace(tzinfo=None)
 
 
+TZ_LOCAL = tz.gettz("Europe/Vienna")
+""" Timezone of the apis (resolved once) """
+_ONE_HOUR = datetime.timedelta(hours=1)
+_TWO_HOURS = datetime.timedelta(hours=2)
+_dst_cache = {}
+""" year -> (dst start, dst end) in utc """
+
+
+def _last_sunday(year, month):
+    # Day 31 exists in march and october
+    day = datetime.datetime(year, month, 31)
+    return day - datetime.timedelta(days=(day.weekday() + 1) % 7)
+
+
+def _dst_bounds(year):
+    """
+    Daylight saving time of year (EU rule: last sunday in march to
+    last sunday in october, both at 01:00 utc)
+
+    :param year: Year
+    :type year: int
+    :return: Start and end (exclusive) in utc or None if the timezone
+        data does not follow the rule for this year
+    :rtype: None | (datetime.datetime, datetime.datetime)
+    """
+    try:
+        return _dst_cache[year]
+    except KeyError:
+        pass
+    bounds = (
+        _last_sunday(year, 3) + _ONE_HOUR,
+        _last_sunday(year, 10) + _ONE_HOUR
+    )
+    second = datetime.timedelta(seconds=1)
+    # Only use rule where it matches the timezone data
+    for dt, offset in (
+            (bounds[0] - second, _ONE_HOUR), (bounds[0], _TWO_HOURS),
+            (bounds[1] - second, _TWO_HOURS), (bounds[1], _ONE_HOUR)
+    ):
+        local = dt.replace(tzinfo=tzutc()).astimezone(TZ_LOCAL)
+        if local.utcoffset() != offset:
+            bounds = None
+            break
+    _dst_cache[year] = bounds
+    return bounds
+
+
 def local_to_utc(dt):
-    dt = dt.replace(tzinfo=tz.gettz("Europe/Vienna")).astimezone(tzutc())
-    return dt.replace(tzinfo=None)
+    """
+    Vienna local time to utc
+
+    :param dt: Naive local time
+    :type dt: datetime.datetime
+    :return: Naive utc time
+    :rtype: datetime.datetime
+    """
+    bounds = _dst_bounds(dt.year)
+    if bounds is None:
+        dt = dt.replace(tzinfo=TZ_LOCAL).astimezone(tzutc())
+        return dt.replace(tzinfo=None)
+    start, end = bounds
+    # In local time dst starts at 02:00 (-> 03:00) and
+    # ends at 03:00 (-> 02:00, ambiguous hour is taken as dst)
+    if start + _ONE_HOUR <= dt < end + _TWO_HOURS:
+        return dt - _TWO_HOURS
+    return dt - _ONE_HOUR
 
 
 def utc_to_local(dt):
-    dt = dt.replace(tzinfo=tzutc()).astimezone(tz.gettz("Europe/Vienna"))
-    return dt.replace(tzinfo=None)
+    """
+    Utc to Vienna local time
+
+    :param dt: Naive utc time
+    :type dt: datetime.datetime
+    :return: Naive local time
+    :rtype: datetime.datetime
+    """
+    bounds = _dst_bounds(dt.year)
+    if bounds is None:
+        dt = dt.replace(tzinfo=tzutc()).astimezone(TZ_LOCAL)
+        return dt.replace(tzinfo=None)
+    if bounds[0] <= dt < bounds[1]:
+        return dt + _TWO_HOURS
+    return dt + _ONE_HOUR
+
+
+def local_to_utc_many(dts):
+    """
+    Vienna local times to utc
+
+    :param dts: Naive local times (None is kept)
+    :type dts: collections.Iterable[None | datetime.datetime]
+    :return: Naive utc times
+    :rtype: list[None | datetime.datetime]
+    """
+    res = []
+    year = None
+    start = end = None
+
+    for dt in dts:
+        if dt is None:
+            res.append(None)
+            continue
+        if dt.year != year:
+            year = dt.year
+            bounds = _dst_bounds(year)
+            if bounds is None:
+                start = end = None
+            else:
+                start = bounds[0] + _ONE_HOUR
+                end = bounds[1] + _TWO_HOURS
+        if start is None:
+            res.append(local_to_utc(dt))
+        elif start <= dt < end:
+            res.append(dt - _TWO_HOURS)
+        else:
+            res.append(dt - _ONE_HOUR)
+    return res
+
+
+def utc_to_local_many(dts):
+    """
+    Utc times to Vienna local time
+
+    :param dts: Naive utc times (None is kept)
+    :type dts: collections.Iterable[None | datetime.datetime]
+    :return: Naive local times
+    :rtype: list[None | datetime.datetime]
+    """
+    res = []
+    year = None
+    bounds = None
+
+    for dt in dts:
+        if dt is None:
+            res.append(None)
+            continue
+        if dt.year != year:
+            year = dt.year
+            bounds = _dst_bounds(year)
+        if bounds is None:
+            res.append(utc_to_local(dt))
+        elif bounds[0] <= dt < bounds[1]:
+            res.append(dt + _TWO_HOURS)
+        else:
+            res.append(dt + _ONE_HOUR)
+    return res
+
+
+def _parse_iso(text, local):
+    match = _RE_ISO.match(text)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction, utc, sign, \
+        off_h, off_m = match.groups()
+    microsecond = 0
+    if fraction:
+        microsecond = int(fraction) * 10 ** (6 - len(fraction))
+    dt = datetime.datetime(
+        int(year), int(month), int(day), int(hour), int(minute),
+        int(second or 0), microsecond
+    )
+    if utc:
+        return dt
+    if sign:
+        offset = datetime.timedelta(
+            hours=int(off_h), minutes=int(off_m or 0)
+        )
+        if sign == "+":
+            return dt - offset
+        return dt + offset
+    if local:
+        return local_to_utc(dt)
+    return None
+
+
+def parse_iso_datetime(text, local=False):
+    """
+    Parse api timestamp to naive utc datetime
+
+    The fixed ISO-8601 shape of the apis is parsed directly and memoized,
+    anything else goes through dateutil
+
+    :param text: Timestamp (e.g. 2017-11-03T10:42:00.000+0100)
+    :type text: None | str | unicode
+    :param local: Timestamps without offset are local (Vienna) time
+        (default: False)
+    :type local: bool
+    :return: Naive datetime in utc
+    :rtype: None | datetime.datetime
+    """
+    if not text:
+        return None
+    key = (text, local)
+    res = _iso_memo.get(key)
+    if res is not None:
+        return res
+    res = _parse_iso(text, local)
+    if res is None:
+        dt = dt_parse(text)
+        if local and dt.tzinfo is None:
+            res = local_to_utc(dt)
+        else:
+            res = to_utc(dt)
+    if len(_iso_memo) >= ISO_MEMO_SIZE:
+        _iso_memo.clear()
+    _iso_memo[key] = res
+    return res
+
+
+def run_parallel(func, items, workers):
+    """
+    Call func for each item on up to workers threads
+
+    :param func: Function to call
+    :type func: (T) -> R
+    :param items: Arguments
+    :type items: list[T]
+    :param workers: Maximum number of threads
+    :type workers: int
+    :return: (item, result, exception) in order of items
+    :rtype: list[(T, None | R, None | Exception)]
+    """
+    results = [None] * len(items)
+    if len(items) <= 1 or workers <= 1:
+        for i, item in enumerate(items):
+            try:
+                results[i] = (item, func(item), None)
+            except Exception as e:
+                results[i] = (item, None, e)
+        return results
+    todo = queue.Queue()
+    for i, item in enumerate(items):
+        todo.put((i, item))
+
+    def work():
+        while True:
+            try:
+                i, item = todo.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[i] = (item, func(item), None)
+            except Exception as e:
+                results[i] = (item, None, e)
+
+    threads = [
+        threading.Thread(target=work)
+        for _ in range(min(workers, len(items)))
+    ]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class WorkerPool(object):
+    """
+    Small pool of daemon threads shared by callers
+
+    Threads are started on demand up to workers and kept; work beyond
+    that waits for a free thread
+    """
+
+    def __init__(self, workers=4):
+        """
+        Initialize object
+
+        :param workers: Maximum number of threads (default: 4)
+        :type workers: int
+        :rtype: None
+        """
+        super(WorkerPool, self).__init__()
+        self.workers = workers
+        self._todo = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = 0
+        """ Number of started threads """
+        self._idle = 0
+        """ Number of threads waiting for work """
+
+    def submit(self, func, *args):
+        """
+        Call func(*args) on a pool thread (result and errors are dropped)
+
+        :param func: Function to call
+        :type func: (*T) -> None
+        :rtype: None
+        """
+        with self._lock:
+            if self._idle:
+                self._idle -= 1
+            elif self._threads < self.workers:
+                self._threads += 1
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+            self._todo.put((func, args))
+
+    def _work(self):
+        while True:
+            func, args = self._todo.get()
+            try:
+                func(*args)
+            except Exception:
+                pass
+            with self._lock:
+                self._idle += 1
+
+
+_race_pool = WorkerPool(4)
+""" Threads of run_first() """
+
+
+def run_first(func, items, pool=None):
+    """
+    Call func for all items at once and return the first success
+
+    Every item costs its own call (e.g. an upstream request and its
+    rate limit token) - calls still running after the first success are
+    left to finish on the pool (their results are dropped)
+
+    :param func: Function to call
+    :type func: (T) -> R
+    :param items: Arguments
+    :type items: list[T]
+    :param pool: Pool to run the calls on (default: None)
+        None -> small pool shared by all races
+    :type pool: None | wl.utils.WorkerPool
+    :return: First item to succeed and its result
+    :rtype: (T, R)
+    :raises Exception: Exception of the last call, if all calls failed
+    """
+    if len(items) == 1:
+        return items[0], func(items[0])
+    if pool is None:
+        pool = _race_pool
+    done = queue.Queue()
+
+    def work(item):
+        try:
+            done.put((item, func(item), None))
+        except Exception as e:
+            done.put((item, None, e))
+
+    for item in items:
+        pool.submit(work, item)
+    error = None
+
+    for _ in items:
+        item, result, error = done.get()
+        if error is None:
+            return item, result
+    raise error
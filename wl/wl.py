@@ -12,6 +12,9 @@ __version__ = "0.1.0"
 __date__ = "2017-11-18"
 # Created: 2017-11-07 01:34
 
+import time
+import threading
+
 from flotils import Loadable
 
 from .realtime import WLRealtime
@@ -20,6 +23,12 @@ from .db import WLDatabase
 from .models.general import Response, Stop, Line, Location, Departure
 from .models.routing import ItdRequest
 from .errors import RequestException
+from .transport import transport_from_settings
+from .limiter import limiter_from_settings
+from .resilience import resilience_from_settings
+from .limiter import priority, PRIORITY_BACKGROUND
+from .sessions import SessionPool
+from .utils import run_first
 
 
 class WL(Loadable):
@@ -29,11 +38,84 @@ class WL(Loadable):
         if settings is None:
             settings = {}
         super(WL, self).__init__(settings)
-        self.realtime = WLRealtime(settings['realtime'])
-        self.routing = WLRouting(settings.get('routing', {}))
+        self.transport = None
+        """ Transport shared by realtime and routing (setting 'transport')
+            :type : None | wl.transport.Transport """
+        if settings.get('transport') is not None:
+            self.transport = transport_from_settings(settings)
+        self.rate_limit = limiter_from_settings(settings)
+        """ Request budget shared by realtime and routing
+            (setting 'rate_limit')
+            :type : None | wl.limiter.RateLimiter """
+        self.resilience = resilience_from_settings(settings)
+        """ Circuit breakers and stale responses shared by realtime and
+            routing (setting 'resilience')
+            :type : None | wl.resilience.Resilience """
+        self.realtime = self._create_realtime(
+            self._client_settings(settings['realtime'])
+        )
+        """ :type : wl.realtime.WLRealtime """
+        self.routing = self._create_routing(
+            self._client_settings(settings.get('routing', {}))
+        )
+        """ :type : wl.routing.WLRouting """
         self.database = WLDatabase(settings.get('database', {}))
         if settings.get('auto_load_csv', False):
             self.database.csv_load()
+        sessions = dict(settings.get('sessions', {}))
+        self.session_refresh = sessions.pop('refresh', True)
+        """ Keep handed out sessions alive in the background once per use
+            (setting 'sessions': {'refresh': ..}) """
+        self.sessions = SessionPool(**sessions)
+        """ Liveness of routing sessions handed out by find_by(), search()
+            and select() (setting 'sessions': ttl, refresh_margin,
+            max_sessions) """
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+        """ :type : None | threading.Thread """
+
+    def _create_realtime(self, settings):
+        """
+        Create realtime api client
+
+        :param settings: Client settings (see _client_settings)
+        :type settings: dict
+        :rtype: wl.realtime.WLRealtime
+        """
+        return WLRealtime(settings)
+
+    def _create_routing(self, settings):
+        """
+        Create routing api client
+
+        :param settings: Client settings (see _client_settings)
+        :type settings: dict
+        :rtype: wl.routing.WLRouting
+        """
+        return WLRouting(settings)
+
+    def _client_settings(self, settings):
+        """
+        Settings of api client using the shared transport, rate limit
+        and resilience layer
+
+        :param settings: Client settings
+        :type settings: dict
+        :return: Client settings
+        :rtype: dict
+        """
+        shared = {}
+        if self.transport is not None and 'transport' not in settings:
+            shared['transport'] = self.transport
+        if self.rate_limit is not None and 'rate_limit' not in settings:
+            shared['rate_limit'] = self.rate_limit
+        if self.resilience is not None and 'resilience' not in settings:
+            shared['resilience'] = self.resilience
+        if not shared:
+            return settings
+        settings = dict(settings)
+        settings.update(shared)
+        return settings
 
     def _print(self, req):
         if req.stops:
@@ -76,6 +158,12 @@ class WL(Loadable):
             res.id = itd.session_id + res.id
         if itd.request_id:
             res.id = res.id + itd.request_id
+        stop_ids = []
+        if itd.stops:
+            stop_ids.extend(stop.stop_id for stop in itd.stops)
+        if itd.departures:
+            stop_ids.extend(dep.stop_id for dep in itd.departures)
+        joins = self.database.join_stops(stop_ids)
         if itd.stops:
             res.stops = []
             for stop in itd.stops:
@@ -84,11 +172,12 @@ class WL(Loadable):
                 new.name = stop.name
                 new.distance = stop.distance
                 new.distance_time = stop.distance_time
-                db_stop = self.database.find_stop(new.id)
-                if db_stop:
-                    new.location = Location(db_stop.lat, db_stop.lng)
-                    if not(new.location.latitude and new.location.longitude):
-                        new.location = None
+                join = joins.get(new.id)
+                if join:
+                    if join.location:
+                        new.location = Location(*join.location)
+                    new.rbls = list(join.rbls)
+                    new.lines = sorted(join.lines)
                 res.stops.append(new)
         if itd.departures:
             res.departures = []
@@ -102,6 +191,16 @@ class WL(Loadable):
                 if dep.line:
                     new.direction = dep.line.direction
                     new.line_name = dep.line.symbol
+                join = joins.get(new.stop_id)
+                if join:
+                    if join.location:
+                        new.location = Location(*join.location)
+                    line = join.lines.get(new.line_name)
+                    if line:
+                        new.line_id = line.line_id
+                        new.car_type = line.car_type
+                        new.realtime = line.realtime
+                        new.rbls = list(line.rbls)
                 res.departures.append(new)
         return res
 
@@ -111,31 +210,219 @@ class WL(Loadable):
         self._print(res)
         if res.departures:
             return None
+        self._track(res)
         return self._from_itd_dm_response(res)
 
-    def select(self, session, stops=None, lines=None, dt=None, limit=20):
+    def _search_local(self, name, limit=10):
+        """
+        Find stops by name in local database
+
+        :param name: (Partial) stop name
+        :type name: str | unicode
+        :param limit: Maximum number of results (default: 10)
+        :type limit: int
+        :return: Found stops (id not set) or None if nothing found
+        :rtype: None | wl.models.general.Response
+        """
+        found = []
+        if self.database.stops is not None:
+            found = self.database.search_stops(name, limit)
+        if not found:
+            return None
+        res = Response()
+        res.stops = []
+
+        for db_stop, _ in found:
+            new = Stop()
+            new.id = db_stop.stop_id
+            new.name = db_stop.name
+            if db_stop.lat is not None and db_stop.lng is not None:
+                new.location = Location(db_stop.lat, db_stop.lng)
+            res.stops.append(new)
+        return res
+
+    def search(self, name, limit=10):
+        """
+        Find stops by name - local database first, routing api as fallback
+
+        :param name: (Partial) stop name
+        :type name: str | unicode
+        :param limit: Maximum number of local results (default: 10)
+        :type limit: int
+        :return: Found stops (id not set for local results)
+        :rtype: None | wl.models.general.Response
+        """
+        self.debug("({})".format(name))
+        res = self._search_local(name, limit)
+        if res is None:
+            return self.find_by(name)
+        return res
+
+    def _track(self, itd):
+        """
+        Record successful use of the session of response
+
+        :param itd: Response handed out
+        :type itd: wl.models.routing.ItdResponse
+        :rtype: None
+        """
+        if itd.stale:
+            # Says nothing about the session
+            return
+        self.sessions.touch(itd.session_id, itd.request_id)
+        self._keep_alive()
+
+    def _keep_alive(self):
+        """
+        Start background refresh of sessions (if not running)
+
+        :rtype: None
+        """
+        if not self.session_refresh:
+            return
+        with self._refresh_lock:
+            if self._refresh_thread is not None:
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_loop
+            )
+            self._refresh_thread.daemon = True
+            self._refresh_thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            with self._refresh_lock:
+                wait = self.sessions.next_refresh()
+                if wait is None:
+                    self._refresh_thread = None
+                    return
+            if wait > 0:
+                # New sessions are due after the known ones
+                time.sleep(wait)
+                continue
+            try:
+                self.refresh_sessions()
+            except Exception:
+                self.exception("Failed to refresh sessions")
+
+    def _refreshed(self, session, res):
+        """
+        Record outcome of refresh
+
+        :param session: Refreshed session
+        :type session: wl.sessions.RoutingSession
+        :param res: Response or None if failed
+        :type res: None | wl.models.routing.ItdDMResponse
+        :rtype: None
+        """
+        if res is None or res.session_id != session.session_id:
+            self.sessions.fail(session.session_id)
+        else:
+            self.sessions.refreshed(session.session_id, res.request_id)
+
+    def refresh_sessions(self):
+        """
+        Refresh sessions close to expiry now
+
+        Each session is refreshed at most once per use - sessions nobody
+        uses anymore still expire
+
+        :return: Number of sessions refreshed
+        :rtype: int
+        """
+        sessions = self.sessions.due_refresh()
+
+        for session in sessions:
+            res = None
+            try:
+                with priority(PRIORITY_BACKGROUND):
+                    res = self.routing.dm_read(session)
+            except Exception as e:
+                self.warning("Failed to refresh session {}: {}".format(
+                    session.session_id, e
+                ))
+            self._refreshed(session, res)
+        return len(sessions)
+
+    def _select_plan(self, session, stops=None, lines=None):
+        """
+        Requests to try for a selection
+
+        Only a selection by stop ids (no line indexes) can be answered the
+        same by a fresh session - line indexes and a plain selection refer
+        to the stops found in the session, so such a session is used alone
+        and never retried fresh.
+        For stop ids warm sessions and those close to expiry are reused
+        (a fresh one if it fails) - keeping them alive is left to the
+        background refresh. Expired (or unparsable) ones are skipped.
+        Only sessions of unknown liveness are raced against a fresh
+        session, so a dead session does not cost an extra round trip.
+        The race costs an extra upstream request - without spare rate
+        limit tokens the session is tried alone
+
+        :param session: Session as in Response.id (sessionID:requestID)
+        :type session: None | str | unicode
+        :param stops: Stop ids to select (default: None)
+        :type stops: None | list[str | unicode | int]
+        :param lines: Lines to select (default: None)
+        :type lines: None | list
+        :return: Requests to race, whether to retry fresh if all fail
+        :rtype: (list[wl.models.routing.ItdRequest], bool)
+        """
         req = ItdRequest()
-        parts =[""]
+        fresh = ItdRequest()
+        parts = [""]
         if session:
             parts = session.split(":")
         if parts[0]:
             req.session_id = parts[0]
         if len(parts) > 1 and parts[1]:
             req.request_id = parts[1]
+        if not req.session_id:
+            return [fresh], False
+        if not stops or lines is not None:
+            return [req], False
+        state = self.sessions.state(req.session_id)
+        if state in (SessionPool.WARM, SessionPool.STALE):
+            return [req], True
+        if state == SessionPool.EXPIRED:
+            return [fresh], False
+        limiter = self.routing.rate_limit
+        if limiter is not None and not limiter.spare(2):
+            return [req], True
+        return [req, fresh], False
 
-        try:
-            selected = self.routing.dm_select(
+    def _selected(self, req, selected):
+        """
+        Track session of selection
+
+        :param req: Request that was used
+        :type req: wl.models.routing.ItdRequest
+        :param selected: Its response
+        :type selected: wl.models.routing.ItdDMResponse
+        :rtype: None
+        """
+        if req.session_id and req.session_id != selected.session_id:
+            self.sessions.fail(req.session_id)
+        self._track(selected)
+
+    def select(self, session, stops=None, lines=None, dt=None, limit=20):
+        reqs, retry = self._select_plan(session, stops, lines)
+
+        def select_with(req):
+            return self.routing.dm_select(
                 req, stops=stops, lines=lines, dt=dt, limit=limit
             )
+
+        try:
+            req, selected = run_first(select_with, reqs)
         except RequestException:
-            req.session_id = None
-            req.request_id = None
-            selected = self.routing.dm_select(
-                req, stops=stops, lines=lines, dt=dt, limit=limit
-            )
-        if stops and not selected.departures:
-            selected = self.routing.dm_select(
-                selected, limit=limit
-            )
+            if reqs[0].session_id:
+                self.sessions.fail(reqs[0].session_id)
+            if not retry:
+                raise
+            req = ItdRequest()
+            selected = select_with(req)
+        self._selected(req, selected)
         #self._print(selected)
         return self._from_itd_dm_response(selected)